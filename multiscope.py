@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
-from src.gui.app import run_gui
-from src.core.config import Config
+from src.cli import main as cli_main
 
 def main():
     """
     Main entry point for the MultiScope application.
+
+    Without a subcommand the GUI is opened; `launch`, `stop`, `status` and
+    `verify` run headless and never import GTK.
     """
-    run_gui()
+    cli_main()
 
 if __name__ == "__main__":
     main()
@@ -11,6 +11,7 @@ setup(
     python_requires=">=3.8",
     install_requires=[
         "psutil>=5.9.0",
+        "click>=8.0.0",
         "pydantic>=2.0.0",
         "PyGObject>=3.42.0",
     ],
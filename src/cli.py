@@ -0,0 +1,444 @@
+"""
+Headless command-line interface for MultiScope.
+
+Only the ``gui`` subcommand imports the GTK front-end; every other command
+works on top of the services and models, so a saved profile can be started
+from a script or a game-mode shortcut without loading GTK or libadwaita.
+"""
+import time
+
+# Taken before any heavy import so `--timing` reports the real cold start.
+_START = time.perf_counter()
+
+import json
+import os
+import signal
+import sys
+from typing import Dict, List, Optional
+
+import click
+
+from .core.config import Config
+
+
+def _parse_players(value: Optional[str]) -> Optional[List[int]]:
+    """Parses a comma separated list of instance numbers (e.g. ``1,3``)."""
+    if not value:
+        return None
+    try:
+        players = [int(p) for p in value.split(",") if p.strip()]
+    except ValueError:
+        raise click.BadParameter("expected a comma separated list of numbers")
+    if any(p < 1 for p in players):
+        raise click.BadParameter("instance numbers start at 1")
+    return players
+
+
+def _read_session() -> Dict:
+    """Reads the state file written by a running `launch` command."""
+    path = Config.get_cli_session_path()
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (IOError, json.JSONDecodeError):
+        return {}
+
+
+def _write_session(launcher_pid: int, pids: Dict[int, int]) -> None:
+    path = Config.get_cli_session_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"launcher_pid": launcher_pid, "instances": {str(k): v for k, v in pids.items()}}
+    path.write_text(json.dumps(data, indent=4), encoding="utf-8")
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@click.group(invoke_without_command=True)
+@click.pass_context
+def cli(ctx):
+    """MultiScope: launch multiple Steam instances with Gamescope."""
+    if ctx.invoked_subcommand is None:
+        ctx.invoke(gui)
+
+
+@cli.command()
+@click.option("--startup-profile", is_flag=True, help="Write an import-time and time-to-present report to the log directory.")
+def gui(startup_profile):
+    """Opens the graphical interface."""
+    from .core.startup import StartupProfiler, profiler_from_env
+
+    if startup_profile:
+        StartupProfiler.ensure_importtime()
+    profiler = profiler_from_env(_START)
+
+    from .gui.app import run_gui
+
+    # GTK parses argv itself; do not forward the subcommand name.
+    sys.argv = sys.argv[:1]
+    run_gui(profiler=profiler)
+
+
+@cli.command()
+def daemon():
+    """Runs the control-plane daemon that owns all instances."""
+    from .core.exceptions import ControlPlaneError
+    from .core.logger import Logger
+    from .services.control_plane import ControlDaemon
+
+    logger = Logger("MultiScope-Daemon", Config.LOG_DIR)
+    control_daemon = ControlDaemon(logger)
+
+    def _on_signal(signum, frame):
+        control_daemon.shutdown()
+
+    signal.signal(signal.SIGTERM, _on_signal)
+    signal.signal(signal.SIGINT, _on_signal)
+    try:
+        control_daemon.serve_forever()
+    except ControlPlaneError as e:
+        raise click.ClickException(str(e))
+
+
+def _daemon_client():
+    """Returns a control-plane client if a daemon is running, else None."""
+    from .services.control_plane import ControlClient
+
+    if ControlClient.is_daemon_running():
+        return ControlClient()
+    return None
+
+
+def _launch_via_daemon(client, players, gamescope, stagger, timing):
+    from .core.exceptions import LinuxCoopError
+
+    for idx, instance_num in enumerate(players):
+        if idx:
+            time.sleep(stagger)
+        try:
+            record = client.launch_instance(instance_num, use_gamescope_override=gamescope)
+        except LinuxCoopError as e:
+            raise click.ClickException(f"Instance {instance_num}: {e}")
+        click.echo(f"Instance {instance_num}: {record['state']} (PID {record.get('pid')})")
+        if idx == 0 and timing:
+            elapsed_ms = (time.perf_counter() - _START) * 1000
+            click.echo(f"time-to-first-spawn: {elapsed_ms:.1f} ms", err=True)
+
+
+def _export_launch_plan(players_opt, gamescope, output):
+    """Resolves the launch plan without starting or acquiring anything."""
+    from .core.logger import Logger
+    from .models.profile import Profile
+    from .services.instance import InstanceService
+
+    logger = Logger("MultiScope-CLI", Config.LOG_DIR)
+    try:
+        profile = Profile.load()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    players = _parse_players(players_opt) or profile.selected_players or list(range(1, profile.num_players + 1))
+    profile.selected_players = players
+    if gamescope is not None:
+        profile.use_gamescope = gamescope
+
+    plan = InstanceService(logger=logger, adopt=False).build_launch_plan(profile, players, dry_run=True)
+    text = plan.to_json(volatile=False)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        click.echo(f"Launch plan {plan.key[:12]} written to {output}.")
+    else:
+        click.echo(text)
+
+
+@cli.command()
+@click.option("--players", "players_opt", help="Comma separated instance numbers to launch (default: profile selection).")
+@click.option("--gamescope/--no-gamescope", default=None, help="Override the profile's Gamescope setting.")
+@click.option("--stagger", default=5.0, show_default=True, help="Seconds to wait between instance launches.")
+@click.option("--timing", is_flag=True, help="Report the time from process start to the first spawn.")
+@click.option("--dry-run", is_flag=True, help="Print the resolved launch plan as JSON instead of launching.")
+@click.option("--output", type=click.Path(dir_okay=False, writable=True), help="Write the --dry-run plan to a file.")
+def launch(players_opt, gamescope, stagger, timing, dry_run, output):
+    """
+    Launches the saved profile.
+
+    With a control daemon running, the instances are handed to it and the
+    command returns. Otherwise it waits in the foreground until they exit.
+    """
+    from .core.exceptions import LinuxCoopError
+    from .core.logger import Logger
+    from .models.profile import Profile
+    from .services.instance import InstanceService
+
+    if dry_run:
+        _export_launch_plan(players_opt, gamescope, output)
+        return
+
+    client = _daemon_client()
+    if client:
+        players = _parse_players(players_opt)
+        if players is None:
+            try:
+                profile = Profile.load()
+            except ValueError as e:
+                raise click.ClickException(str(e))
+            players = profile.selected_players or list(range(1, profile.num_players + 1))
+        _launch_via_daemon(client, players, gamescope, stagger, timing)
+        return
+
+    session = _read_session()
+    if _pid_alive(session.get("launcher_pid")):
+        raise click.ClickException(
+            f"A session is already running (launcher PID {session['launcher_pid']}). Use 'stop' first."
+        )
+
+    logger = Logger("MultiScope-CLI", Config.LOG_DIR)
+    try:
+        profile = Profile.load()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    players = _parse_players(players_opt) or profile.selected_players or list(
+        range(1, profile.num_players + 1)
+    )
+    profile.selected_players = players
+    service = InstanceService(logger=logger)
+
+    def _on_signal(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _on_signal)
+    try:
+        for idx, instance_num in enumerate(players):
+            if idx:
+                time.sleep(stagger)
+            service.launch_instance(profile, instance_num, use_gamescope_override=gamescope)
+            _write_session(os.getpid(), service.pids)
+            if idx == 0 and timing:
+                elapsed_ms = (time.perf_counter() - _START) * 1000
+                logger.info(f"First instance spawned {elapsed_ms:.1f} ms after process start.")
+                click.echo(f"time-to-first-spawn: {elapsed_ms:.1f} ms", err=True)
+
+        if not service.processes:
+            raise click.ClickException("No instance could be started. See the log for details.")
+
+        # Stay in the foreground: the launcher owns the virtual joystick and
+        # the process groups, so instances are cleaned up when it exits.
+        while any(p.poll() is None for p in service.processes.values()):
+            time.sleep(1)
+        logger.info("All instances exited.")
+    except KeyboardInterrupt:
+        logger.info("Launcher interrupted, stopping instances...")
+    except LinuxCoopError as e:
+        raise click.ClickException(str(e))
+    finally:
+        service.terminate_all()
+        Config.get_cli_session_path().unlink(missing_ok=True)
+
+
+@cli.command()
+def stop():
+    """Stops the instances started by `launch` or owned by the daemon."""
+    client = _daemon_client()
+    if client:
+        client.stop_all()
+        click.echo("Stopped all instances owned by the control daemon.")
+        return
+
+    session = _read_session()
+    launcher_pid = session.get("launcher_pid")
+    if not _pid_alive(launcher_pid):
+        Config.get_cli_session_path().unlink(missing_ok=True)
+        click.echo("No running session.")
+        return
+    os.kill(launcher_pid, signal.SIGTERM)
+    click.echo(f"Sent stop request to launcher PID {launcher_pid}.")
+
+
+@cli.command()
+@click.option("--json", "as_json", is_flag=True, help="Print the status as JSON.")
+def status(as_json):
+    """Shows which instances of the current session are running."""
+    client = _daemon_client()
+    if client:
+        records = client.status()
+        if as_json:
+            click.echo(json.dumps({str(num): record for num, record in records.items()}, indent=4))
+            return
+        click.echo(f"Control daemon at {client.socket_path}")
+        if not records:
+            click.echo("  No instances.")
+        for num in sorted(records):
+            record = records[num]
+            click.echo(f"  Instance {num}: {record['state']} (PID {record.get('pid')})")
+        standby = client.standby_metrics()
+        if standby.get("spawned"):
+            click.echo(
+                f"  Warm standby: {len(standby['standby'])} ready, {standby['committed']} released, "
+                f"{standby['seconds_saved']:.1f}s of startup saved"
+            )
+        for game, prefetch in client.prefetch_status().items():
+            loads = prefetch["loads"]
+            effect = ""
+            if loads["with_prefetch"] is not None and loads["without_prefetch"] is not None:
+                effect = f"; loads in {loads['with_prefetch']:.1f}s vs {loads['without_prefetch']:.1f}s without"
+            click.echo(
+                f"  Prefetch {game}: {prefetch['mb']:.0f}/{prefetch['cap_mb']:.0f} MB, "
+                f"{prefetch['files']}/{prefetch['files_total']} files{'' if prefetch['done'] else ' (running)'}{effect}"
+            )
+        merge = client.memory_merge_report()
+        if merge.get("active"):
+            per_extra = merge["saved_per_extra_instance_mb"]
+            click.echo(
+                f"  Memory merging: {merge['saved_mb']:.0f} MB shared"
+                f"{f', {per_extra:.0f} MB per extra instance' if per_extra is not None else ''}"
+                f"{'' if merge['ksmd_running'] else ' (ksmd stopped)'}"
+            )
+        for mode, footprint in client.client_footprint_report().items():
+            delta = footprint.get("vs_full")
+            versus = f" ({delta['rss_mb']:+.0f} MB vs full)" if delta else ""
+            click.echo(
+                f"  Steam client ({mode}): {footprint['rss_mb']:.0f} MB RSS, {footprint['cpu_pct']:.1f}% CPU{versus}"
+            )
+        return
+
+    session = _read_session()
+    launcher_pid = session.get("launcher_pid")
+    launcher_alive = _pid_alive(launcher_pid)
+    instances = {
+        int(num): {"pid": pid, "running": launcher_alive and _pid_alive(pid)}
+        for num, pid in (session.get("instances") or {}).items()
+    }
+
+    if as_json:
+        click.echo(json.dumps({
+            "launcher_pid": launcher_pid if launcher_alive else None,
+            "instances": instances,
+        }, indent=4))
+        return
+
+    if not launcher_alive:
+        click.echo("No running session.")
+        return
+    click.echo(f"Launcher PID {launcher_pid}")
+    for num in sorted(instances):
+        info = instances[num]
+        state = "running" if info["running"] else "exited"
+        click.echo(f"  Instance {num}: {state} (PID {info['pid']})")
+
+
+@cli.command()
+@click.option("--players", "players_opt", help="Comma separated instance numbers to verify (default: all configured).")
+def verify(players_opt):
+    """Checks that each instance's Steam home is ready to launch."""
+    from .core.logger import Logger
+    from .models.profile import Profile
+    from .services.verification_service import VerificationService
+
+    logger = Logger("MultiScope-CLI", Config.LOG_DIR)
+    players = _parse_players(players_opt)
+    if players is None:
+        try:
+            profile = Profile.load()
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        players = list(range(1, profile.num_players + 1))
+
+    verification_service = VerificationService(logger)
+    failed = False
+    for instance_num in players:
+        result = verification_service.verify_instance(instance_num)
+        failed = failed or result != "Passed"
+        click.echo(f"Instance {instance_num}: {result}")
+    if failed:
+        sys.exit(1)
+
+
+@cli.command()
+@click.option("--dry-run", is_flag=True, help="Only report what would be removed.")
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON.")
+def gc(dry_run, as_json):
+    """Enforces the disk budget of instance homes and logs."""
+    from .core.logger import Logger
+    from .models.profile import Profile
+    from .services.disk_budget import DiskBudgetService
+
+    logger = Logger("MultiScope-CLI", Config.LOG_DIR)
+    try:
+        profile = Profile.load()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    report = DiskBudgetService(logger).collect(profile.disk_budget, profile.num_players, dry_run=dry_run)
+    if as_json:
+        click.echo(json.dumps(report, indent=4))
+        return
+    for num, home in report["homes"].items():
+        categories = ", ".join(f"{name} {mb:.1f} MB" for name, mb in home["categories"].items() if mb)
+        flags = ", ".join(
+            flag for flag, on in (
+                ("running", home["running"] and not home["standby"]), ("warm standby", home["standby"]),
+                ("not configured", not home["configured"]),
+            ) if on
+        )
+        click.echo(
+            f"Instance {num}: {home['mb']:.0f} MB{f' ({categories})' if categories else ''}"
+            f"{f' [{flags}]' if flags else ''}"
+        )
+    click.echo(f"Logs: {report['logs_mb']:.0f} MB; total {report['total_mb']:.0f} MB")
+    for action in report["actions"]:
+        click.echo(f"  {'Would remove' if dry_run else 'Removed'} {action['path']} ({action['mb']:.1f} MB): {action['reason']}")
+    click.echo(f"{'Would free' if dry_run else 'Freed'} {report['freed_mb']:.0f} MB.")
+
+
+@cli.command("bench-input")
+@click.option("--devices", type=click.IntRange(min=1), default=1, show_default=True,
+              help="Number of simulated controllers.")
+@click.option("--rate", type=click.IntRange(min=1), default=1000, show_default=True,
+              help="Events per second per device.")
+@click.option("--duration", type=click.FloatRange(min=0, min_open=True), default=5.0, show_default=True,
+              help="Seconds of event injection.")
+@click.option("--path", "paths", type=click.Choice(["direct", "router"]), multiple=True,
+              help="Input path to measure; repeat to compare (default: both).")
+@click.option("--json", "as_json", is_flag=True, help="Print the reports as JSON.")
+def bench_input(devices, rate, duration, paths, as_json):
+    """Measures input latency and loss through uinput loopback devices."""
+    from .core.exceptions import VirtualDeviceError
+    from .core.logger import Logger
+    from .services.input_latency import InputLatencyBenchmark
+
+    logger = Logger("MultiScope-CLI", Config.LOG_DIR)
+    benchmark = InputLatencyBenchmark(logger)
+    reports = []
+    for path in paths or ("direct", "router"):
+        try:
+            reports.append(benchmark.run(devices=devices, rate_hz=rate, duration=duration, path=path))
+        except VirtualDeviceError as e:
+            raise click.ClickException(str(e))
+
+    if as_json:
+        click.echo(json.dumps(reports, indent=2))
+        return
+    for report in reports:
+        click.echo(
+            f"{report['path']:>7}: {report['devices']} x {report['rate_hz']} Hz "
+            f"(achieved {report['achieved_rate_hz']} Hz), "
+            f"p50 {report['p50_us']:.0f}us, p90 {report['p90_us']:.0f}us, p99 {report['p99_us']:.0f}us, "
+            f"p99.9 {report['p999_us']:.0f}us, max {report['max_us']:.0f}us, "
+            f"loss {report['loss_pct']:.2f}% ({report['received']}/{report['sent']})"
+        )
+
+
+def main():
+    """Entry point for the `multiscope` command."""
+    cli()
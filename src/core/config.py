@@ -1,3 +1,4 @@
+import os
 import sys
 from pathlib import Path
 
@@ -35,4 +36,57 @@ class Config:
         """Returns the isolated Steam home path for a given instance."""
         return Config.LOCAL_DIR / f"steam_home_{instance_num}"
 
+    @staticmethod
+    def get_cli_session_path() -> Path:
+        """Returns the state file of the session started by the CLI launcher."""
+        return Config.LOCAL_DIR / "cli_session.json"
+
+    @staticmethod
+    def get_shared_cache_dir() -> Path:
+        """Returns the directory holding caches shared between instances."""
+        return Config.LOCAL_DIR / "shared_cache"
+
+    @staticmethod
+    def get_cache_lock_dir() -> Path:
+        """Returns the directory holding the read-write locks of shared caches."""
+        return Config.LOCAL_DIR / "cache_locks"
+
+    @staticmethod
+    def get_pipeline_cache_dir() -> Path:
+        """Returns the directory holding per-game shared pipeline caches."""
+        return Config.LOCAL_DIR / "pipeline_cache"
+
+    @staticmethod
+    def get_instance_state_dir() -> Path:
+        """Returns the directory holding the per-instance state records."""
+        return Config.LOCAL_DIR / "state"
+
+    @staticmethod
+    def get_launch_plan_dir() -> Path:
+        """Returns the directory holding cached launch plans."""
+        return Config.LOCAL_DIR / "launch_plans"
+
+    @staticmethod
+    def get_prefetch_dir() -> Path:
+        """Returns the directory holding learned per-game file access orders."""
+        return Config.LOCAL_DIR / "prefetch"
+
+    @staticmethod
+    def get_disk_usage_index_path() -> Path:
+        """Returns the file caching directory sizes between disk collections."""
+        return Config.LOCAL_DIR / "disk_usage.json"
+
+    @staticmethod
+    def get_client_footprint_path() -> Path:
+        """Returns the file holding measured Steam client footprints per client mode."""
+        return Config.LOCAL_DIR / "client_footprint.json"
+
+    @staticmethod
+    def get_control_socket_path() -> Path:
+        """Returns the Unix socket path of the control-plane daemon."""
+        runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+        if runtime_dir:
+            return Path(runtime_dir) / Config.APP_NAME / "control.sock"
+        return Config.LOCAL_DIR / "control.sock"
+
     # `migrate_legacy_paths` removed — legacy migration is no longer performed.
@@ -45,3 +45,17 @@ class VirtualDeviceError(LinuxCoopError):
     Raised when there is an error creating or managing a virtual device.
     """
     pass
+
+class InstanceStateError(LinuxCoopError):
+    """
+    Raised when an instance operation is not allowed in the instance's
+    current state (e.g., launching an instance that is already running).
+    """
+    pass
+
+class ControlPlaneError(LinuxCoopError):
+    """
+    Raised when the control-plane daemon cannot be reached or returns an
+    invalid response.
+    """
+    pass
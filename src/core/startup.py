@@ -0,0 +1,132 @@
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import Config
+
+PROFILE_ENV = "MULTISCOPE_STARTUP_PROFILE"
+_FROZEN_NOTE = "import times are not recorded by the frozen build."
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+class StartupProfiler:
+    """
+    Records startup milestones and summarizes Python import times.
+
+    When enabled, the process is re-executed under ``python -X importtime``
+    with stderr captured to a file, so the report can break the cold start
+    down by module in addition to the time-to-present milestones.
+
+    Attributes:
+        start (float): The `time.perf_counter` value used as time zero.
+        marks (Dict[str, float]): Milliseconds since `start` per milestone.
+    """
+
+    def __init__(self, start: float):
+        self.start = start
+        self.marks: Dict[str, float] = {}
+
+    @staticmethod
+    def get_importtime_log_path() -> Path:
+        """Returns the file receiving the interpreter's import timings."""
+        return Config.LOG_DIR / "startup_importtime.log"
+
+    @staticmethod
+    def get_report_path() -> Path:
+        """Returns the path of the human-readable startup report."""
+        return Config.LOG_DIR / "startup_profile.txt"
+
+    @classmethod
+    def ensure_importtime(cls) -> None:
+        """
+        Re-executes the current process under ``-X importtime`` if needed.
+
+        Does nothing when import timing is already active, so it is safe to
+        call unconditionally once profiling was requested. A frozen
+        (PyInstaller) build has no interpreter to pass ``-X`` to; it only
+        records the milestones.
+        """
+        if "importtime" in sys._xoptions:
+            return
+        if getattr(sys, "frozen", False):
+            os.environ[PROFILE_ENV] = "1"
+            print(f"Startup profile: {_FROZEN_NOTE}", file=sys.stderr)
+            return
+        log_path = cls.get_importtime_log_path()
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.dup2(fd, sys.stderr.fileno())
+        os.close(fd)
+        os.environ[PROFILE_ENV] = "1"
+        argv = [sys.executable, "-X", "importtime"] + sys.argv
+        os.execv(sys.executable, argv)
+
+    def mark(self, name: str) -> None:
+        """Records a milestone relative to the profiler's start time."""
+        self.marks[name] = (time.perf_counter() - self.start) * 1000
+
+    @staticmethod
+    def parse_importtime(text: str) -> List[Tuple[str, int, int, int]]:
+        """
+        Parses ``-X importtime`` output.
+
+        Returns:
+            List[Tuple[str, int, int, int]]: One ``(module, self_us,
+            cumulative_us, depth)`` tuple per imported module.
+        """
+        entries = []
+        for line in text.splitlines():
+            match = _IMPORTTIME_RE.match(line)
+            if match:
+                depth = len(match.group(3)) // 2
+                entries.append((match.group(4), int(match.group(1)), int(match.group(2)), depth))
+        return entries
+
+    def build_report(self, top: int = 25) -> str:
+        """Builds the startup report from the marks and the import log."""
+        lines = ["MultiScope startup profile", ""]
+        lines.append("Milestones (ms since process start):")
+        for name, elapsed in sorted(self.marks.items(), key=lambda item: item[1]):
+            lines.append(f"  {elapsed:10.1f}  {name}")
+
+        log_path = self.get_importtime_log_path()
+        if getattr(sys, "frozen", False):
+            # A log left by an earlier unfrozen run would not describe this one
+            lines.append("")
+            lines.append(f"Imports: {_FROZEN_NOTE}")
+        elif log_path.exists():
+            entries = self.parse_importtime(log_path.read_text(encoding="utf-8", errors="replace"))
+            top_level = [e for e in entries if e[3] == 0]
+            total_us = sum(e[2] for e in top_level)
+            lines.append("")
+            lines.append(f"Imports: {len(entries)} modules, {total_us / 1000:.1f} ms total")
+            lines.append("Slowest top-level imports (cumulative ms):")
+            for module, _self_us, cumulative_us, _depth in sorted(top_level, key=lambda e: e[2], reverse=True)[:top]:
+                lines.append(f"  {cumulative_us / 1000:10.1f}  {module}")
+            lines.append("Slowest modules (self ms):")
+            for module, self_us, _cumulative_us, _depth in sorted(entries, key=lambda e: e[1], reverse=True)[:top]:
+                lines.append(f"  {self_us / 1000:10.1f}  {module}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, logger=None) -> Path:
+        """Writes the report to the log directory and returns its path."""
+        sys.stderr.flush()
+        report_path = self.get_report_path()
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(self.build_report(), encoding="utf-8")
+        if logger:
+            summary = ", ".join(f"{k}={v:.1f}ms" for k, v in self.marks.items())
+            logger.info(f"Startup profile: {summary} (report: {report_path})")
+            if getattr(sys, "frozen", False):
+                logger.info(f"Startup profile: {_FROZEN_NOTE}")
+        return report_path
+
+
+def profiler_from_env(start: float) -> Optional[StartupProfiler]:
+    """Returns a profiler when startup profiling was requested, else None."""
+    if os.environ.get(PROFILE_ENV):
+        return StartupProfiler(start)
+    return None
@@ -11,12 +11,15 @@ gi.require_version("Adw", "1")
 from gi.repository import Adw, Gdk, Gio, GLib, Gtk
 
 from ..core.config import Config
-from ..core.exceptions import VirtualDeviceError
+from ..core.exceptions import InstanceStateError, LinuxCoopError, VirtualDeviceError
 from ..core.logger import Logger
 from ..models.profile import Profile
-from ..services.instance import InstanceService
+from ..services.control_plane import connect_registry
 from .layout_editor import LayoutSettingsPage
 
+# Quiet period after the last profile change before standbys are restarted.
+STANDBY_DEBOUNCE_SECONDS = 2
+
 
 class MultiScopeWindow(Adw.ApplicationWindow):
     def __init__(self, *args, **kwargs):
@@ -25,14 +28,19 @@ class MultiScopeWindow(Adw.ApplicationWindow):
         self.set_default_size(800, 600)
 
         self.logger = Logger("MultiScope-GUI", Config.LOG_DIR, reset=True)
-        self.instance_service = InstanceService(logger=self.logger)
+        # A single registry (in-process, or the control daemon when one is
+        # running) is shared with the layout page so per-instance Start
+        # buttons and the global Play/Stop track the same processes.
+        self.registry = connect_registry(self.logger)
         self.profile = Profile.load()
 
         self._launch_thread = None
         self._cancel_launch_event = threading.Event()
+        self._standby_source_id = None
 
         self._build_ui()
         self._update_launch_button_state()
+        self.connect("close-request", self._on_close_request)
 
     def _show_error_dialog(self, message):
         dialog = Adw.MessageDialog(
@@ -50,11 +58,17 @@ class MultiScopeWindow(Adw.ApplicationWindow):
         header_bar.get_style_context().add_class("header-bar")
         self.toolbar_view.add_top_bar(header_bar)
 
-        self.layout_settings_page = LayoutSettingsPage(self.profile, self.logger)
+        # Player rows are built after the first frame; the page signals
+        # "rows-loaded" once they exist.
+        self.layout_settings_page = LayoutSettingsPage(
+            self.profile, self.logger, registry=self.registry, defer_rows=True
+        )
         self.layout_settings_page.connect("settings-changed", self._trigger_auto_save)
         self.layout_settings_page.connect(
             "instance-state-changed", self._on_instance_state_changed
         )
+        self.layout_settings_page.connect("rows-loaded", self._update_launch_button_state)
+        self.layout_settings_page.connect("rows-loaded", self._schedule_standby)
         self.toolbar_view.set_content(self.layout_settings_page)
 
         # Footer Bar for Play/Stop buttons
@@ -85,6 +99,36 @@ class MultiScopeWindow(Adw.ApplicationWindow):
         self.logger.info("Profile auto-saved.")
         self.layout_settings_page._run_verification()
         self._update_launch_button_state()
+        self._schedule_standby()
+
+    def _schedule_standby(self, *args):
+        """(Re)starts warm standbys once the profile has stopped changing."""
+        if self._standby_source_id:
+            GLib.source_remove(self._standby_source_id)
+        self._standby_source_id = GLib.timeout_add_seconds(STANDBY_DEBOUNCE_SECONDS, self._start_standby_worker)
+
+    def _start_standby_worker(self):
+        self._standby_source_id = None
+        if self._launch_thread or self.layout_settings_page.is_any_instance_running():
+            return GLib.SOURCE_REMOVE
+        threading.Thread(target=self._standby_worker, name="standby-prepare", daemon=True).start()
+        return GLib.SOURCE_REMOVE
+
+    def _standby_worker(self):
+        """Starts (or discards stale) warm standbys; runs off the main thread."""
+        try:
+            self.registry.prepare_standby(self.profile)
+        except LinuxCoopError as e:
+            self.logger.warning(f"Warm standby unavailable: {e}")
+
+    def _on_close_request(self, window):
+        self.layout_settings_page.cancel_pending_actions()
+        # Held standbys are stopped processes nobody would ever resume
+        try:
+            self.registry.discard_standby()
+        except LinuxCoopError as e:
+            self.logger.warning(f"Could not discard warm standbys: {e}")
+        return False
 
     def _update_launch_button_state(self, *args):
         selected_players = self.layout_settings_page.get_selected_players()
@@ -114,13 +158,22 @@ class MultiScopeWindow(Adw.ApplicationWindow):
         self.logger.info(f"Launch worker started for players: {selected_players}")
 
         try:
+            # Warm standbys are released together, without the stagger
+            released = self.registry.release_standbys(selected_players, self.profile)
             for instance_num in selected_players:
                 if self._cancel_launch_event.is_set():
                     self.logger.info("Launch sequence cancelled by user.")
                     break
+                if instance_num in released:
+                    continue
 
                 self.logger.info(f"Worker launching instance {instance_num}...")
-                self.instance_service.launch_instance(self.profile, instance_num)
+                try:
+                    self.registry.launch_instance(instance_num, self.profile)
+                except InstanceStateError as e:
+                    # Already running, e.g. re-adopted after a GUI restart
+                    self.logger.info(f"Skipping instance {instance_num}: {e}")
+                    continue
                 time.sleep(5)  # Stagger launches
 
             # If the loop completes without errors, finalize the launch
@@ -129,7 +182,7 @@ class MultiScopeWindow(Adw.ApplicationWindow):
         except VirtualDeviceError as e:
             self.logger.error(f"Caught virtual device error: {e}. Aborting launch.")
             # Ensure any instances that *did* launch are stopped
-            self.instance_service.terminate_all()
+            self.registry.stop_all()
             # Safely update the UI from the main thread
             GLib.idle_add(self._show_error_dialog, f"Could not launch: {e}")
             GLib.idle_add(self._restore_ui_after_failed_launch)
@@ -185,38 +238,96 @@ class MultiScopeWindow(Adw.ApplicationWindow):
             self._cancel_launch_event.set()
             # The worker will terminate running instances as it shuts down
 
-        self.instance_service.terminate_all()
+        # Stopping waits for launches in flight (or the daemon), so it runs
+        # off the main thread
+        self.stop_button.set_sensitive(False)
+        threading.Thread(target=self._stop_worker, name="stop-all", daemon=True).start()
+
+    def _stop_worker(self):
+        """Worker function to stop every instance in a separate thread."""
+        try:
+            self.registry.stop_all()
+        except LinuxCoopError as e:
+            self.logger.error(f"Could not stop the instances: {e}")
+            GLib.idle_add(self._show_error_dialog, f"Could not stop: {e}")
+        GLib.idle_add(self._on_stop_finished)
+
+    def _on_stop_finished(self):
+        """Callback executed in the main thread when the stop worker is done."""
+        self.stop_button.set_sensitive(True)
         self.launch_button.set_visible(True)
         self.stop_button.set_visible(False)
         self.layout_settings_page.set_sensitive(True)
         self.layout_settings_page.set_running_state(False)
         self.layout_settings_page._run_verification()
         self._update_launch_button_state()
+        self._schedule_standby()
+        return False
 
 class MultiScopeApplication(Adw.Application):
-    def __init__(self, **kwargs):
+    def __init__(self, profiler=None, **kwargs):
         super().__init__(application_id="com.github.jules.multiscope", **kwargs)
+        self.profiler = profiler
         self.connect("activate", self.on_activate)
 
-    def on_activate(self, app):
-        self.win = MultiScopeWindow(application=app)
+    def _load_resources(self, display):
+        """
+        Registers the compiled GResource bundle and the stylesheet.
+
+        The CSS provider is installed on the display before the window is
+        built, so widgets are styled once instead of being restyled after
+        the first frame.
+        """
+        resource_path = Path(__file__).parent / "resources" / "compiled.gresource"
+        if resource_path.exists():
+            try:
+                Gio.resources_register(Gio.Resource.load(str(resource_path)))
+            except GLib.Error:
+                pass
 
-        css_provider = Gtk.CssProvider()
         css_path = Path(__file__).parent / "style.css"
         if css_path.exists():
+            css_provider = Gtk.CssProvider()
             css_provider.load_from_path(str(css_path))
             Gtk.StyleContext.add_provider_for_display(
-                self.win.get_display(),
+                display,
                 css_provider,
                 Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION,
             )
+
+    def on_activate(self, app):
+        self._load_resources(Gdk.Display.get_default())
+        if self.profiler:
+            self.profiler.mark("resources-loaded")
+
+        self.win = MultiScopeWindow(application=app)
+        if self.profiler:
+            self.profiler.mark("window-constructed")
+            self.win.connect("map", self._on_window_mapped)
+            self.win.layout_settings_page.connect("rows-loaded", self._on_rows_loaded)
         self.win.present()
 
-def run_gui():
+    def _on_window_mapped(self, window):
+        frame_clock = window.get_frame_clock()
+        handler_ids = []
+
+        def on_after_paint(clock):
+            clock.disconnect(handler_ids[0])
+            self.profiler.mark("first-frame")
+
+        handler_ids.append(frame_clock.connect("after-paint", on_after_paint))
+
+    def _on_rows_loaded(self, page):
+        self.profiler.mark("rows-loaded")
+        self.profiler.write_report(self.win.logger)
+
+def run_gui(profiler=None):
     """Lança a aplicação GUI."""
     # Set the dark theme BEFORE instantiating the app
     style_manager = Adw.StyleManager.get_default()
     style_manager.set_color_scheme(Adw.ColorScheme.PREFER_DARK)
 
-    app = MultiScopeApplication()
+    if profiler:
+        profiler.mark("gtk-imported")
+    app = MultiScopeApplication(profiler=profiler)
     app.run(sys.argv)
@@ -1,5 +1,8 @@
 import gi
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ..core.exceptions import LinuxCoopError
 from ..models.profile import Profile, SplitscreenConfig, PlayerInstanceConfig
 
 gi.require_version("Gtk", "4.0")
@@ -7,33 +10,157 @@ gi.require_version("Adw", "1")
 
 from ..services.device_manager import DeviceManager
 from ..services.verification_service import VerificationService
-from gi.repository import Adw, Gdk, GObject, Gtk
+from gi.repository import Adw, Gdk, GLib, GObject, Gtk
 
-from ..services.instance import InstanceService
+# Worker threads for the per-instance Start/Stop buttons; further actions queue.
+INSTANCE_ACTION_WORKERS = 2
+
+# Row phase of an instance whose Start was clicked but that no worker has
+# launched yet; the other phases are the registry's states.
+PREPARING = "preparing"
+_PHASE_SUBTITLES = {
+    PREPARING: "Preparing...",
+    "starting": "Starting...",
+    "suspended": "Suspended",
+    "stopping": "Stopping...",
+}
 
 
 class LayoutSettingsPage(Adw.PreferencesPage):
     __gsignals__ = {
         "settings-changed": (GObject.SIGNAL_RUN_FIRST, None, ()),
         "instance-state-changed": (GObject.SIGNAL_RUN_FIRST, None, ()),
+        "rows-loaded": (GObject.SIGNAL_RUN_FIRST, None, ()),
     }
 
-    def __init__(self, profile, logger, **kwargs):
+    def __init__(self, profile, logger, registry=None, defer_rows=False, **kwargs):
+        """
+        Args:
+            profile (Profile): The profile edited by this page.
+            logger (Logger): The application logger.
+            registry (Optional[InstanceRegistry]): The registry used by the
+                per-instance Start buttons. Sharing the window's registry
+                keeps both views on the same processes.
+            defer_rows (bool): If True, device discovery and the player rows
+                are postponed to an idle callback so the window can present
+                its first frame sooner. "rows-loaded" is emitted when done.
+        """
         super().__init__(**kwargs)
         self._is_loading = False
         self.profile = profile
         self.player_rows = []
         self.logger = logger
-        self.instance_service = InstanceService(logger)
+        self._registry = registry
+        self._action_executor = None
+        # Cancellation flag of each instance's queued or running launch
+        self._launch_cancels = {}
+        self._pending_actions = {}
+        if registry is not None:
+            registry.subscribe(self._on_registry_event)
         self.verification_service = VerificationService(logger)
         self.device_manager = DeviceManager()
+        self.input_devices = {"keyboard": [], "mouse": [], "joystick": []}
+        self.audio_devices = []
+        self._display_outputs = None
+        self.joystick_model = None
+        self.mouse_model = None
+        self.keyboard_model = None
+        self.audio_model = None
+        self.display_model = None
+
+        self._build_ui()
+        if defer_rows:
+            # Changes are not reported until the rows exist, otherwise an
+            # auto-save would persist a profile without player configs.
+            self._is_loading = True
+            self._load_general_settings()
+            GLib.idle_add(self._load_rows_idle, priority=GLib.PRIORITY_DEFAULT_IDLE)
+        else:
+            self._load_devices()
+            self.load_profile_data()
+            self._run_verification()
+            self.sync_with_registry()
+
+    @property
+    def registry(self):
+        if self._registry is None:
+            from ..services.instance_registry import InstanceRegistry
+            self._registry = InstanceRegistry(self.logger)
+            self._registry.subscribe(self._on_registry_event)
+        return self._registry
+
+    def _on_registry_event(self, event):
+        # Registry events arrive on worker threads; apply them on the GTK thread.
+        GLib.idle_add(
+            self._apply_instance_state, event["instance"], event["state"], event.get("suspend_report"),
+            event.get("error"),
+        )
+
+    def _apply_instance_state(self, instance_num, state, suspend_report=None, error=None):
+        idx = instance_num - 1
+        if 0 <= idx < len(self.player_rows):
+            from ..services.instance_registry import ACTIVE_STATES, FAILED, SUSPENDED
+            row_data = self.player_rows[idx]
+            if state not in ACTIVE_STATES and row_data["phase"] == PREPARING:
+                # A late event of an earlier run; the queued launch still owns the row
+                return GLib.SOURCE_REMOVE
+            self._set_row_phase(row_data, state if state in ACTIVE_STATES else None)
+            self._set_row_suspended(row_data, state == SUSPENDED, suspend_report)
+            if state == FAILED and error:
+                row_data["expander"].set_subtitle(f"Failed: {error}")
+            self.emit("instance-state-changed")
+        return GLib.SOURCE_REMOVE
+
+    @property
+    def display_outputs(self):
+        if self._display_outputs is None:
+            self._display_outputs = self.device_manager.get_display_outputs()
+        return self._display_outputs
+
+    def _load_devices(self):
         self.input_devices = self.device_manager.get_input_devices()
         self.audio_devices = self.device_manager.get_audio_devices()
-        self.display_outputs = self.device_manager.get_display_outputs()
+        # Device models are shared by every player row instead of being
+        # duplicated per row, so adding a row only costs its own widgets.
+        self.joystick_model = Gtk.StringList.new(
+            ["None"] + [d["name"] for d in self.input_devices.get("joystick", [])]
+        )
+        self.mouse_model = Gtk.StringList.new(
+            ["None"] + [d["name"] for d in self.input_devices.get("mouse", [])]
+        )
+        self.keyboard_model = Gtk.StringList.new(
+            ["None"] + [d["name"] for d in self.input_devices.get("keyboard", [])]
+        )
+        self.audio_model = Gtk.StringList.new(
+            ["None"] + [d["name"] for d in self.audio_devices]
+        )
+        self.display_model = Gtk.StringList.new(
+            ["Any"] + [d["name"] for d in self.display_outputs]
+        )
 
-        self._build_ui()
+    def _load_rows_idle(self):
+        self._load_devices()
         self.load_profile_data()
         self._run_verification()
+        self.sync_with_registry()
+        self.emit("rows-loaded")
+        return GLib.SOURCE_REMOVE
+
+    def sync_with_registry(self):
+        """Reflects instances that are already running (e.g. re-adopted ones)."""
+        from ..services.instance_registry import ACTIVE_STATES, SUSPENDED
+
+        records = self.registry.status()
+        for idx, row_data in enumerate(self.player_rows):
+            record = records.get(idx + 1)
+            if idx + 1 in self._pending_actions:
+                continue  # The action's own events will update the row
+            self._set_row_phase(row_data, record["state"] if record and record["state"] in ACTIVE_STATES else None)
+            self._set_row_suspended(
+                row_data, bool(record and record["state"] == SUSPENDED), record and record.get("suspend_report")
+            )
+        if self.is_any_instance_running():
+            self.emit("instance-state-changed")
 
     def _build_ui(self):
         self.set_title("Layout Settings")
@@ -47,7 +174,7 @@ class LayoutSettingsPage(Adw.PreferencesPage):
             subtitle="How many Steam instances to launch",
         )
         self.num_players_row.get_style_context().add_class("num-players-row")
-        adjustment = Gtk.Adjustment(value=2, lower=1, upper=8, step_increment=1)
+        adjustment = Gtk.Adjustment(value=2, lower=1, upper=16, step_increment=1)
         self.num_players_row.set_adjustment(adjustment)
         adjustment.connect("value-changed", self._on_num_players_changed)
         layout_group.add(self.num_players_row)
@@ -97,6 +224,27 @@ class LayoutSettingsPage(Adw.PreferencesPage):
         self.use_gamescope_row.connect("notify::active", self._on_setting_changed)
         layout_group.add(self.use_gamescope_row)
 
+        self.render_scale_values = [1.0, 0.75, 0.67, 0.5]
+        self.render_scale_row = Adw.ComboRow(
+            title="Render Scale",
+            subtitle="Render below the tile resolution and let Gamescope upscale",
+            model=Gtk.StringList.new([f"{int(v * 100)}%" for v in self.render_scale_values]),
+        )
+        self.render_scale_row.get_style_context().add_class("render-scale-row")
+        self.render_scale_row.connect("notify::selected-item", self._on_setting_changed)
+        layout_group.add(self.render_scale_row)
+
+        # Client preset of every instance after the first (None: same as the first)
+        self.secondary_client_values = [None, "lite", "minimal"]
+        self.secondary_client_row = Adw.ComboRow(
+            title="Secondary Instances' Steam Client",
+            subtitle="Run a lighter Steam client in every instance but the first",
+            model=Gtk.StringList.new(["Full", "Lite (no GPU web views, friends or chat)", "Minimal (single-process web views)"]),
+        )
+        self.secondary_client_row.get_style_context().add_class("secondary-client-row")
+        self.secondary_client_row.connect("notify::selected-item", self._on_setting_changed)
+        layout_group.add(self.secondary_client_row)
+
         # Global environment variables
         self.env_group = Adw.PreferencesGroup(title="Environment Variables (Global)")
         self.env_group.get_style_context().add_class("global-env-group")
@@ -116,9 +264,10 @@ class LayoutSettingsPage(Adw.PreferencesPage):
         self.players_group.get_style_context().add_class("players-group")
         self.add(self.players_group)
 
-    def load_profile_data(self):
+    def _load_general_settings(self):
+        """Loads the settings shown above the player rows."""
+        was_loading = self._is_loading
         self._is_loading = True
-
         adj = self.num_players_row.get_adjustment()
         adj.set_value(self.profile.num_players)
 
@@ -141,36 +290,28 @@ class LayoutSettingsPage(Adw.PreferencesPage):
 
         # Load gamescope setting
         self.use_gamescope_row.set_active(self.profile.use_gamescope)
+        closest_scale = min(self.render_scale_values, key=lambda v: abs(v - self.profile.render_scale))
+        self.render_scale_row.set_selected(self.render_scale_values.index(closest_scale))
+        secondary_mode = self.profile.secondary_client_mode
+        self.secondary_client_row.set_selected(
+            self.secondary_client_values.index(secondary_mode) if secondary_mode in self.secondary_client_values else 0
+        )
 
         if is_splitscreen and self.profile.splitscreen:
             orientation = self.profile.splitscreen.orientation.capitalize()
             self.orientation_row.set_selected(self.orientations.index(orientation))
+        self._is_loading = was_loading
+
+    def load_profile_data(self):
+        self._is_loading = True
+        self._load_general_settings()
 
         self.rebuild_player_rows()
         # Populate per-player device selections
         for i, row_dict in enumerate(self.player_rows):
+            self._reset_player_row(row_dict)
             if i < len(self.profile.player_configs):
-                config = self.profile.player_configs[i]
-                row_dict["grab_input"].set_active(config.grab_input_devices)
-                self._set_combo_row_selection(row_dict["joystick"], self.input_devices["joystick"], config.PHYSICAL_DEVICE_ID)
-                # self._set_combo_row_selection(row_dict["mouse"], self.input_devices["mouse"], config.MOUSE_EVENT_PATH)
-                # self._set_combo_row_selection(row_dict["keyboard"], self.input_devices["keyboard"], config.KEYBOARD_EVENT_PATH)
-                self._set_combo_row_selection(row_dict["audio"], self.audio_devices, config.AUDIO_DEVICE_ID)
-                # Ensure env UI exists for this player
-                if not row_dict.get("env_initialized"):
-                    env_title_row = Adw.ActionRow(title="Environment Variables")
-                    add_btn = Gtk.Button.new_from_icon_name("list-add-symbolic")
-                    add_btn.get_style_context().add_class("add-button")
-                    add_btn.set_valign(Gtk.Align.CENTER)
-                    add_btn.connect("clicked", lambda b, i=i: self._add_player_env_row_by_index(i))
-                    env_title_row.add_suffix(add_btn)
-                    row_dict["expander"].add_row(env_title_row)
-                    row_dict["env_initialized"] = True
-                    row_dict["env_rows"] = []
-                # Populate per-player ENV
-                if getattr(config, "env", None):
-                    for k, v in (config.env or {}).items():
-                        self._add_player_env_row_by_index(i, k, v)
+                self._populate_player_row(i, self.profile.player_configs[i])
         # Populate global ENV
         if hasattr(self, "global_env_rows"):
             for env_row in self.global_env_rows:
@@ -194,15 +335,45 @@ class LayoutSettingsPage(Adw.PreferencesPage):
 
         self._is_loading = False
 
+    def _reset_player_row(self, row_dict: dict):
+        """Returns a reused row's widget state to that of a newly created row."""
+        row_dict["checkbox"].set_active(True)
+        row_dict["grab_input"].set_active(False)
+        row_dict["grab_input"].set_sensitive(True)
+
+    def _populate_player_row(self, idx: int, config: PlayerInstanceConfig):
+        """Applies a saved player configuration to an existing row."""
+        row_dict = self.player_rows[idx]
+        row_dict["grab_input"].set_active(config.grab_input_devices)
+        self._set_combo_row_selection(row_dict["joystick"], self.input_devices["joystick"], config.PHYSICAL_DEVICE_ID)
+        self._set_combo_row_selection(row_dict["mouse"], self.input_devices["mouse"], config.MOUSE_EVENT_PATH)
+        self._set_combo_row_selection(row_dict["keyboard"], self.input_devices["keyboard"], config.KEYBOARD_EVENT_PATH)
+        self._set_combo_row_selection(row_dict["audio"], self.audio_devices, config.AUDIO_DEVICE_ID)
+        display_ids = [d["id"] for d in self.display_outputs]
+        row_dict["display"].set_selected(
+            display_ids.index(config.monitor_id) + 1 if config.monitor_id in display_ids else 0
+        )
+        # Replace, rather than append to, any ENV rows already on the row
+        for env_row in list(row_dict["env_rows"]):
+            row_dict["expander"].remove(env_row["row"])
+        row_dict["env_rows"] = []
+        for k, v in (config.env or {}).items():
+            self._add_player_env_row_by_index(idx, k, v)
+
     def _set_combo_row_selection(self, combo_row, device_list, device_id):
         if not device_id:
             combo_row.set_selected(0)
             return
 
         try:
+            for i, device in enumerate(device_list):
+                if device["id"] == device_id:
+                    combo_row.set_selected(i + 1)
+                    return
+            # Profiles saved before stable identities store device paths
             canonical_id = os.path.realpath(device_id)
             for i, device in enumerate(device_list):
-                if os.path.realpath(device["id"]) == canonical_id:
+                if os.path.realpath(device.get("path", device["id"])) == canonical_id:
                     combo_row.set_selected(i + 1)
                     return
         except Exception as e:
@@ -225,12 +396,17 @@ class LayoutSettingsPage(Adw.PreferencesPage):
         self.profile.mode = self.screen_mode_row.get_selected_item().get_string().lower()
         if self.profile.mode == "splitscreen":
             orientation = self.orientation_row.get_selected_item().get_string().lower()
-            self.profile.splitscreen = SplitscreenConfig(orientation=orientation)
+            if self.profile.splitscreen:
+                self.profile.splitscreen = self.profile.splitscreen.model_copy(update={"orientation": orientation})
+            else:
+                self.profile.splitscreen = SplitscreenConfig(orientation=orientation)
         else:
             self.profile.splitscreen = None
 
         # Save gamescope setting
         self.profile.use_gamescope = self.use_gamescope_row.get_active()
+        self.profile.render_scale = self.render_scale_values[self.render_scale_row.get_selected()]
+        self.profile.secondary_client_mode = self.secondary_client_values[self.secondary_client_row.get_selected()]
 
         # Collect global environment variables
         self.profile.env = self._collect_env_from_rows(self.global_env_rows)
@@ -239,14 +415,22 @@ class LayoutSettingsPage(Adw.PreferencesPage):
         for i in range(self.profile.num_players):
             if i < len(self.player_rows):
                 row_dict = self.player_rows[i]
-                new_config = PlayerInstanceConfig(
-                    PHYSICAL_DEVICE_ID=self._get_combo_row_device_id(row_dict["joystick"], self.input_devices["joystick"]),
-                    grab_input_devices=row_dict["grab_input"].get_active(),
-                    # MOUSE_EVENT_PATH=self._get_combo_row_device_id(row_dict["mouse"], self.input_devices["mouse"]),
-                    # KEYBOARD_EVENT_PATH=self._get_combo_row_device_id(row_dict["keyboard"], self.input_devices["keyboard"]),
-                    AUDIO_DEVICE_ID=self._get_combo_row_device_id(row_dict["audio"], self.audio_devices),
-                    env=self._collect_env_from_rows(row_dict.get("env_rows", [])),
+                # Start from the saved config so fields without a widget
+                # (e.g. MONITOR_ID, RENDER_SCALE) are preserved.
+                base_config = (
+                    self.profile.player_configs[i]
+                    if i < len(self.profile.player_configs)
+                    else PlayerInstanceConfig()
                 )
+                new_config = base_config.model_copy(update={
+                    "PHYSICAL_DEVICE_ID": self._get_combo_row_device_id(row_dict["joystick"], self.input_devices["joystick"]),
+                    "grab_input_devices": row_dict["grab_input"].get_active(),
+                    "MOUSE_EVENT_PATH": self._get_combo_row_device_id(row_dict["mouse"], self.input_devices["mouse"]),
+                    "KEYBOARD_EVENT_PATH": self._get_combo_row_device_id(row_dict["keyboard"], self.input_devices["keyboard"]),
+                    "AUDIO_DEVICE_ID": self._get_combo_row_device_id(row_dict["audio"], self.audio_devices),
+                    "monitor_id": self._get_combo_row_device_id(row_dict["display"], self.display_outputs),
+                    "env": self._collect_env_from_rows(row_dict.get("env_rows", [])),
+                })
                 new_configs.append(new_config)
             else:
                 new_configs.append(PlayerInstanceConfig()) # Add empty config for new players
@@ -260,22 +444,37 @@ class LayoutSettingsPage(Adw.PreferencesPage):
         if not self._is_loading:
             self.emit("settings-changed")
 
+    def _on_input_device_changed(self, combo_row, _pspec, instance_idx, device_type):
+        """Hot-swaps an input device of a running instance through the input router."""
+        if self._is_loading:
+            return
+        # Gamepads are only routed when the profile asks for it
+        if device_type == "joystick" and not self.profile.input_router:
+            return
+        row_data = self.player_rows[instance_idx] if instance_idx < len(self.player_rows) else None
+        if not row_data or not row_data["is_running"]:
+            return
+        device_id = self._get_combo_row_device_id(combo_row, self.input_devices[device_type])
+        kind = "gamepad" if device_type == "joystick" else device_type
+
+        # Waits for the registry (or the daemon); keep the UI responsive
+        def run():
+            try:
+                self.registry.reassign_input(instance_idx + 1, device_id, kind)
+            except LinuxCoopError as e:
+                self.logger.error(f"Could not reassign the {kind} of instance {instance_idx + 1}: {e}")
+                GLib.idle_add(self._on_input_reassign_failed, instance_idx, kind, str(e))
+
+        self._get_action_executor().submit(run)
+
+    def _on_input_reassign_failed(self, instance_idx, kind, error):
+        if instance_idx < len(self.player_rows):
+            self.player_rows[instance_idx]["expander"].set_subtitle(f"Could not switch {kind}: {error}")
+        return GLib.SOURCE_REMOVE
+
     def _on_num_players_changed(self, adjustment):
         if not self._is_loading:
             self.rebuild_player_rows()
-            # Ensure env sections exist after rebuilding player rows
-            for idx, row_dict in enumerate(self.player_rows):
-                if "env_rows" not in row_dict:
-                    row_dict["env_rows"] = []
-                if not row_dict.get("env_initialized"):
-                    env_title_row = Adw.ActionRow(title="Environment Variables")
-                    add_btn = Gtk.Button.new_from_icon_name("list-add-symbolic")
-                    add_btn.get_style_context().add_class("add-button")
-                    add_btn.set_valign(Gtk.Align.CENTER)
-                    add_btn.connect("clicked", lambda b, i=idx: self._add_player_env_row_by_index(i))
-                    env_title_row.add_suffix(add_btn)
-                    row_dict["expander"].add_row(env_title_row)
-                    row_dict["env_initialized"] = True
             self.emit("settings-changed")
 
     def _on_player_selected_changed(self, checkbox, *args):
@@ -398,85 +597,147 @@ class LayoutSettingsPage(Adw.PreferencesPage):
         return env
 
     def rebuild_player_rows(self):
-        for row_dict in self.player_rows:
-            self.players_group.remove(row_dict["expander"])
-        self.player_rows = []
+        """
+        Reconciles the player rows with the configured number of instances.
 
+        Rows are keyed by their index and reused: only the rows beyond the
+        new count are removed and only the missing ones are created, so the
+        cost scales with the change and existing rows keep their state.
+        """
         num_players = int(self.num_players_row.get_value())
         # Ensure player_configs list is long enough
         while len(self.profile.player_configs) < num_players:
             self.profile.player_configs.append(PlayerInstanceConfig())
 
-        for i in range(num_players):
-            expander = Adw.ExpanderRow(title=f"Instance {i + 1}")
-            expander.get_style_context().add_class("player-expander")
-            self.players_group.add(expander)
-
-            checkbox = Gtk.CheckButton()
-            checkbox.set_active(True)
-            checkbox.get_style_context().add_class("player-checkbox")
-            checkbox.connect("toggled", self._on_player_selected_changed)
-            expander.add_prefix(checkbox)
-
-            def create_device_row(title, device_type):
-                devices = self.input_devices.get(device_type, [])
-                model = Gtk.StringList.new(["None"] + [d["name"] for d in devices])
-                row = Adw.ComboRow(title=title, model=model)
-                row.get_style_context().add_class(f"{device_type}-row")
-                row.connect("notify::selected-item", self._on_setting_changed)
-                expander.add_row(row)
-                return row
-
-            joystick_row = create_device_row("Gamepad", "joystick")
-            # mouse_row = create_device_row("Mouse", "mouse")
-            # keyboard_row = create_device_row("Keyboard", "keyboard")
-
-            grab_input_switch = Adw.SwitchRow(title="Grab Mouse and Keyboard")
-            grab_input_switch.get_style_context().add_class("custom-switch")
-            grab_input_switch.connect("notify::active", self._on_grab_input_toggled, i)
-            expander.add_row(grab_input_switch)
-
-
-            audio_model = Gtk.StringList.new(["None"] + [d["name"] for d in self.audio_devices])
-            audio_row = Adw.ComboRow(title="Audio Device", model=audio_model)
-            audio_row.get_style_context().add_class("audio-row")
-            audio_row.connect("notify::selected-item", self._on_setting_changed)
-            expander.add_row(audio_row)
-
-            launch_button = Gtk.Button(label="Start")
-            launch_button.get_style_context().add_class("configure-button")
-            launch_button.set_valign(Gtk.Align.CENTER)
-            launch_button.connect(
-                "clicked", self._on_instance_launch_clicked, i
-            )
-            expander.add_suffix(launch_button)
-
-            self.player_rows.append({
-                "checkbox": checkbox,
-                "expander": expander,
-                "joystick": joystick_row,
-                "grab_input": grab_input_switch,
-                "audio": audio_row,
-                "status_icon": None,
-                "launch_button": launch_button,
-                "is_running": False,
-            })
+        while len(self.player_rows) > num_players:
+            self._remove_player_row(self.player_rows.pop())
+
+        for i in range(len(self.player_rows), num_players):
+            self.player_rows.append(self._create_player_row(i))
+
+    def _create_player_row(self, i: int) -> dict:
+        """Builds the widgets for the player row at index ``i``."""
+        expander = Adw.ExpanderRow(title=f"Instance {i + 1}")
+        expander.get_style_context().add_class("player-expander")
+        self.players_group.add(expander)
+
+        checkbox = Gtk.CheckButton()
+        checkbox.set_active(True)
+        checkbox.get_style_context().add_class("player-checkbox")
+        checkbox.connect("toggled", self._on_player_selected_changed)
+        expander.add_prefix(checkbox)
+
+        joystick_row = Adw.ComboRow(title="Gamepad", model=self.joystick_model)
+        joystick_row.get_style_context().add_class("joystick-row")
+        joystick_row.connect("notify::selected-item", self._on_setting_changed)
+        joystick_row.connect("notify::selected-item", self._on_input_device_changed, i, "joystick")
+        expander.add_row(joystick_row)
+
+        mouse_row = Adw.ComboRow(title="Mouse", model=self.mouse_model)
+        mouse_row.get_style_context().add_class("mouse-row")
+        mouse_row.connect("notify::selected-item", self._on_setting_changed)
+        mouse_row.connect("notify::selected-item", self._on_input_device_changed, i, "mouse")
+        expander.add_row(mouse_row)
+
+        keyboard_row = Adw.ComboRow(title="Keyboard", model=self.keyboard_model)
+        keyboard_row.get_style_context().add_class("keyboard-row")
+        keyboard_row.connect("notify::selected-item", self._on_setting_changed)
+        keyboard_row.connect("notify::selected-item", self._on_input_device_changed, i, "keyboard")
+        expander.add_row(keyboard_row)
+
+        grab_input_switch = Adw.SwitchRow(title="Grab Mouse and Keyboard")
+        grab_input_switch.get_style_context().add_class("custom-switch")
+        # Only one instance may grab input; respect an existing grab
+        if any(r["grab_input"].get_active() for r in self.player_rows):
+            grab_input_switch.set_sensitive(False)
+        grab_input_switch.connect("notify::active", self._on_grab_input_toggled, i)
+        expander.add_row(grab_input_switch)
+
+        audio_row = Adw.ComboRow(title="Audio Device", model=self.audio_model)
+        audio_row.get_style_context().add_class("audio-row")
+        audio_row.connect("notify::selected-item", self._on_setting_changed)
+        expander.add_row(audio_row)
+
+        display_row = Adw.ComboRow(
+            title="Display",
+            subtitle="Pin the instance to an output at its native resolution",
+            model=self.display_model,
+        )
+        display_row.get_style_context().add_class("display-row")
+        display_row.connect("notify::selected-item", self._on_setting_changed)
+        expander.add_row(display_row)
+
+        env_title_row = Adw.ActionRow(title="Environment Variables")
+        add_btn = Gtk.Button.new_from_icon_name("list-add-symbolic")
+        add_btn.get_style_context().add_class("add-button")
+        add_btn.set_valign(Gtk.Align.CENTER)
+        add_btn.connect("clicked", lambda b, i=i: self._add_player_env_row_by_index(i))
+        env_title_row.add_suffix(add_btn)
+        expander.add_row(env_title_row)
+
+        # Shown while the instance runs; pauses it without closing it
+        pause_button = Gtk.Button.new_from_icon_name("media-playback-pause-symbolic")
+        pause_button.get_style_context().add_class("configure-button")
+        pause_button.set_valign(Gtk.Align.CENTER)
+        pause_button.set_tooltip_text("Suspend")
+        pause_button.set_visible(False)
+        pause_button.connect("clicked", self._on_instance_pause_clicked, i)
+        expander.add_suffix(pause_button)
+
+        spinner = Gtk.Spinner()
+        spinner.set_valign(Gtk.Align.CENTER)
+        spinner.set_visible(False)
+        expander.add_suffix(spinner)
+
+        launch_button = Gtk.Button(label="Start")
+        launch_button.get_style_context().add_class("configure-button")
+        launch_button.set_valign(Gtk.Align.CENTER)
+        launch_button.connect(
+            "clicked", self._on_instance_launch_clicked, i
+        )
+        expander.add_suffix(launch_button)
+
+        return {
+            "checkbox": checkbox,
+            "expander": expander,
+            "joystick": joystick_row,
+            "mouse": mouse_row,
+            "keyboard": keyboard_row,
+            "grab_input": grab_input_switch,
+            "audio": audio_row,
+            "display": display_row,
+            "env_rows": [],
+            "status_icon": None,
+            "launch_button": launch_button,
+            "pause_button": pause_button,
+            "spinner": spinner,
+            "phase": None,
+            "is_running": False,
+            "is_suspended": False,
+        }
+
+    def _remove_player_row(self, row_dict: dict):
+        """Detaches a player row from the page."""
+        if row_dict["grab_input"].get_active():
+            # Releasing the grab re-enables the switches on remaining rows
+            for other in self.player_rows:
+                other["grab_input"].set_sensitive(True)
+        self.players_group.remove(row_dict["expander"])
 
     def _run_verification(self):
         for i, row_dict in enumerate(self.player_rows):
             instance_num = i + 1
-            status = self.verification_service.verify_instance(instance_num)
-
-            # Remove existing icon first
-            if row_dict["status_icon"]:
-                row_dict["expander"].remove(row_dict["status_icon"])
-                row_dict["status_icon"] = None
-
-            if status == "Passed":
-                icon = Gtk.Image.new_from_icon_name("check-outlined-symbolic")
-                icon.get_style_context().add_class("verification-passed-icon")
-                row_dict["expander"].add_suffix(icon)
-                row_dict["status_icon"] = icon
+            self._set_row_verified(row_dict, self.verification_service.verify_instance(instance_num))
+
+    def _set_row_verified(self, row_dict, status):
+        # The icon is created once per row and then only toggled
+        if status == "Passed" and not row_dict["status_icon"]:
+            icon = Gtk.Image.new_from_icon_name("check-outlined-symbolic")
+            icon.get_style_context().add_class("verification-passed-icon")
+            row_dict["expander"].add_suffix(icon)
+            row_dict["status_icon"] = icon
+        if row_dict["status_icon"]:
+            row_dict["status_icon"].set_visible(status == "Passed")
 
     def get_selected_players(self) -> list[int]:
         return [i + 1 for i, r in enumerate(self.player_rows) if r["checkbox"].get_active()]
@@ -488,35 +749,161 @@ class LayoutSettingsPage(Adw.PreferencesPage):
         return None
 
     def _on_instance_launch_clicked(self, button, instance_idx):
+        """
+        Starts, stops or cancels an instance on the action executor.
+
+        Only the row is updated here; the worker's registry events and its
+        final result are applied later by idle callbacks, so the click never
+        waits on the launch (device search, home preparation) or the stop.
+        """
+        from ..services.instance_registry import STARTING, STOPPING
         row_data = self.player_rows[instance_idx]
         instance_num = instance_idx + 1
+        phase = row_data["phase"]
+
+        if phase is None:
+            cancel = threading.Event()
+            self._launch_cancels[instance_num] = cancel
+            self._set_row_phase(row_data, PREPARING)
+            self._submit_instance_action(instance_num, self._launch_action, instance_num, cancel)
+        elif phase in (PREPARING, STARTING) and instance_num in self._launch_cancels:
+            # The launch worker stops the instance itself once the launch returns
+            self._launch_cancels[instance_num].set()
+            future = self._pending_actions.get(instance_num)
+            if future is not None and future.cancel():
+                self._pending_actions.pop(instance_num, None)
+                self._launch_cancels.pop(instance_num, None)
+                self._set_row_phase(row_data, None)
+            else:
+                self._set_row_phase(row_data, STOPPING)
+        elif phase != STOPPING:
+            # Also cancels launches started elsewhere: the registry stops a
+            # starting instance as soon as its launch returns.
+            self._set_row_phase(row_data, STOPPING)
+            self._submit_instance_action(instance_num, self.registry.stop_instance, instance_num)
+        self.emit("instance-state-changed")
 
-        if row_data["is_running"]:
-            self.instance_service.terminate_instance(instance_num)
-            button.set_label("Start")
-            button.get_style_context().remove_class("destructive-action")
-            row_data["is_running"] = False
-        else:
-            self.instance_service.launch_instance(
-                self.profile, instance_num, use_gamescope_override=False
+    def _get_action_executor(self):
+        if self._action_executor is None:
+            self._action_executor = ThreadPoolExecutor(
+                max_workers=INSTANCE_ACTION_WORKERS, thread_name_prefix="instance-action"
             )
-            button.set_label("Stop")
-            button.get_style_context().add_class("destructive-action")
-            row_data["is_running"] = True
+        return self._action_executor
 
-        self._run_verification()
-        self.emit("instance-state-changed")
+    def _submit_instance_action(self, instance_num, action, *args):
+        def run():
+            error = None
+            try:
+                action(*args)
+            except LinuxCoopError as e:
+                self.logger.warning(f"Instance {instance_num}: {e}")
+                error = str(e)
+            except Exception as e:
+                # The row must still leave its busy state
+                self.logger.error(f"Instance {instance_num}: Unexpected error: {e}")
+                error = str(e)
+            status = self.verification_service.verify_instance(instance_num)
+            GLib.idle_add(self._on_instance_action_done, instance_num, status, error)
+
+        self._pending_actions[instance_num] = self._get_action_executor().submit(run)
+
+    def _launch_action(self, instance_num, cancel):
+        if not cancel.is_set():
+            self.registry.launch_instance(instance_num, self.profile, use_gamescope_override=False)
+        if cancel.is_set():
+            self.registry.stop_instance(instance_num)
+
+    def _on_instance_action_done(self, instance_num, status, error):
+        self._pending_actions.pop(instance_num, None)
+        self._launch_cancels.pop(instance_num, None)
+        idx = instance_num - 1
+        if 0 <= idx < len(self.player_rows):
+            row_data = self.player_rows[idx]
+            self._set_row_verified(row_data, status)
+            # A launch cancelled before it started leaves no registry event
+            from ..services.instance_registry import ACTIVE_STATES, STOPPING
+            if row_data["phase"] in (PREPARING, STOPPING) and self.registry.get_state(instance_num) not in ACTIVE_STATES:
+                self._set_row_phase(row_data, None)
+            if error:
+                row_data["expander"].set_subtitle(f"Failed: {error}")
+            self.emit("instance-state-changed")
+        return GLib.SOURCE_REMOVE
+
+    def cancel_pending_actions(self):
+        """Drops queued Start/Stop actions; ones already running finish."""
+        for instance_num, future in list(self._pending_actions.items()):
+            if future.cancel():
+                self._pending_actions.pop(instance_num, None)
+        for cancel in self._launch_cancels.values():
+            cancel.set()
+        if self._action_executor is not None:
+            self._action_executor.shutdown(wait=False)
+            self._action_executor = None
+
+    def _on_instance_pause_clicked(self, button, instance_idx):
+        row_data = self.player_rows[instance_idx]
+        instance_num = instance_idx + 1
+        if row_data["is_suspended"]:
+            action = self.registry.resume_instance
+        else:
+            action = self.registry.suspend_instance
+
+        # Suspending samples CPU usage for a moment; keep the UI responsive.
+        # The row is updated by the resulting registry event.
+        def run():
+            try:
+                action(instance_num)
+            except LinuxCoopError as e:
+                self.logger.warning(f"Instance {instance_num}: {e}")
+            except Exception as e:
+                # The executor would swallow it and leave the button disabled
+                self.logger.error(f"Instance {instance_num}: Unexpected error: {e}")
+            GLib.idle_add(button.set_sensitive, True)
+
+        button.set_sensitive(False)
+        self._get_action_executor().submit(run)
 
     def is_any_instance_running(self):
         return any(r["is_running"] for r in self.player_rows)
 
     def set_running_state(self, is_running):
         for row_data in self.player_rows:
-            row_data["is_running"] = is_running
-            button = row_data["launch_button"]
-            if is_running:
-                button.set_label("Stop")
-                button.get_style_context().add_class("destructive-action")
-            else:
-                button.set_label("Start")
-                button.get_style_context().remove_class("destructive-action")
+            self._set_row_running(row_data, is_running)
+
+    def _set_row_running(self, row_data, is_running):
+        from ..services.instance_registry import RUNNING
+        self._set_row_phase(row_data, RUNNING if is_running else None)
+
+    def _set_row_phase(self, row_data, phase):
+        """Shows an instance's phase: None (stopped), PREPARING or a registry state."""
+        from ..services.instance_registry import RUNNING, STARTING, STOPPING, SUSPENDED
+        row_data["phase"] = phase
+        row_data["is_running"] = phase is not None
+        busy = phase in (PREPARING, STARTING, STOPPING)
+        row_data["spinner"].set_visible(busy)
+        row_data["spinner"].set_spinning(busy)
+        row_data["expander"].set_subtitle(_PHASE_SUBTITLES.get(phase, ""))
+
+        button = row_data["launch_button"]
+        button.set_sensitive(phase != STOPPING)
+        if phase is None:
+            button.set_label("Start")
+            button.get_style_context().remove_class("destructive-action")
+        else:
+            button.set_label("Cancel" if phase in (PREPARING, STARTING) else "Stop")
+            button.get_style_context().add_class("destructive-action")
+        row_data["pause_button"].set_visible(phase in (RUNNING, SUSPENDED))
+        if phase is None:
+            self._set_row_suspended(row_data, False)
+
+    def _set_row_suspended(self, row_data, is_suspended, report=None):
+        row_data["is_suspended"] = is_suspended
+        button = row_data["pause_button"]
+        button.set_icon_name("media-playback-start-symbolic" if is_suspended else "media-playback-pause-symbolic")
+        tooltip = "Resume" if is_suspended else "Suspend"
+        if report and report.get("cpu_before") and report.get("cpu_after"):
+            tooltip += (
+                f" (host CPU {report['cpu_before']['host_pct']:.0f}% -> {report['cpu_after']['host_pct']:.0f}%,"
+                f" instance {report['cpu_before']['instance_pct']:.0f}% -> {report['cpu_after']['instance_pct']:.0f}%)"
+            )
+        button.set_tooltip_text(tooltip)
@@ -0,0 +1,91 @@
+import json
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+# Bumped whenever command construction changes, so stale cached plans are ignored.
+PLAN_FORMAT_VERSION = 1
+
+# bwrap options that mount a source path onto a target path.
+_BIND_FLAGS = ("--bind", "--ro-bind", "--dev-bind")
+
+
+def extract_mounts(argv: List[str]) -> List[Tuple[str, str, str]]:
+    """Returns the ``(flag, source, target)`` mounts of the bwrap part of a command."""
+    mounts = []
+    for i, arg in enumerate(argv):
+        if arg in _BIND_FLAGS and i + 2 < len(argv):
+            mounts.append((arg, argv[i + 1], argv[i + 2]))
+        elif arg == "--tmpfs" and i + 1 < len(argv):
+            mounts.append((arg, "tmpfs", argv[i + 1]))
+    return mounts
+
+
+class InstancePlan(BaseModel):
+    """
+    Everything needed to start one instance, fully resolved.
+
+    Attributes:
+        instance_num (int): The instance the plan starts.
+        argv (List[str]): The command, from gamescope (or bwrap) to steam.
+        env_set (Dict[str, str]): Variables set on top of the launcher's environment.
+        env_unset (List[str]): Variables removed from the launcher's environment.
+        mounts (List[Tuple[str, str, str]]): bwrap mounts, for inspection.
+        device_info (Dict[str, Any]): Resolved input and audio assignments.
+        home_path (str): The instance's isolated home.
+        log_path (str): Where the instance's terminal output goes.
+        replayable (bool): False when launching acquires runtime resources
+            (input proxies, cache write locks), which a cached plan cannot
+            reproduce; such plans are rebuilt on every launch.
+    """
+    instance_num: int
+    argv: List[str]
+    env_set: Dict[str, str] = Field(default_factory=dict)
+    env_unset: List[str] = Field(default_factory=list)
+    mounts: List[Tuple[str, str, str]] = Field(default_factory=list)
+    device_info: Dict[str, Any] = Field(default_factory=dict)
+    home_path: str
+    log_path: str
+    replayable: bool = True
+
+    @staticmethod
+    def diff_environment(base: Mapping[str, str], env: Mapping[str, str]) -> Tuple[Dict[str, str], List[str]]:
+        """Returns the variables `env` sets and removes relative to `base`."""
+        env_set = {k: v for k, v in env.items() if base.get(k) != v}
+        env_unset = sorted(k for k in base if k not in env)
+        return env_set, env_unset
+
+    def build_environment(self, base: Mapping[str, str]) -> Dict[str, str]:
+        """Applies the plan's environment changes to `base`."""
+        env = {k: v for k, v in base.items() if k not in self.env_unset}
+        env.update(self.env_set)
+        return env
+
+
+class LaunchPlan(BaseModel):
+    """
+    The resolved launch of a profile on the current host.
+
+    Attributes:
+        key (str): Hash of the profile and host state the plan was built for.
+        instances (Dict[int, InstancePlan]): Per-instance plans.
+    """
+    version: int = PLAN_FORMAT_VERSION
+    key: str
+    created: float = Field(default_factory=time.time)
+    dry_run: bool = False
+    instances: Dict[int, InstancePlan] = Field(default_factory=dict)
+
+    def to_json(self, volatile: bool = True) -> str:
+        """
+        Serializes the plan with sorted keys, so equal plans produce equal text.
+
+        With `volatile` False, the creation time is left out, which makes
+        the output suitable for golden-file comparisons.
+        """
+        data = self.model_dump(exclude=None if volatile else {"created"})
+        return json.dumps(data, indent=2, sort_keys=True)
+
+    def get_instance(self, instance_num: int) -> Optional[InstancePlan]:
+        return self.instances.get(instance_num)
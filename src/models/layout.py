@@ -0,0 +1,138 @@
+import math
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class Tile(NamedTuple):
+    """
+    The screen area assigned to one instance, in pixels.
+
+    Attributes:
+        x (int): Left edge relative to the output.
+        y (int): Top edge relative to the output.
+        width (int): Tile width.
+        height (int): Tile height.
+    """
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+def grid_shape(num_players: int, orientation: str = "horizontal") -> Tuple[int, int]:
+    """
+    Returns the ``(columns, rows)`` of the near-square grid for a player count.
+
+    Horizontal layouts favour columns (two players side by side), vertical
+    layouts favour rows (two players stacked).
+    """
+    if num_players < 1:
+        return 1, 1
+    major = math.ceil(math.sqrt(num_players))
+    minor = math.ceil(num_players / major)
+    if orientation == "vertical":
+        return minor, major
+    return major, minor
+
+
+def _split(length: int, parts: int, index: int) -> Tuple[int, int]:
+    """Returns the offset and size of part `index` of `length` split in `parts`."""
+    start = length * index // parts
+    end = length * (index + 1) // parts
+    return start, end - start
+
+
+def compute_grid_layout(width: int, height: int, num_players: int, orientation: str = "horizontal") -> List[Tile]:
+    """
+    Tiles an output of ``width`` x ``height`` for any number of players.
+
+    The grid is near-square. When the player count does not fill it, the
+    first row (horizontal) or first column (vertical) holds fewer, larger
+    tiles, so three players get one wide tile plus two halves, as before.
+    Tiles cover the output exactly, without gaps or overlaps.
+    """
+    if num_players < 1:
+        return []
+    if num_players == 1:
+        return [Tile(0, 0, width, height)]
+
+    columns, rows = grid_shape(num_players, orientation)
+    tiles = []
+    if orientation == "vertical":
+        short = rows - (columns * rows - num_players)
+        for col in range(columns):
+            x, w = _split(width, columns, col)
+            count = short if col == 0 else rows
+            for row in range(count):
+                y, h = _split(height, count, row)
+                tiles.append(Tile(x, y, w, h))
+    else:
+        short = columns - (columns * rows - num_players)
+        for row in range(rows):
+            y, h = _split(height, rows, row)
+            count = short if row == 0 else columns
+            for col in range(count):
+                x, w = _split(width, count, col)
+                tiles.append(Tile(x, y, w, h))
+    return tiles
+
+
+def compute_custom_layout(width: int, height: int, fractions: Sequence[Sequence[float]]) -> List[Tile]:
+    """
+    Converts a custom tiling, given as fractional ``(x, y, w, h)`` rectangles
+    of the output, into pixel tiles.
+    """
+    tiles = []
+    for fx, fy, fw, fh in fractions:
+        x = round(width * fx)
+        y = round(height * fy)
+        tiles.append(Tile(x, y, round(width * (fx + fw)) - x, round(height * (fy + fh)) - y))
+    return tiles
+
+
+def scale_dimensions(width: int, height: int, scale: Optional[float]) -> Tuple[int, int]:
+    """
+    Returns the internal render size for a tile and a render scale.
+
+    Sizes are rounded down to even numbers, which video encoders and some
+    upscalers expect, and never drop below 2 pixels.
+    """
+    if not scale or scale >= 1.0:
+        return width, height
+    scaled_w = max(2, int(width * scale) // 2 * 2)
+    scaled_h = max(2, int(height * scale) // 2 * 2)
+    return scaled_w, scaled_h
+
+
+def assign_outputs(
+    assignments: Sequence[Tuple[int, Optional[str]]],
+    outputs: Dict[str, dict],
+    orientation: str = "horizontal",
+) -> Dict[int, Tuple[str, Tile]]:
+    """
+    Places instances on their assigned display outputs.
+
+    Args:
+        assignments: ``(instance_num, output_id)`` pairs in launch order.
+        outputs: Output topology keyed by id, with 'width' and 'height'.
+        orientation: Tiling orientation for outputs shared by instances.
+
+    Returns:
+        Dict[int, Tuple[str, Tile]]: The output id and tile (relative to the
+        output) per placed instance. An instance alone on its output gets
+        the whole output at native resolution; instances sharing one are
+        tiled on it. Instances without a usable output are left out, so the
+        caller falls back to the base-resolution layout for them.
+    """
+    groups: Dict[str, List[int]] = {}
+    for instance_num, output_id in assignments:
+        output = outputs.get(output_id) if output_id else None
+        if output and output.get("width") and output.get("height"):
+            groups.setdefault(output_id, []).append(instance_num)
+
+    placement = {}
+    for output_id, instance_nums in groups.items():
+        output = outputs[output_id]
+        tiles = compute_grid_layout(output["width"], output["height"], len(instance_nums), orientation)
+        for instance_num, tile in zip(instance_nums, tiles):
+            placement[instance_num] = (output_id, tile)
+    return placement
@@ -3,11 +3,304 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 
 from pydantic import (BaseModel, ConfigDict, Field, ValidationError,
-                      validator)
+                      model_validator, validator)
 
 from ..core.config import Config
 from ..core.exceptions import ProfileNotFoundError
 from ..core.logger import Logger
+from .layout import Tile, compute_custom_layout, compute_grid_layout, scale_dimensions
+
+# Steam client presets, from the full client to the smallest footprint.
+CLIENT_MODES = ("full", "lite", "minimal")
+# Audio routing of an instance: its chosen sink as is, or a dedicated sink
+# that is discarded ("null") or played on the chosen output ("loopback").
+AUDIO_SINK_MODES = ("none", "null", "loopback")
+
+
+class FrameRatePolicy(BaseModel):
+    """
+    Frame rate caps applied through Gamescope.
+
+    `focused_fps` and `unfocused_fps` map to Gamescope's `-r` and `-o`. With
+    `dynamic` enabled, an instance whose input devices stay idle for
+    `idle_seconds` is capped at `idle_fps` until input resumes.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    focused_fps: Optional[int] = Field(default=None, alias="FOCUSED_FPS")
+    unfocused_fps: Optional[int] = Field(default=None, alias="UNFOCUSED_FPS")
+    dynamic: Optional[bool] = Field(default=None, alias="DYNAMIC")
+    idle_seconds: Optional[int] = Field(default=None, alias="IDLE_SECONDS")
+    idle_fps: Optional[int] = Field(default=None, alias="IDLE_FPS")
+
+    @validator('focused_fps', 'unfocused_fps', 'idle_fps', 'idle_seconds')
+    def validate_positive(cls, v):
+        if v is not None and v < 1:
+            raise ValueError("Frame rate values must be positive.")
+        return v
+
+    def merged(self, override: Optional["FrameRatePolicy"]) -> "FrameRatePolicy":
+        """Returns this policy with the fields set in `override` replacing its own."""
+        if not override:
+            return self
+        return self.model_copy(update=override.model_dump(exclude_none=True))
+
+
+class AudioPolicy(BaseModel):
+    """
+    Audio routing and buffering of an instance.
+
+    With `sink` set to "null" or "loopback", a sink of its own is created
+    for the instance when it launches and removed when it ends. "loopback"
+    plays that sink on the instance's AUDIO_DEVICE_ID (or the default sink);
+    "null" plays nothing, but its monitor can be recorded. `latency_msec`
+    sets PULSE_LATENCY_MSEC and the loopback's latency; `quantum` (frames
+    at `rate`) is requested from PipeWire through PIPEWIRE_LATENCY.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    sink: Optional[str] = Field(default=None, alias="SINK")
+    latency_msec: Optional[int] = Field(default=None, alias="LATENCY_MSEC")
+    quantum: Optional[int] = Field(default=None, alias="QUANTUM")
+    rate: Optional[int] = Field(default=None, alias="RATE")
+
+    @validator('sink')
+    def validate_sink(cls, v):
+        if v is not None and v not in AUDIO_SINK_MODES:
+            raise ValueError(f"Audio sink must be one of {', '.join(AUDIO_SINK_MODES)}.")
+        return v
+
+    @validator('latency_msec', 'quantum', 'rate')
+    def validate_positive(cls, v):
+        if v is not None and v < 1:
+            raise ValueError("Audio latency values must be positive.")
+        return v
+
+    @property
+    def dedicated_sink(self) -> bool:
+        return self.sink in ("null", "loopback")
+
+    def merged(self, override: Optional["AudioPolicy"]) -> "AudioPolicy":
+        """Returns this policy with the fields set in `override` replacing its own."""
+        if not override:
+            return self
+        return self.model_copy(update=override.model_dump(exclude_none=True))
+
+
+class CacheSharingConfig(BaseModel):
+    """
+    Which Steam caches are shared between instances, and how.
+
+    Each cache is "off" (private to the instance), "ro" (read-only) or "rw"
+    (read-write, granted to one instance at a time). `source` selects the
+    host Steam directory ("host") or a MultiScope-owned shared directory
+    ("multiscope").
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    source: str = Field(default="host", alias="SOURCE")
+    shadercache: str = Field(default="off", alias="SHADERCACHE")
+    depotcache: str = Field(default="off", alias="DEPOTCACHE")
+    appcache: str = Field(default="off", alias="APPCACHE")
+
+    @validator('source')
+    def validate_source(cls, v):
+        if v not in ["host", "multiscope"]:
+            raise ValueError("Cache source must be 'host' or 'multiscope'.")
+        return v
+
+    @validator('shadercache', 'depotcache', 'appcache')
+    def validate_mode(cls, v):
+        if v not in ["off", "ro", "rw"]:
+            raise ValueError("Cache sharing mode must be 'off', 'ro' or 'rw'.")
+        return v
+
+
+class PipelineCacheConfig(BaseModel):
+    """
+    Preset that shares DXVK, VKD3D-Proton, Mesa and NVIDIA pipeline caches
+    between the instances of one game.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    enabled: bool = Field(default=False, alias="ENABLED")
+    warm_from_host: bool = Field(default=False, alias="WARM_FROM_HOST")
+    max_size_mb: Optional[int] = Field(default=None, alias="MAX_SIZE_MB")
+
+
+class PrefixCloneConfig(BaseModel):
+    """
+    Provisions each instance's Proton prefixes by cloning an existing one
+    instead of letting Proton build them from scratch.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    enabled: bool = Field(default=False, alias="ENABLED")
+    source: str = Field(default="host", alias="SOURCE")
+    # Steam app ids to clone; defaults to the profile's numeric GAME_ID.
+    app_ids: Optional[List[str]] = Field(default=None, alias="APP_IDS")
+    # Hard-link Wine system libraries when the filesystem has no reflinks.
+    allow_hardlinks: bool = Field(default=False, alias="ALLOW_HARDLINKS")
+
+    @validator('source')
+    def validate_source(cls, v):
+        if v not in ["host", "instance1"]:
+            raise ValueError("Prefix clone source must be 'host' or 'instance1'.")
+        return v
+
+
+class PrefetchConfig(BaseModel):
+    """
+    Reads the game's install directory into the page cache ahead of and
+    alongside the launches, so instances do not contend for cold I/O.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    enabled: bool = Field(default=False, alias="ENABLED")
+    # Upper bound of data read; half of the available memory at most.
+    max_mb: int = Field(default=4096, alias="MAX_MB")
+    workers: int = Field(default=4, alias="WORKERS")
+    # Seconds the first launch waits for the prefetch to get ahead.
+    lead_seconds: float = Field(default=0.0, alias="LEAD_SECONDS")
+    # Directory to prefetch when the game is not a Steam app id.
+    install_dir: Optional[str] = Field(default=None, alias="INSTALL_DIR")
+
+    @validator('workers')
+    def validate_workers(cls, v):
+        if not 1 <= v <= 32:
+            raise ValueError("Prefetch workers must be between 1 and 32.")
+        return v
+
+    @validator('max_mb', 'lead_seconds')
+    def validate_non_negative(cls, v):
+        if v < 0:
+            raise ValueError("Prefetch size and lead time cannot be negative.")
+        return v
+
+
+class MemoryMergeConfig(BaseModel):
+    """
+    Lets the kernel merge identical memory pages (KSM) across the
+    instances of a game.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    enabled: bool = Field(default=False, alias="ENABLED")
+    # Starts ksmd for the session if it is stopped and may be started.
+    start_ksmd: bool = Field(default=True, alias="START_KSMD")
+
+
+class DiskBudgetConfig(BaseModel):
+    """
+    Limits the disk space used by instance homes and logs.
+
+    Budgets of 0 disable the corresponding limit.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    # Runs the collector in the background while MultiScope is open
+    enabled: bool = Field(default=False, alias="ENABLED")
+    max_home_mb: int = Field(default=4096, alias="MAX_HOME_MB")
+    max_total_mb: int = Field(default=0, alias="MAX_TOTAL_MB")
+    # Web caches and unfinished downloads older than this are removed
+    cache_max_age_days: int = Field(default=14, alias="CACHE_MAX_AGE_DAYS")
+    # Logs and crash dumps older than this are removed
+    log_max_age_days: int = Field(default=30, alias="LOG_MAX_AGE_DAYS")
+    # Homes of instances beyond NUM_PLAYERS unused for this long are removed
+    stale_home_days: int = Field(default=30, alias="STALE_HOME_DAYS")
+    interval_minutes: int = Field(default=60, alias="INTERVAL_MINUTES")
+
+    @validator('max_home_mb', 'max_total_mb', 'cache_max_age_days', 'log_max_age_days', 'stale_home_days')
+    def validate_non_negative(cls, v):
+        if v < 0:
+            raise ValueError("Disk budgets and ages cannot be negative.")
+        return v
+
+    @validator('interval_minutes')
+    def validate_interval(cls, v):
+        if v < 1:
+            raise ValueError("The disk collection interval must be at least one minute.")
+        return v
+
+
+class WarmStandbyConfig(BaseModel):
+    """
+    Pre-spawns the profile's instances in the background after it is
+    loaded, so pressing Play only has to release them.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    enabled: bool = Field(default=False, alias="ENABLED")
+    # Memory (proportional set size) all standbys together may hold.
+    memory_budget_mb: int = Field(default=2048, alias="MEMORY_BUDGET_MB")
+    # Seconds a standby starts up before it is held.
+    warmup_seconds: float = Field(default=20.0, alias="WARMUP_SECONDS")
+    # "stop" freezes held standbys (no CPU); "idle" leaves them running.
+    hold: str = Field(default="stop", alias="HOLD")
+
+    @validator('hold')
+    def validate_hold(cls, v):
+        if v not in ["stop", "idle"]:
+            raise ValueError("Warm standby hold must be 'stop' or 'idle'.")
+        return v
+
+    @validator('memory_budget_mb')
+    def validate_memory_budget(cls, v):
+        if v < 0:
+            raise ValueError("Warm standby memory budget cannot be negative.")
+        return v
+
+
+class PressureGovernorConfig(BaseModel):
+    """
+    Sheds load from the least important instances when the host is under
+    CPU, memory or I/O pressure, as reported by PSI.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    enabled: bool = Field(default=False, alias="ENABLED")
+    # "some avg10" stall percentages at which each response starts.
+    fps_cap_at: float = Field(default=10.0, alias="FPS_CAP_AT")
+    cpu_weight_at: float = Field(default=25.0, alias="CPU_WEIGHT_AT")
+    pause_at: float = Field(default=50.0, alias="PAUSE_AT")
+    resources: List[str] = Field(default_factory=lambda: ["cpu", "memory", "io"], alias="RESOURCES")
+    capped_fps: int = Field(default=30, alias="CAPPED_FPS")
+    # cgroup cpu.weight (default 100) of throttled instances.
+    cpu_weight: int = Field(default=25, alias="CPU_WEIGHT")
+    # Seconds pressure must stay low before a response is undone.
+    recover_seconds: float = Field(default=30.0, alias="RECOVER_SECONDS")
+
+    @validator('resources')
+    def validate_resources(cls, v):
+        if not v or any(r not in ["cpu", "memory", "io"] for r in v):
+            raise ValueError("Pressure resources must be a non-empty subset of cpu, memory and io.")
+        return v
+
+    @model_validator(mode="after")
+    def validate_thresholds(self):
+        # Checked on the whole model: a field validator only runs for the
+        # thresholds that are given, leaving the defaults unchecked.
+        if not self.fps_cap_at <= self.cpu_weight_at <= self.pause_at:
+            raise ValueError("Pressure thresholds must satisfy FPS_CAP_AT <= CPU_WEIGHT_AT <= PAUSE_AT.")
+        return self
+
+    @validator('cpu_weight')
+    def validate_cpu_weight(cls, v):
+        if not 1 <= v <= 10000:
+            raise ValueError("CPU weight must be between 1 and 10000.")
+        return v
+
+    @validator('capped_fps')
+    def validate_capped_fps(cls, v):
+        if v < 1:
+            raise ValueError("Capped FPS must be at least 1.")
+        return v
+
+    @validator('recover_seconds')
+    def validate_recover_seconds(cls, v):
+        if v < 0:
+            raise ValueError("Pressure recovery time cannot be negative.")
+        return v
 
 
 class PlayerInstanceConfig(BaseModel):
@@ -20,14 +313,34 @@ class PlayerInstanceConfig(BaseModel):
     LANGUAGE: Optional[str] = Field(default=None, alias="LANGUAGE")
     LISTEN_PORT: Optional[str] = Field(default=None, alias="LISTEN_PORT")
     USER_STEAM_ID: Optional[str] = Field(default=None, alias="USER_STEAM_ID")
+    # Input devices are stored as stable identities ("input:bus|vendor|...");
+    # plain /dev/input paths from older profiles are still accepted.
     PHYSICAL_DEVICE_ID: Optional[str] = Field(default=None, alias="PHYSICAL_DEVICE_ID")
     grab_input_devices: bool = Field(default=False, alias="GRAB_INPUT_DEVICES")
-    # MOUSE_EVENT_PATH: Optional[str] = Field(default=None, alias="MOUSE_EVENT_PATH")
-    # KEYBOARD_EVENT_PATH: Optional[str] = Field(default=None, alias="KEYBOARD_EVENT_PATH")
+    MOUSE_EVENT_PATH: Optional[str] = Field(default=None, alias="MOUSE_EVENT_PATH")
+    KEYBOARD_EVENT_PATH: Optional[str] = Field(default=None, alias="KEYBOARD_EVENT_PATH")
     AUDIO_DEVICE_ID: Optional[str] = Field(default=None, alias="AUDIO_DEVICE_ID")
+    # Higher is more important; the pressure governor sheds load from the lowest first.
+    priority: int = Field(default=0, alias="PRIORITY")
     monitor_id: Optional[str] = Field(default=None, alias="MONITOR_ID")
+    render_scale: Optional[float] = Field(default=None, alias="RENDER_SCALE")
+    frame_rate: Optional[FrameRatePolicy] = Field(default=None, alias="FRAME_RATE")
+    client_mode: Optional[str] = Field(default=None, alias="CLIENT_MODE")
+    audio: Optional[AudioPolicy] = Field(default=None, alias="AUDIO")
     env: Optional[Dict[str, str]] = Field(default=None, alias="ENV")
 
+    @validator('render_scale')
+    def validate_render_scale(cls, v):
+        if v is not None and not 0.25 <= v <= 1.0:
+            raise ValueError("Render scale must be between 0.25 and 1.0.")
+        return v
+
+    @validator('client_mode')
+    def validate_client_mode(cls, v):
+        if v is not None and v not in CLIENT_MODES:
+            raise ValueError(f"Client mode must be one of {', '.join(CLIENT_MODES)}.")
+        return v
+
 
 class SplitscreenConfig(BaseModel):
     """
@@ -35,6 +348,9 @@ class SplitscreenConfig(BaseModel):
     """
     model_config = ConfigDict(populate_by_name=True)
     orientation: str = Field(alias="ORIENTATION")
+    # Optional custom tiling: one fractional (x, y, width, height) rectangle
+    # of the output per instance, in launch order.
+    custom_layout: Optional[List[Tuple[float, float, float, float]]] = Field(default=None, alias="CUSTOM_LAYOUT")
 
     @validator('orientation')
     def validate_orientation(cls, v):
@@ -42,6 +358,14 @@ class SplitscreenConfig(BaseModel):
             raise ValueError("Orientation must be 'horizontal' or 'vertical'.")
         return v
 
+    @validator('custom_layout')
+    def validate_custom_layout(cls, v):
+        for rect in v or []:
+            x, y, w, h = rect
+            if w <= 0 or h <= 0 or x < 0 or y < 0 or x + w > 1.0 or y + h > 1.0:
+                raise ValueError(f"Custom layout rectangle {rect} must lie within the output (0..1).")
+        return v
+
 
 class Profile(BaseModel):
     """
@@ -50,16 +374,54 @@ class Profile(BaseModel):
     model_config = ConfigDict(populate_by_name=True, extra='ignore')
 
     profile_name: str = Field(default="Default", alias="PROFILE_NAME")
+    game_id: Optional[str] = Field(default=None, alias="GAME_ID")
     num_players: int = Field(default=2, alias="NUM_PLAYERS")
     instance_width: Optional[int] = Field(default=1280, alias="INSTANCE_WIDTH")
     instance_height: Optional[int] = Field(default=720, alias="INSTANCE_HEIGHT")
     mode: Optional[str] = Field(default="fullscreen", alias="MODE")
     use_gamescope: bool = Field(default=True, alias="USE_GAMESCOPE")
+    # Route gamepads through per-instance proxy devices (hot-swappable)
+    input_router: bool = Field(default=False, alias="INPUT_ROUTER")
+    # Window over which routed mouse motion is summed; defaults to a frame
+    mouse_coalesce_ms: Optional[float] = Field(default=None, alias="MOUSE_COALESCE_MS")
+    render_scale: float = Field(default=1.0, alias="RENDER_SCALE")
+    upscale_filter: Optional[str] = Field(default=None, alias="UPSCALE_FILTER")
+    frame_rate: FrameRatePolicy = Field(default_factory=FrameRatePolicy, alias="FRAME_RATE")
+    client_mode: str = Field(default="full", alias="CLIENT_MODE")
+    # Client mode of every instance but the first launched one
+    secondary_client_mode: Optional[str] = Field(default=None, alias="SECONDARY_CLIENT_MODE")
+    audio: AudioPolicy = Field(default_factory=AudioPolicy, alias="AUDIO")
+    cache_sharing: CacheSharingConfig = Field(default_factory=CacheSharingConfig, alias="CACHE_SHARING")
+    pipeline_cache: PipelineCacheConfig = Field(default_factory=PipelineCacheConfig, alias="PIPELINE_CACHE")
+    prefix_clone: PrefixCloneConfig = Field(default_factory=PrefixCloneConfig, alias="PREFIX_CLONE")
+    warm_standby: WarmStandbyConfig = Field(default_factory=WarmStandbyConfig, alias="WARM_STANDBY")
+    prefetch: PrefetchConfig = Field(default_factory=PrefetchConfig, alias="PREFETCH")
+    memory_merge: MemoryMergeConfig = Field(default_factory=MemoryMergeConfig, alias="MEMORY_MERGE")
+    disk_budget: DiskBudgetConfig = Field(default_factory=DiskBudgetConfig, alias="DISK_BUDGET")
+    pressure_governor: PressureGovernorConfig = Field(default_factory=PressureGovernorConfig, alias="PRESSURE_GOVERNOR")
     splitscreen: Optional[SplitscreenConfig] = Field(default=None, alias="SPLITSCREEN")
     env: Optional[Dict[str, str]] = Field(default=None, alias="ENV")
     player_configs: List[PlayerInstanceConfig] = Field(default_factory=lambda: [PlayerInstanceConfig(), PlayerInstanceConfig()], alias="PLAYERS")
     selected_players: Optional[List[int]] = Field(default=None, alias="selected_players")
 
+    @validator('render_scale')
+    def validate_render_scale(cls, v):
+        if not 0.25 <= v <= 1.0:
+            raise ValueError("Render scale must be between 0.25 and 1.0.")
+        return v
+
+    @validator('upscale_filter')
+    def validate_upscale_filter(cls, v):
+        if v is not None and v not in ["linear", "nearest", "fsr", "nis", "pixel"]:
+            raise ValueError("Upscale filter must be one of linear, nearest, fsr, nis or pixel.")
+        return v
+
+    @validator('client_mode', 'secondary_client_mode')
+    def validate_client_mode(cls, v):
+        if v is not None and v not in CLIENT_MODES:
+            raise ValueError(f"Client mode must be one of {', '.join(CLIENT_MODES)}.")
+        return v
+
     @classmethod
     def load(cls) -> "Profile":
         """Loads the profile from the default JSON file."""
@@ -115,43 +477,95 @@ class Profile(BaseModel):
         base_env = {str(k): str(v) for k, v in base_env.items()}
         return base_env
 
+    def get_layout_position(self, instance_num: int) -> int:
+        """Returns the 0-based tile index of an instance among the launched ones."""
+        if self.selected_players and instance_num in self.selected_players:
+            return self.selected_players.index(instance_num)
+        return instance_num - 1
+
+    def get_launched_instances(self) -> List[int]:
+        """Returns the instance numbers launched by this profile, in order."""
+        if self.selected_players:
+            return list(self.selected_players)
+        return list(range(1, len(self.player_configs) + 1))
+
+    def get_output_assignments(self) -> List[Tuple[int, Optional[str]]]:
+        """Returns ``(instance_num, monitor_id)`` for every launched instance."""
+        assignments = []
+        for instance_num in self.get_launched_instances():
+            idx = instance_num - 1
+            monitor_id = self.player_configs[idx].monitor_id if 0 <= idx < len(self.player_configs) else None
+            assignments.append((instance_num, monitor_id))
+        return assignments
+
+    def get_layout(self) -> List[Tile]:
+        """Computes the tiles of every launched instance on the base resolution."""
+        if not self.instance_width or not self.instance_height:
+            return []
+        num_players = self.effective_num_players()
+        if not self.is_splitscreen_mode or not self.splitscreen:
+            return [Tile(0, 0, self.instance_width, self.instance_height)] * max(num_players, 1)
+        if self.splitscreen.custom_layout and len(self.splitscreen.custom_layout) >= num_players:
+            return compute_custom_layout(self.instance_width, self.instance_height, self.splitscreen.custom_layout)
+        return compute_grid_layout(self.instance_width, self.instance_height, max(num_players, 1), self.splitscreen.orientation)
+
+    def get_instance_tile(self, instance_num: int) -> Optional[Tile]:
+        """Returns the tile of an instance, or None without a valid resolution."""
+        tiles = self.get_layout()
+        if not tiles:
+            return None
+        position = self.get_layout_position(instance_num)
+        return tiles[position] if 0 <= position < len(tiles) else tiles[-1]
+
     def get_instance_dimensions(self, instance_num: int) -> Tuple[Optional[int], Optional[int]]:
         """Calculates instance dimensions, accounting for splitscreen."""
-        if not self.instance_width or not self.instance_height:
+        tile = self.get_instance_tile(instance_num)
+        if not tile:
             return None, None
+        return tile.width, tile.height
 
-        if not self.is_splitscreen_mode or not self.splitscreen:
-            return self.instance_width, self.instance_height
+    def get_render_scale(self, instance_num: int) -> float:
+        """Returns the render scale of an instance; per-player values win."""
+        idx = instance_num - 1
+        if 0 <= idx < len(self.player_configs) and self.player_configs[idx].render_scale:
+            return self.player_configs[idx].render_scale
+        return self.render_scale
 
-        orientation = self.splitscreen.orientation
-        num_players = self.effective_num_players()
+    def get_frame_rate_policy(self, instance_num: int) -> FrameRatePolicy:
+        """Returns the frame rate policy of an instance with per-player overrides applied."""
+        idx = instance_num - 1
+        override = self.player_configs[idx].frame_rate if 0 <= idx < len(self.player_configs) else None
+        return self.frame_rate.merged(override)
+
+    def get_audio_policy(self, instance_num: int) -> AudioPolicy:
+        """Returns the audio policy of an instance with per-player overrides applied."""
+        idx = instance_num - 1
+        override = self.player_configs[idx].audio if 0 <= idx < len(self.player_configs) else None
+        return self.audio.merged(override)
+
+    def get_render_dimensions(self, instance_num: int) -> Tuple[Optional[int], Optional[int]]:
+        """Returns the internal resolution an instance renders at before upscaling."""
+        width, height = self.get_instance_dimensions(instance_num)
+        if not width or not height:
+            return None, None
+        return scale_dimensions(width, height, self.get_render_scale(instance_num))
+
+    def get_instance_priority(self, instance_num: int) -> int:
+        """Returns the pressure governor priority of an instance (higher is more important)."""
+        idx = instance_num - 1
+        return self.player_configs[idx].priority if 0 <= idx < len(self.player_configs) else 0
+
+    def get_client_mode(self, instance_num: int) -> str:
+        """Returns the Steam client preset of an instance; per-player values win."""
+        idx = instance_num - 1
+        if 0 <= idx < len(self.player_configs) and self.player_configs[idx].client_mode:
+            return self.player_configs[idx].client_mode
+        if self.secondary_client_mode and self.get_layout_position(instance_num) > 0:
+            return self.secondary_client_mode
+        return self.client_mode
 
-        if num_players < 1:
-            return self.instance_width, self.instance_height
-
-        if num_players == 1:
-            return self.instance_width, self.instance_height
-        elif num_players == 2:
-            if orientation == "horizontal":
-                return self.instance_width // 2, self.instance_height
-            else:
-                return self.instance_width, self.instance_height // 2
-        elif num_players == 3:
-            if orientation == "horizontal":
-                if instance_num == 1:
-                    return self.instance_width, self.instance_height // 2
-                else:
-                    return self.instance_width // 2, self.instance_height // 2
-            else:
-                if instance_num == 1:
-                    return self.instance_width // 2, self.instance_height
-                else:
-                    return self.instance_width // 2, self.instance_height // 2
-        elif num_players == 4:
-            return self.instance_width // 2, self.instance_height // 2
-        else:
-            # Fallback for > 4 players, might not be visually ideal
-            if orientation == "horizontal":
-                return self.instance_width, self.instance_height // num_players
-            else:
-                return self.instance_width // num_players, self.instance_height
+    def get_prefix_clone_app_ids(self) -> List[str]:
+        """Returns the Steam app ids whose Proton prefixes are cloned into instances."""
+        if self.prefix_clone.app_ids:
+            return list(self.prefix_clone.app_ids)
+        return [self.game_id] if self.game_id and self.game_id.isdigit() else []
@@ -0,0 +1,195 @@
+import os
+import shutil
+import subprocess
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..core.logger import Logger
+
+# Stream properties holding the client's PID. PipeWire's comes from the
+# socket credentials, so it is the host PID even inside a PID namespace;
+# the other is reported by the client itself.
+_PID_PROPERTIES = ("pipewire.sec.pid", "application.process.id")
+
+# Dedicated instance sinks are named after the instance, so they can be
+# found again without any state of ours (e.g. after a restart).
+SINK_PREFIX = "multiscope_instance_"
+
+
+def instance_sink_name(instance_num: int) -> str:
+    return f"{SINK_PREFIX}{instance_num}"
+
+
+class AudioService:
+    """
+    Controls PulseAudio (or pipewire-pulse) streams and instance sinks
+    through `pactl`.
+
+    `pactl` output is parsed with the C locale so headings and values are
+    not translated. The `pactl` executable can be replaced, e.g. by a stub.
+    """
+
+    def __init__(self, logger: Logger, pactl: str = "pactl"):
+        self.logger = logger
+        self.pactl = pactl
+        # Instances whose dedicated sink may exist
+        self._instance_sinks: Set[int] = set()
+
+    def is_available(self) -> bool:
+        return shutil.which(self.pactl) is not None
+
+    def _pactl(self, *args: str) -> Optional[str]:
+        try:
+            result = subprocess.run(
+                [self.pactl, *args],
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=5,
+                env={**os.environ, "LC_ALL": "C"},
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            self.logger.warning(f"pactl {' '.join(args)} failed: {e}")
+            return None
+        return result.stdout
+
+    def list_sink_inputs(self) -> List[Dict]:
+        """
+        Returns the playback streams.
+
+        Each entry has 'index', 'sink', 'muted' and 'pids' (the PIDs the
+        stream reports for its client).
+        """
+        output = self._pactl("list", "sink-inputs")
+        streams: List[Dict] = []
+        current: Optional[Dict] = None
+        for line in (output or "").splitlines():
+            stripped = line.strip()
+            if line.startswith("Sink Input #"):
+                current = {"index": line.split("#", 1)[1].strip(), "sink": None, "muted": False, "pids": set()}
+                streams.append(current)
+            elif current is None:
+                continue
+            elif stripped.startswith("Sink:"):
+                current["sink"] = stripped.split(":", 1)[1].strip()
+            elif stripped.startswith("Mute:"):
+                current["muted"] = stripped.split(":", 1)[1].strip() == "yes"
+            else:
+                key, sep, value = stripped.partition(" = ")
+                if sep and key in _PID_PROPERTIES:
+                    try:
+                        current["pids"].add(int(value.strip('"')))
+                    except ValueError:
+                        pass
+        return streams
+
+    def set_sink_input_mute(self, index: str, mute: bool) -> bool:
+        return self._pactl("set-sink-input-mute", index, "1" if mute else "0") is not None
+
+    def mute_streams_of(self, pids: Iterable[int]) -> List[str]:
+        """Mutes the unmuted streams of any of `pids`; returns the streams muted."""
+        pids = set(pids)
+        muted = []
+        for stream in self.list_sink_inputs():
+            if stream["muted"] or not stream["pids"] & pids:
+                continue
+            if self.set_sink_input_mute(stream["index"], True):
+                muted.append(stream["index"])
+        return muted
+
+    def unmute_streams(self, indexes: Iterable[str]) -> None:
+        """Unmutes streams that are still present."""
+        present = {stream["index"] for stream in self.list_sink_inputs()}
+        for index in indexes:
+            if index in present:
+                self.set_sink_input_mute(index, False)
+
+    # --- Instance sinks ------------------------------------------------
+
+    def list_modules(self) -> List[Tuple[str, str, str]]:
+        """Returns the loaded modules as (index, name, arguments)."""
+        modules = []
+        for line in (self._pactl("list", "short", "modules") or "").splitlines():
+            fields = line.split("\t")
+            if len(fields) >= 2:
+                modules.append((fields[0], fields[1], fields[2].strip() if len(fields) > 2 else ""))
+        return modules
+
+    @staticmethod
+    def _sink_modules(instance_num: int, output: Optional[str], latency_msec: Optional[int],
+                      loopback: bool) -> List[Tuple[str, str]]:
+        """Returns the (module, arguments) that make up an instance's sink."""
+        name = instance_sink_name(instance_num)
+        modules = [(
+            "module-null-sink",
+            f"sink_name={name} sink_properties=device.description=MultiScope-Instance-{instance_num}",
+        )]
+        if loopback:
+            args = [f"source={name}.monitor", "source_dont_move=true"]
+            if output:
+                args += [f"sink={output}", "sink_dont_move=true"]
+            if latency_msec:
+                args.append(f"latency_msec={latency_msec}")
+            modules.append(("module-loopback", " ".join(args)))
+        return modules
+
+    def _instance_modules(self, instance_num: int) -> List[Tuple[str, str, str]]:
+        """Returns the loaded modules belonging to an instance's sink."""
+        name = instance_sink_name(instance_num)
+        owned = []
+        for index, module, args in self.list_modules():
+            tokens = args.split()
+            if f"sink_name={name}" in tokens or f"source={name}.monitor" in tokens:
+                owned.append((index, module, args))
+        return owned
+
+    def ensure_instance_sink(self, instance_num: int, loopback: bool, output: Optional[str] = None,
+                             latency_msec: Optional[int] = None) -> bool:
+        """
+        Creates an instance's dedicated sink, played on `output` (or the
+        default sink) when `loopback` is set.
+
+        A sink that already matches is kept, one that does not is replaced,
+        so this can be called on every launch. Returns False if the sink
+        could not be created.
+        """
+        wanted = self._sink_modules(instance_num, output, latency_msec, loopback)
+        existing = self._instance_modules(instance_num)
+        self._instance_sinks.add(instance_num)
+        if sorted((module, args) for _, module, args in existing) == sorted(wanted):
+            return True
+        if existing:
+            self.remove_instance_sink(instance_num)
+            self._instance_sinks.add(instance_num)
+        for module, args in wanted:
+            if self._pactl("load-module", module, *args.split()) is None:
+                self.logger.warning(f"Instance {instance_num}: Could not load {module} for its audio sink.")
+                self.remove_instance_sink(instance_num)
+                return False
+        target = f" playing on '{output or 'the default sink'}'" if loopback else ""
+        self.logger.info(f"Instance {instance_num}: Created audio sink '{instance_sink_name(instance_num)}'{target}.")
+        return True
+
+    def remove_instance_sink(self, instance_num: int) -> int:
+        """Unloads an instance's dedicated sink, if it has one; returns the modules unloaded."""
+        if instance_num not in self._instance_sinks:
+            return 0
+        self._instance_sinks.discard(instance_num)
+        # The loopback goes first, so it is not moved to another sink
+        modules = sorted(self._instance_modules(instance_num), key=lambda m: m[1] != "module-loopback")
+        unloaded = sum(1 for index, _, _ in modules if self._pactl("unload-module", index) is not None)
+        if unloaded:
+            self.logger.info(f"Instance {instance_num}: Removed audio sink '{instance_sink_name(instance_num)}'.")
+        return unloaded
+
+    def adopt_instance_sinks(self, running: Iterable[int]) -> None:
+        """Tracks the sinks of re-adopted instances and removes those of instances that are gone."""
+        running = set(running)
+        found = set()
+        for _, _, args in self.list_modules():
+            for token in args.split():
+                key, _, value = token.partition("=")
+                if key == "sink_name" and value.startswith(SINK_PREFIX) and value[len(SINK_PREFIX):].isdigit():
+                    found.add(int(value[len(SINK_PREFIX):]))
+        self._instance_sinks |= found
+        for instance_num in found - running:
+            self.remove_instance_sink(instance_num)
@@ -0,0 +1,538 @@
+"""
+Control-plane daemon and client.
+
+The daemon owns a single `InstanceRegistry` and serves it over a local Unix
+socket, so the GUI, the CLI and scripts all drive the same instances.
+
+The protocol is newline-delimited compact JSON. A request is
+``{"id": 1, "op": "status"}`` and is answered by
+``{"id": 1, "ok": true, "result": ...}`` or
+``{"id": 1, "ok": false, "error": "...", "type": "InstanceStateError"}``.
+After a ``subscribe`` request the connection additionally receives event
+lines such as ``{"ev": "state", "instance": 1, "state": "running", ...}``.
+
+Supported operations: ``status``, ``launch`` (``instances``, optional
+``gamescope``), ``stop`` (optional ``instances``), ``assign_input``
+(``instance``, ``device``, optional ``kind``), ``suspend`` and ``resume``
+(``instances``), ``prepare_standby``,
+``release_standbys`` (``instances``), ``discard_standby``,
+``standby_metrics``, ``pressure``, ``prefetch``, ``memory_merge``,
+``client_footprint``, ``subscribe`` and ``ping``. ``launch``,
+``prepare_standby`` and ``release_standbys`` take an optional ``profile``
+(as saved to profile.json) to use instead of the saved profile.
+"""
+import json
+import os
+import selectors
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from queue import Empty, SimpleQueue
+from typing import Callable, Dict, Iterator, List, Optional
+
+from ..core import exceptions
+from ..core.config import Config
+from ..core.exceptions import ControlPlaneError, LinuxCoopError
+from ..core.logger import Logger
+
+# A subscriber that falls this far behind is disconnected rather than
+# letting its buffer grow without bound.
+MAX_CLIENT_BUFFER = 1024 * 1024
+_READ_SIZE = 65536
+
+
+def encode_message(message: dict) -> bytes:
+    """Encodes a protocol message as one compact JSON line."""
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class _ClientConnection:
+    """Per-connection buffers of the daemon's event loop."""
+
+    __slots__ = ("sock", "rbuf", "wbuf", "subscribed")
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.rbuf = bytearray()
+        self.wbuf = bytearray()
+        self.subscribed = False
+
+
+class ControlDaemon:
+    """
+    Serves an `InstanceRegistry` over a Unix socket.
+
+    A single selector loop handles every connection. Status queries are
+    answered inline from the registry snapshot, slow operations (launch and
+    stop) run on a small thread pool, and registry events are encoded once
+    and appended to each subscriber's write buffer, so fan-out costs one
+    buffer append per subscriber.
+    """
+
+    def __init__(self, logger: Logger, registry=None, socket_path: Optional[Path] = None, max_workers: int = 4):
+        self.logger = logger
+        if registry is None:
+            from .instance_registry import InstanceRegistry
+            registry = InstanceRegistry(logger)
+        self.registry = registry
+        self.socket_path = Path(socket_path or Config.get_control_socket_path())
+        self._selector = selectors.DefaultSelector()
+        self._clients: Dict[int, _ClientConnection] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="control-op")
+        # Messages produced on other threads, delivered by the loop.
+        self._outbox: SimpleQueue = SimpleQueue()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._server: Optional[socket.socket] = None
+        self._running = False
+
+    # --- Lifecycle -----------------------------------------------------
+
+    def _bind(self) -> None:
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            if ControlClient.is_daemon_running(self.socket_path):
+                raise ControlPlaneError(f"A control daemon is already listening on {self.socket_path}")
+            self.socket_path.unlink()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        server.listen(64)
+        server.setblocking(False)
+        self._server = server
+
+    def serve_forever(self) -> None:
+        """Runs the event loop until `shutdown` is called."""
+        self._bind()
+        self._selector.register(self._server, selectors.EVENT_READ, "accept")
+        self._selector.register(self._wake_r, selectors.EVENT_READ, "wake")
+        unsubscribe = self.registry.subscribe(self._on_registry_event)
+        self._running = True
+        self.logger.info(f"Control daemon listening on {self.socket_path}")
+        try:
+            while self._running:
+                for key, mask in self._selector.select():
+                    if key.data == "accept":
+                        self._accept()
+                    elif key.data == "wake":
+                        self._drain_wakeups()
+                    else:
+                        self._service_client(key.data, mask)
+                self._flush_outbox()
+        finally:
+            unsubscribe()
+            self._close()
+
+    def shutdown(self) -> None:
+        """Requests the loop to stop; safe to call from any thread."""
+        self._running = False
+        self._wake()
+
+    def _close(self) -> None:
+        for conn in list(self._clients.values()):
+            self._drop(conn)
+        self._selector.close()
+        if self._server:
+            self._server.close()
+            self.socket_path.unlink(missing_ok=True)
+        self._executor.shutdown(wait=False)
+        self.registry.close()
+        self.logger.info("Control daemon stopped.")
+
+    # --- Event loop helpers --------------------------------------------
+
+    def _wake(self) -> None:
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            # The loop is already pending a wake-up.
+            pass
+
+    def _drain_wakeups(self) -> None:
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _accept(self) -> None:
+        try:
+            sock, _ = self._server.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        conn = _ClientConnection(sock)
+        self._clients[sock.fileno()] = conn
+        self._selector.register(sock, selectors.EVENT_READ, conn)
+
+    def _drop(self, conn: _ClientConnection) -> None:
+        fd = conn.sock.fileno()
+        if fd in self._clients:
+            del self._clients[fd]
+            self._selector.unregister(conn.sock)
+        conn.sock.close()
+
+    def _service_client(self, conn: _ClientConnection, mask: int) -> None:
+        if mask & selectors.EVENT_READ:
+            try:
+                data = conn.sock.recv(_READ_SIZE)
+            except (BlockingIOError, InterruptedError):
+                data = None
+            except OSError:
+                data = b""
+            if data == b"":
+                self._drop(conn)
+                return
+            if data:
+                conn.rbuf.extend(data)
+                while b"\n" in conn.rbuf:
+                    line, _, rest = bytes(conn.rbuf).partition(b"\n")
+                    conn.rbuf = bytearray(rest)
+                    if line.strip():
+                        self._handle_line(conn, line)
+        if mask & selectors.EVENT_WRITE and conn.sock.fileno() in self._clients:
+            self._write(conn)
+
+    def _queue(self, conn: _ClientConnection, payload: bytes) -> None:
+        if conn.sock.fileno() not in self._clients:
+            return
+        if len(conn.wbuf) + len(payload) > MAX_CLIENT_BUFFER:
+            self.logger.warning("Control client is not reading its events; disconnecting it.")
+            self._drop(conn)
+            return
+        was_empty = not conn.wbuf
+        conn.wbuf.extend(payload)
+        if was_empty:
+            self._write(conn)
+
+    def _write(self, conn: _ClientConnection) -> None:
+        try:
+            sent = conn.sock.send(conn.wbuf)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self._drop(conn)
+            return
+        del conn.wbuf[:sent]
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if conn.wbuf else 0)
+        self._selector.modify(conn.sock, events, conn)
+
+    def _flush_outbox(self) -> None:
+        while True:
+            try:
+                target, payload = self._outbox.get_nowait()
+            except Empty:
+                return
+            if target is None:
+                for conn in list(self._clients.values()):
+                    if conn.subscribed:
+                        self._queue(conn, payload)
+            else:
+                self._queue(target, payload)
+
+    # --- Protocol --------------------------------------------------------
+
+    def _on_registry_event(self, event: dict) -> None:
+        # Called on arbitrary threads; encode once and let the loop fan out.
+        self._outbox.put((None, encode_message(event)))
+        self._wake()
+
+    def _reply(self, conn: _ClientConnection, request_id, result=None, error: Optional[BaseException] = None) -> bytes:
+        if error is None:
+            message = {"id": request_id, "ok": True, "result": result}
+        else:
+            message = {"id": request_id, "ok": False, "error": str(error), "type": type(error).__name__}
+        return encode_message(message)
+
+    def _handle_line(self, conn: _ClientConnection, line: bytes) -> None:
+        try:
+            request = json.loads(line)
+            op = request["op"]
+        except (ValueError, KeyError, TypeError) as e:
+            self._queue(conn, self._reply(conn, None, error=ControlPlaneError(f"Malformed request: {e}")))
+            return
+        request_id = request.get("id")
+
+        if op == "ping":
+            self._queue(conn, self._reply(conn, request_id, "pong"))
+        elif op == "status":
+            self._queue(conn, self._reply(conn, request_id, self._status()))
+        elif op == "subscribe":
+            conn.subscribed = True
+            self._queue(conn, self._reply(conn, request_id, self._status()))
+        elif op in ("launch", "stop", "assign_input", "suspend", "resume", "prepare_standby", "release_standbys",
+                    "discard_standby", "standby_metrics", "pressure", "prefetch", "memory_merge",
+                    "client_footprint"):
+            self._executor.submit(self._run_operation, conn, request_id, op, request)
+        else:
+            self._queue(conn, self._reply(conn, request_id, error=ControlPlaneError(f"Unknown operation '{op}'")))
+
+    def _status(self) -> dict:
+        return {str(num): record for num, record in self.registry.status().items()}
+
+    @staticmethod
+    def _request_profile(request: dict):
+        """Returns the profile sent with a request, or None to use the saved one."""
+        data = request.get("profile")
+        if data is None:
+            return None
+        from ..models.profile import Profile
+
+        return Profile(**data)
+
+    def _run_operation(self, conn: _ClientConnection, request_id, op: str, request: dict) -> None:
+        try:
+            instances = [int(n) for n in (request.get("instances") or [])]
+            if op == "assign_input":
+                self.registry.reassign_input(
+                    int(request["instance"]), request.get("device"), request.get("kind") or "gamepad"
+                )
+                result = None
+            elif op == "suspend":
+                result = {str(n): self.registry.suspend_instance(n) for n in instances}
+            elif op == "resume":
+                result = {str(n): self.registry.resume_instance(n) for n in instances}
+            elif op == "prepare_standby":
+                result = self.registry.prepare_standby(self._request_profile(request))
+            elif op == "release_standbys":
+                result = self.registry.release_standbys(instances, self._request_profile(request))
+            elif op == "discard_standby":
+                self.registry.discard_standby()
+                result = None
+            elif op == "standby_metrics":
+                result = self.registry.standby_metrics()
+            elif op == "pressure":
+                result = self.registry.pressure_snapshot()
+            elif op == "prefetch":
+                result = self.registry.prefetch_status()
+            elif op == "memory_merge":
+                result = self.registry.memory_merge_report()
+            elif op == "client_footprint":
+                result = self.registry.client_footprint_report()
+            elif op == "launch":
+                result = {}
+                profile = self._request_profile(request)
+                for instance_num in instances:
+                    result[str(instance_num)] = self.registry.launch_instance(
+                        instance_num, profile, use_gamescope_override=request.get("gamescope")
+                    )
+            elif instances:
+                result = {str(n): self.registry.stop_instance(n) for n in instances}
+            else:
+                self.registry.stop_all()
+                result = self._status()
+            payload = self._reply(conn, request_id, result)
+        except Exception as e:
+            if not isinstance(e, LinuxCoopError):
+                self.logger.error(f"Control operation '{op}' failed: {e}")
+            payload = self._reply(conn, request_id, error=e)
+        self._outbox.put((conn, payload))
+        self._wake()
+
+
+class ControlClient:
+    """
+    Thin client for the control-plane daemon.
+
+    Mirrors the operations of `InstanceRegistry` so front-ends can use
+    either interchangeably. Errors reported by the daemon are re-raised as
+    the matching MultiScope exception type.
+    """
+
+    def __init__(self, socket_path: Optional[Path] = None, timeout: Optional[float] = 30.0):
+        self.socket_path = Path(socket_path or Config.get_control_socket_path())
+        self.timeout = timeout
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def is_daemon_running(cls, socket_path: Optional[Path] = None) -> bool:
+        """Returns True if a daemon answers on the control socket."""
+        client = cls(socket_path, timeout=1.0)
+        if not client.socket_path.exists():
+            return False
+        try:
+            return client.request("ping") == "pong"
+        except ControlPlaneError:
+            return False
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(str(self.socket_path))
+        except OSError as e:
+            sock.close()
+            raise ControlPlaneError(f"Cannot reach control daemon at {self.socket_path}: {e}") from e
+        return sock
+
+    @staticmethod
+    def _read_lines(sock: socket.socket) -> Iterator[dict]:
+        buf = b""
+        while True:
+            while b"\n" not in buf:
+                try:
+                    chunk = sock.recv(_READ_SIZE)
+                except OSError as e:
+                    raise ControlPlaneError(f"Control daemon connection failed: {e}") from e
+                if not chunk:
+                    return
+                buf += chunk
+            line, _, buf = buf.partition(b"\n")
+            yield json.loads(line)
+
+    @staticmethod
+    def _raise_remote(message: dict) -> None:
+        error_type = getattr(exceptions, message.get("type") or "", None)
+        if not (isinstance(error_type, type) and issubclass(error_type, LinuxCoopError)):
+            error_type = ControlPlaneError
+        raise error_type(message.get("error", "unknown error"))
+
+    def request(self, op: str, **params):
+        """Sends one request and returns its result."""
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+        sock = self._connect()
+        try:
+            sock.sendall(encode_message({"id": request_id, "op": op, **params}))
+            for message in self._read_lines(sock):
+                if message.get("id") != request_id:
+                    continue
+                if not message.get("ok"):
+                    self._raise_remote(message)
+                return message.get("result")
+        finally:
+            sock.close()
+        raise ControlPlaneError("Control daemon closed the connection without replying")
+
+    # --- Registry-compatible API -----------------------------------------
+
+    def status(self) -> Dict[int, dict]:
+        return {int(num): record for num, record in (self.request("status") or {}).items()}
+
+    @staticmethod
+    def _profile_data(profile) -> Optional[dict]:
+        """Serializes a profile as `Profile.save` does; None lets the daemon read the saved one."""
+        return profile.model_dump(by_alias=True, exclude_none=True) if profile is not None else None
+
+    def launch_instance(self, instance_num: int, profile=None, use_gamescope_override: Optional[bool] = None) -> dict:
+        """Launches an instance in the daemon with the given (possibly unsaved) profile."""
+        result = self.request(
+            "launch", instances=[instance_num], gamescope=use_gamescope_override, profile=self._profile_data(profile)
+        )
+        return result[str(instance_num)]
+
+    def stop_instance(self, instance_num: int) -> dict:
+        return self.request("stop", instances=[instance_num])[str(instance_num)]
+
+    def stop_all(self) -> None:
+        self.request("stop")
+
+    def reassign_input(self, instance_num: int, device_path: Optional[str], kind: str = "gamepad") -> None:
+        self.request("assign_input", instance=instance_num, device=device_path, kind=kind)
+
+    def suspend_instance(self, instance_num: int) -> dict:
+        return self.request("suspend", instances=[instance_num])[str(instance_num)]
+
+    def resume_instance(self, instance_num: int) -> dict:
+        return self.request("resume", instances=[instance_num])[str(instance_num)]
+
+    def prepare_standby(self, profile=None) -> List[int]:
+        """Starts warm standbys in the daemon with the given (possibly unsaved) profile."""
+        return self.request("prepare_standby", profile=self._profile_data(profile))
+
+    def release_standbys(self, instance_nums: List[int], profile=None) -> List[int]:
+        return self.request("release_standbys", instances=list(instance_nums), profile=self._profile_data(profile))
+
+    def discard_standby(self) -> None:
+        self.request("discard_standby")
+
+    def standby_metrics(self) -> dict:
+        return self.request("standby_metrics")
+
+    def pressure_snapshot(self) -> dict:
+        return self.request("pressure")
+
+    def prefetch_status(self) -> dict:
+        return self.request("prefetch")
+
+    def memory_merge_report(self) -> dict:
+        return self.request("memory_merge")
+
+    def client_footprint_report(self) -> dict:
+        return self.request("client_footprint")
+
+    def get_state(self, instance_num: int) -> str:
+        from .instance_registry import STOPPED
+
+        record = self.status().get(instance_num)
+        return record["state"] if record else STOPPED
+
+    def is_any_active(self) -> bool:
+        from .instance_registry import ACTIVE_STATES
+
+        return any(r["state"] in ACTIVE_STATES for r in self.status().values())
+
+    def events(self) -> Iterator[dict]:
+        """Subscribes and yields state events until the daemon disconnects."""
+        sock = self._connect()
+        sock.settimeout(None)
+        try:
+            sock.sendall(encode_message({"id": 0, "op": "subscribe"}))
+            for message in self._read_lines(sock):
+                if "ev" in message:
+                    yield message
+        finally:
+            sock.close()
+
+    def subscribe(self, callback: Callable[[dict], None]) -> Callable[[], None]:
+        """
+        Delivers daemon events to `callback` from a background thread.
+
+        Returns a function that stops the subscription.
+        """
+        sock_holder: List[socket.socket] = []
+        stopped = threading.Event()
+
+        def run():
+            try:
+                sock = self._connect()
+                sock.settimeout(None)
+                sock_holder.append(sock)
+                sock.sendall(encode_message({"id": 0, "op": "subscribe"}))
+                for message in self._read_lines(sock):
+                    if stopped.is_set():
+                        break
+                    if "ev" in message:
+                        callback(message)
+            except (ControlPlaneError, OSError):
+                pass
+
+        def unsubscribe():
+            stopped.set()
+            for sock in sock_holder:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+        threading.Thread(target=run, name="control-subscriber", daemon=True).start()
+        return unsubscribe
+
+
+def connect_registry(logger: Logger):
+    """
+    Returns the registry front-ends should use.
+
+    A running control daemon is preferred so every client shares one
+    registry; otherwise an in-process `InstanceRegistry` is created.
+    """
+    if ControlClient.is_daemon_running():
+        logger.info("Using the running control daemon.")
+        return ControlClient()
+    from .instance_registry import InstanceRegistry
+
+    return InstanceRegistry(logger)
@@ -0,0 +1,259 @@
+import os
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Saved device ids with this prefix are identities; anything else is a path.
+IDENTITY_PREFIX = "input:"
+
+_SYSFS_INPUT = "/sys/class/input"
+_UDEV_DATA = "/run/udev/data"
+# udev properties that classify an input device.
+_UDEV_KINDS = {
+    "ID_INPUT_JOYSTICK": "joystick",
+    "ID_INPUT_MOUSE": "mouse",
+    "ID_INPUT_KEYBOARD": "keyboard",
+}
+
+
+class DeviceIdentity(NamedTuple):
+    """
+    The stable identity of an input device, read from sysfs.
+
+    Attributes:
+        bus (int): Bus type (USB 0x03, Bluetooth 0x05, ...).
+        vendor (int): Vendor id.
+        product (int): Product id.
+        version (int): Version; changes with firmware updates.
+        uniq (str): Serial number or Bluetooth address, if the device has one.
+        phys (str): Physical path (port) the device is attached to.
+        name (str): Human-readable name; not part of the identity.
+    """
+    bus: int
+    vendor: int
+    product: int
+    version: int
+    uniq: str
+    phys: str
+    name: str = ""
+
+    def to_id(self) -> str:
+        """Serializes the identity for storage in a profile."""
+        return (
+            f"{IDENTITY_PREFIX}{self.bus:04x}|{self.vendor:04x}|{self.product:04x}|{self.version:04x}"
+            f"|{self.uniq}|{self.phys}"
+        )
+
+
+def is_identity(device_id: Optional[str]) -> bool:
+    return bool(device_id) and device_id.startswith(IDENTITY_PREFIX)
+
+
+def parse_identity(device_id: str) -> Optional[DeviceIdentity]:
+    """Parses a stored identity; returns None if it is malformed."""
+    if not is_identity(device_id):
+        return None
+    parts = device_id[len(IDENTITY_PREFIX):].split("|", 5)
+    if len(parts) != 6:
+        return None
+    try:
+        bus, vendor, product, version = (int(p, 16) for p in parts[:4])
+    except ValueError:
+        return None
+    return DeviceIdentity(bus, vendor, product, version, parts[4], parts[5])
+
+
+def _match_keys(identity: DeviceIdentity) -> List[Tuple]:
+    """
+    Returns the lookup keys of an identity, from most to least specific.
+
+    The exact key is tried first. The serial (or Bluetooth address) key
+    survives firmware updates and reconnects. The port key tells identical
+    pads without a serial apart. The model key is only used when it is
+    unambiguous, e.g. for a single pad moved to another port, and never for
+    a node another saved identity matches more specifically.
+    """
+    model = (identity.bus, identity.vendor, identity.product)
+    keys = [("exact", *model, identity.version, identity.uniq, identity.phys)]
+    if identity.uniq:
+        keys.append(("uniq", *model, identity.uniq))
+    if identity.phys:
+        keys.append(("phys", *model, identity.phys))
+    keys.append(("model", *model))
+    return keys
+
+
+def _read(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+class DeviceIdentityIndex:
+    """
+    Maps stable device identities to the current event nodes.
+
+    `/dev/input/by-id` names change or collide for identical pads, for
+    Bluetooth reconnects (which have no by-id entry at all) and after
+    firmware updates. The index instead keys every event node by its sysfs
+    attributes, at several levels of specificity, in hash maps. Resolving
+    an identity is therefore a few dictionary lookups. `refresh` only reads
+    the nodes that appeared since the last call and drops the ones that
+    went away, so it is cheap enough to run on every hotplug or lookup miss.
+    """
+
+    def __init__(self, sysfs_root: str = _SYSFS_INPUT, udev_data: str = _UDEV_DATA):
+        self._sysfs_root = sysfs_root
+        self._udev_data = udev_data
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, Tuple[DeviceIdentity, Set[str]]] = {}
+        self._by_key: Dict[Tuple, Set[str]] = {}
+        # sysfs inode per indexed event name; a reused eventN gets a new one
+        self._inodes: Dict[str, int] = {}
+
+    def _read_node(self, event_name: str) -> Tuple[Optional[DeviceIdentity], Set[str]]:
+        device_dir = os.path.join(self._sysfs_root, event_name, "device")
+        id_dir = os.path.join(device_dir, "id")
+        try:
+            identity = DeviceIdentity(
+                bus=int(_read(os.path.join(id_dir, "bustype")) or "0", 16),
+                vendor=int(_read(os.path.join(id_dir, "vendor")) or "0", 16),
+                product=int(_read(os.path.join(id_dir, "product")) or "0", 16),
+                version=int(_read(os.path.join(id_dir, "version")) or "0", 16),
+                uniq=_read(os.path.join(device_dir, "uniq")),
+                phys=_read(os.path.join(device_dir, "phys")),
+                name=_read(os.path.join(device_dir, "name")),
+            )
+        except ValueError:
+            return None, set()
+
+        kinds = set()
+        dev_numbers = _read(os.path.join(self._sysfs_root, event_name, "dev"))
+        if dev_numbers:
+            udev_db = _read(os.path.join(self._udev_data, f"c{dev_numbers}"))
+            for line in udev_db.splitlines():
+                if not line.startswith("E:"):
+                    continue
+                key, _, value = line[2:].partition("=")
+                if value == "1" and key in _UDEV_KINDS:
+                    kinds.add(_UDEV_KINDS[key])
+        if not kinds:
+            # Without udev data, joydev still marks pads: it binds a jsN
+            # handler to them but not to their motion sensors or touchpads.
+            try:
+                if any(entry.startswith("js") for entry in os.listdir(device_dir)):
+                    kinds.add("joystick")
+            except OSError:
+                pass
+        return identity, kinds
+
+    def refresh(self) -> Tuple[int, int]:
+        """Indexes new event nodes and drops removed ones; returns (added, removed)."""
+        try:
+            with os.scandir(self._sysfs_root) as entries:
+                current = {entry.name: entry.inode() for entry in entries if entry.name.startswith("event")}
+        except OSError:
+            current = {}
+        with self._lock:
+            removed = {name for name, inode in self._inodes.items() if current.get(name) != inode}
+            added = {name for name, inode in current.items() if self._inodes.get(name) != inode}
+            for event_name in removed:
+                del self._inodes[event_name]
+                node = f"/dev/input/{event_name}"
+                entry = self._nodes.pop(node, None)
+                if entry is None:
+                    continue
+                for key in _match_keys(entry[0]):
+                    nodes = self._by_key.get(key)
+                    if nodes:
+                        nodes.discard(node)
+                        if not nodes:
+                            del self._by_key[key]
+        new_entries = {}
+        for event_name in added:
+            identity, kinds = self._read_node(event_name)
+            if identity:
+                new_entries[f"/dev/input/{event_name}"] = (identity, kinds)
+        with self._lock:
+            for event_name in added:
+                self._inodes[event_name] = current[event_name]
+            for node, (identity, kinds) in new_entries.items():
+                self._nodes[node] = (identity, kinds)
+                for key in _match_keys(identity):
+                    self._by_key.setdefault(key, set()).add(node)
+        return len(new_entries), len(removed)
+
+    def _claimed(self, node: str, others: List[DeviceIdentity]) -> bool:
+        """Checks whether another identity matches a node on more than the model; the caller holds the lock."""
+        return any(node in self._by_key.get(key, ()) for other in others for key in _match_keys(other)[:-1])
+
+    def _lookup(self, identity: DeviceIdentity, kind: Optional[str] = None,
+                others: Iterable[DeviceIdentity] = ()) -> Optional[str]:
+        others = [other for other in others if other != identity]
+        with self._lock:
+            for key in _match_keys(identity):
+                nodes = self._by_key.get(key)
+                if key[0] == "model" and nodes and others:
+                    # Two identical pads without a serial: with this one
+                    # unplugged, the model alone would match the other's.
+                    nodes = {node for node in nodes if not self._claimed(node, others)}
+                if not nodes:
+                    continue
+                if kind and len(nodes) > 1:
+                    # One device may have several nodes with the same ids
+                    # (a DualSense's pad, motion sensors and touchpad).
+                    nodes = {node for node in nodes if kind in self._nodes[node][1]} or nodes
+                if len(nodes) == 1:
+                    return next(iter(nodes))
+        return None
+
+    def resolve(self, device_id: Optional[str], kind: Optional[str] = None,
+                others: Iterable[Optional[str]] = ()) -> Optional[str]:
+        """
+        Returns the current event node of a saved device id.
+
+        Identities are looked up in the index, refreshing it once on a miss
+        in case the device was just plugged in. `kind` ("joystick", "mouse"
+        or "keyboard") picks the right node of a device that has several.
+        `others` are the ids saved for the other players; a node one of them
+        matches is not taken on the model alone. Legacy path ids are
+        returned resolved if they exist.
+        """
+        if not device_id:
+            return None
+        identity = parse_identity(device_id)
+        if identity is None:
+            return os.path.realpath(device_id) if os.path.exists(device_id) else None
+        other_identities = [parsed for parsed in map(parse_identity, filter(None, others)) if parsed]
+        node = self._lookup(identity, kind, other_identities)
+        if node is None or not self._is_current(node):
+            self.refresh()
+            node = self._lookup(identity, kind, other_identities)
+        return node
+
+    def _is_current(self, node: str) -> bool:
+        """Checks that an indexed node still belongs to the device it was indexed for."""
+        event_name = os.path.basename(node)
+        try:
+            inode = os.stat(os.path.join(self._sysfs_root, event_name), follow_symlinks=False).st_ino
+        except OSError:
+            return False
+        with self._lock:
+            return self._inodes.get(event_name) == inode
+
+    def identity_of(self, path: str) -> Optional[DeviceIdentity]:
+        """Returns the identity of the device at an event node or by-id path."""
+        node = os.path.realpath(path)
+        with self._lock:
+            entry = self._nodes.get(node)
+        if entry is None:
+            self.refresh()
+            with self._lock:
+                entry = self._nodes.get(node)
+        return entry[0] if entry else None
+
+    def devices(self) -> Dict[str, Tuple[DeviceIdentity, Set[str]]]:
+        """Returns every indexed node with its identity and udev kinds."""
+        with self._lock:
+            return dict(self._nodes)
@@ -1,6 +1,14 @@
 import re
 import subprocess
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
+
+from .device_identity import DeviceIdentityIndex
+
+_XRANDR_OUTPUT_RE = re.compile(
+    r"^(?P<name>\S+) (?P<state>connected|disconnected)(?P<primary> primary)?"
+    r"(?: (?P<w>\d+)x(?P<h>\d+)\+(?P<x>\d+)\+(?P<y>\d+))?"
+)
+_XRANDR_MODE_RE = re.compile(r"^\s+\d+x\d+i?\s")
 
 
 class DeviceManager:
@@ -15,7 +23,8 @@ class DeviceManager:
 
     def __init__(self):
         """Initializes the DeviceManager."""
-        pass
+        self._display_topology: Optional[Dict[str, Dict[str, Any]]] = None
+        self.identity_index = DeviceIdentityIndex()
 
     def _run_command(self, command: str) -> str:
         """
@@ -69,17 +78,23 @@ class DeviceManager:
         Parses the output of `ls -l /dev/input/by-id/` to find keyboards,
         mice, and joysticks.
 
+        Devices without a by-id entry (such as Bluetooth pads) are added from
+        the sysfs identity index, classified by their udev properties.
+
         Returns:
             Dict[str, List[Dict[str, str]]]: A dictionary where keys are
             "keyboard", "mouse", and "joystick". Each key holds a list of
             device dictionaries, with each dictionary containing the
-            device's 'id' (path) and 'name' (human-readable).
+            device's 'id' (its stable identity, or its path if it has
+            none), 'path' and 'name' (human-readable).
         """
         detected_devices: Dict[str, List[Dict[str, str]]] = {
             "keyboard": [],
             "mouse": [],
             "joystick": []
         }
+        self.identity_index.refresh()
+        seen_nodes = set()
         by_id_output = self._run_command("ls -l /dev/input/by-id/")
 
         for line in by_id_output.splitlines():
@@ -88,7 +103,9 @@ class DeviceManager:
                 device_name_id_raw = match.group(1)
                 full_path = f"/dev/input/by-id/{device_name_id_raw}"
                 human_name = self._get_device_name_from_id(full_path)
-                device = {"id": full_path, "name": human_name}
+                identity = self.identity_index.identity_of(full_path)
+                seen_nodes.add(f"/dev/input{match.group(2)}")
+                device = {"id": identity.to_id() if identity else full_path, "path": full_path, "name": human_name}
 
                 if "event-joystick" in device_name_id_raw:
                     detected_devices["joystick"].append(device)
@@ -97,6 +114,12 @@ class DeviceManager:
                 elif "event-kbd" in device_name_id_raw:
                     detected_devices["keyboard"].append(device)
 
+        for node, (identity, kinds) in self.identity_index.devices().items():
+            if node in seen_nodes:
+                continue
+            for kind in kinds:
+                detected_devices[kind].append({"id": identity.to_id(), "path": node, "name": identity.name or node})
+
         for dev_type in detected_devices:
             detected_devices[dev_type] = sorted(
                 detected_devices[dev_type], key=lambda x: x['name']
@@ -131,6 +154,58 @@ class DeviceManager:
 
         return sorted(audio_sinks, key=lambda x: x['name'])
 
+    def get_display_topology(self, refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Parses the connected outputs and their geometry from `xrandr`.
+
+        The result is cached; pass `refresh=True` after a hotplug to query
+        again.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Outputs keyed by name (e.g. "DP-1").
+            Each entry has 'id', 'name', 'width', 'height', 'x', 'y'
+            (None for connected but disabled outputs), 'refresh' (Hz of the
+            current mode, or None), 'primary' and 'vrr_capable'.
+        """
+        if self._display_topology is not None and not refresh:
+            return self._display_topology
+
+        topology: Dict[str, Dict[str, Any]] = {}
+        current = None
+        xrandr_output = self._run_command("xrandr --query --props")
+        for line in xrandr_output.splitlines():
+            header = _XRANDR_OUTPUT_RE.match(line)
+            if header:
+                current = None
+                if header.group("state") != "connected":
+                    continue
+                name = header.group("name")
+                geometry = header.group("w") is not None
+                current = {
+                    "id": name,
+                    "name": name,
+                    "width": int(header.group("w")) if geometry else None,
+                    "height": int(header.group("h")) if geometry else None,
+                    "x": int(header.group("x")) if geometry else None,
+                    "y": int(header.group("y")) if geometry else None,
+                    "refresh": None,
+                    "primary": header.group("primary") is not None,
+                    "vrr_capable": False,
+                }
+                topology[name] = current
+            elif current is None:
+                continue
+            elif line.strip().startswith("vrr_capable:"):
+                current["vrr_capable"] = line.split(":", 1)[1].strip() == "1"
+            elif _XRANDR_MODE_RE.match(line):
+                for token in line.split()[1:]:
+                    if "*" in token:
+                        current["refresh"] = float(token.strip("*+"))
+                        break
+
+        self._display_topology = topology
+        return topology
+
     def get_display_outputs(self) -> List[Dict[str, str]]:
         """
         Detects connected display outputs (monitors) using `xrandr`.
@@ -140,15 +215,9 @@ class DeviceManager:
             dictionary represents a connected monitor and contains its
             'id' and 'name' (e.g., "DP-1").
         """
-        display_outputs = []
-        xrandr_output = self._run_command("xrandr --query")
-        connected_pattern = re.compile(r"^(\S+) connected.*")
-
-        for line in xrandr_output.splitlines():
-            match = connected_pattern.match(line)
-            if match:
-                display_name = match.group(1)
-                if not display_name.lower().startswith("virtual"):
-                    display_outputs.append({"id": display_name, "name": display_name})
-
-        return sorted(display_outputs, key=lambda x: x['name']) 
\ No newline at end of file
+        display_outputs = [
+            {"id": output["id"], "name": output["name"]}
+            for output in self.get_display_topology().values()
+            if not output["name"].lower().startswith("virtual")
+        ]
+        return sorted(display_outputs, key=lambda x: x['name'])
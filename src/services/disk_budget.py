@@ -0,0 +1,401 @@
+import ctypes
+import json
+import os
+import platform
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..core.config import Config
+from ..core.logger import Logger
+from ..models.profile import DiskBudgetConfig
+from .instance_state import InstanceStateStore
+
+# Regenerable data in an instance home, relative to the home, by category.
+CATEGORIES: Dict[str, Tuple[str, ...]] = {
+    "htmlcache": (".local/share/Steam/config/htmlcache", ".local/share/Steam/appcache/httpcache", ".cache"),
+    "logs": (".local/share/Steam/logs",),
+    "dumps": (".local/share/Steam/dumps",),
+    "downloads": (".local/share/Steam/steamapps/downloading", ".local/share/Steam/steamapps/temp"),
+}
+# Categories whose age limit is `log_max_age_days`; the rest use `cache_max_age_days`.
+_LOG_CATEGORIES = ("logs", "dumps")
+
+# Directory mtimes only change when entries are added or removed, so files
+# growing in place are only seen by a full rescan, done this often.
+FULL_RESCAN_SECONDS = 24 * 3600
+# Delay before the first background collection, to stay out of startup I/O.
+INITIAL_DELAY_SECONDS = 120
+
+_HOME_PATTERN = re.compile(r"^steam_home_(\d+)$")
+_DAY = 24 * 3600
+_MB = 1024 * 1024
+
+# ioprio_set(2) has no Python binding; its number differs per architecture.
+_SYS_IOPRIO_SET = {"x86_64": 251, "i686": 289, "aarch64": 30, "armv7l": 314, "riscv64": 30}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+
+
+def lower_io_priority() -> bool:
+    """
+    Moves the calling thread to the idle I/O class and the lowest CPU
+    priority; returns False if the I/O class could not be set.
+    """
+    try:
+        # Per thread on Linux, where the thread id is a PRIO_PROCESS id
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except OSError:
+        pass
+    number = _SYS_IOPRIO_SET.get(platform.machine())
+    if number is None:
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+    except OSError:
+        return False
+    # Who 0 is the calling thread
+    return libc.syscall(number, _IOPRIO_WHO_PROCESS, 0, _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT) == 0
+
+
+class DirectorySizeIndex:
+    """
+    Disk usage of directory trees, kept between runs.
+
+    Each directory's entry holds its mtime, the disk usage and newest mtime
+    of the files directly in it, and its subdirectories. A directory whose
+    mtime is unchanged is not listed again, so measuring an unchanged tree
+    costs one stat per directory instead of one per file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._entries: Dict[str, dict] = {}
+        self._visited: Dict[str, dict] = {}
+        self.full_scan_at = 0.0
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            self._entries = data.get("dirs", {})
+            self.full_scan_at = data.get("full_scan_at", 0.0)
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def begin(self, full: bool) -> None:
+        """Starts a pass; with `full`, every directory is listed again."""
+        if full:
+            self._entries = {}
+            self.full_scan_at = time.time()
+        self._visited = {}
+
+    def measure(self, root: Path) -> Tuple[int, float]:
+        """Returns the disk usage in bytes of a tree and its newest mtime."""
+        key = str(root)
+        try:
+            stat = os.stat(root, follow_symlinks=False)
+        except OSError:
+            return 0, 0.0
+        entry = self._visited.get(key) or self._entries.get(key)
+        if entry is None or entry["m"] != stat.st_mtime_ns:
+            entry = self._scan(root, stat)
+        self._visited[key] = entry
+        total, newest = entry["own"], entry["newest"]
+        for name in entry["subs"]:
+            size, sub_newest = self.measure(root / name)
+            total += size
+            newest = max(newest, sub_newest)
+        return total, newest
+
+    @staticmethod
+    def _scan(root: Path, stat: os.stat_result) -> dict:
+        own = stat.st_blocks * 512
+        newest = stat.st_mtime
+        subs = []
+        try:
+            with os.scandir(root) as entries:
+                for item in entries:
+                    try:
+                        if item.is_dir(follow_symlinks=False):
+                            subs.append(item.name)
+                            continue
+                        item_stat = item.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    own += item_stat.st_blocks * 512
+                    newest = max(newest, item_stat.st_mtime)
+        except OSError:
+            pass
+        return {"m": stat.st_mtime_ns, "own": own, "newest": newest, "subs": subs}
+
+    def save(self) -> None:
+        """Keeps the directories visited in this pass."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"full_scan_at": self.full_scan_at, "dirs": self._visited}), encoding="utf-8")
+            tmp_path.replace(self.path)
+        except OSError:
+            pass
+
+
+class _Candidate:
+    __slots__ = ("path", "size", "mtime", "instance_num", "category")
+
+    def __init__(self, path: Path, size: int, mtime: float, instance_num: Optional[int], category: str):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.instance_num = instance_num
+        self.category = category
+
+
+class DiskBudgetService:
+    """
+    Accounts for and trims the disk space of instance homes and logs.
+
+    Homes collect CEF web caches, Steam logs, crash dumps and abandoned
+    downloads, and homes of instances that are no longer configured stay
+    behind. A collection measures every ``steam_home_N`` per category with
+    a `DirectorySizeIndex`, then plans removals: files past their category's
+    age limit, homes beyond ``NUM_PLAYERS`` unused for ``STALE_HOME_DAYS``,
+    and the oldest regenerable files of a home or of all homes over budget.
+    A dry run only reports the plan.
+
+    Homes of running instances are never touched: an instance counts as
+    running if it has a live state record (warm standbys have one too, so
+    a collection in another process leaves them alone) or was claimed by a
+    launch in this process. Claims are checked again before every removal and state
+    records before the first removal in each home.
+    """
+
+    def __init__(self, logger: Logger, index_path: Optional[Path] = None):
+        self.logger = logger
+        self.state_store = InstanceStateStore(logger)
+        self.index = DirectorySizeIndex(Path(index_path or Config.get_disk_usage_index_path()))
+        self.config = DiskBudgetConfig()
+        self.num_players = 0
+        self._lock = threading.Lock()
+        self._claimed: Set[int] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_report: Optional[dict] = None
+
+    # --- Running instances ---------------------------------------------
+
+    def claim(self, instance_num: int) -> None:
+        """Marks a home as in use before its instance is launched; waits for a removal in progress."""
+        with self._lock:
+            self._claimed.add(instance_num)
+
+    def release(self, instance_num: int) -> None:
+        with self._lock:
+            self._claimed.discard(instance_num)
+
+    def _live_records(self) -> Dict[int, dict]:
+        return {n: record for n, record in self.state_store.load_all().items() if self.state_store.is_live(record)}
+
+    def _live_instances(self) -> Set[int]:
+        return set(self._live_records())
+
+    def _live_log_paths(self) -> Set[str]:
+        return {
+            record.get("log_path") for record in self.state_store.load_all().values()
+            if self.state_store.is_live(record)
+        }
+
+    # --- Background collection -----------------------------------------
+
+    def schedule(self, config: DiskBudgetConfig, num_players: int) -> None:
+        """Updates the policy and starts periodic collection if it is enabled."""
+        self.config = config
+        self.num_players = num_players
+        if not config.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="disk-budget", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        lower_io_priority()
+        delay = INITIAL_DELAY_SECONDS
+        while not self._stop.wait(delay):
+            if not self.config.enabled:
+                return
+            try:
+                self.collect(self.config, self.num_players)
+            except Exception as e:
+                self.logger.error(f"Disk collection failed: {e}")
+            delay = self.config.interval_minutes * 60
+
+    # --- Collection ----------------------------------------------------
+
+    @staticmethod
+    def _homes() -> Dict[int, Path]:
+        homes = {}
+        try:
+            for entry in Config.LOCAL_DIR.iterdir():
+                match = _HOME_PATTERN.match(entry.name)
+                if match and entry.is_dir() and not entry.is_symlink():
+                    homes[int(match.group(1))] = entry
+        except OSError:
+            pass
+        return homes
+
+    @staticmethod
+    def _list_files(root: Path, instance_num: Optional[int], category: str) -> List[_Candidate]:
+        files = []
+        for directory, _dirs, names in os.walk(root):
+            for name in names:
+                path = Path(directory) / name
+                try:
+                    stat = os.lstat(path)
+                except OSError:
+                    continue
+                files.append(_Candidate(path, stat.st_blocks * 512, stat.st_mtime, instance_num, category))
+        return files
+
+    def _max_age(self, config: DiskBudgetConfig, category: str) -> int:
+        days = config.log_max_age_days if category in _LOG_CATEGORIES else config.cache_max_age_days
+        return days * _DAY
+
+    def collect(self, config: DiskBudgetConfig, num_players: int, dry_run: bool = False) -> dict:
+        """
+        Measures the homes and logs and removes what the policy allows.
+
+        Returns:
+            dict: Usage per home and category, the removals (planned, with
+            a dry run) with their reasons, and the bytes they free.
+        """
+        lower_io_priority()
+        start = time.monotonic()
+        now = time.time()
+        self.index.begin(full=now - self.index.full_scan_at >= FULL_RESCAN_SECONDS)
+        live = self._live_records()
+        standbys = {n for n, record in live.items() if record.get("standby")}
+        with self._lock:
+            busy = set(live) | self._claimed
+
+        homes: Dict[str, dict] = {}
+        actions: List[dict] = []
+        candidates: List[_Candidate] = []
+        total = 0
+        for instance_num, home in sorted(self._homes().items()):
+            size, newest = self.index.measure(home)
+            total += size
+            categories = {}
+            for category, relatives in CATEGORIES.items():
+                categories[category] = sum(self.index.measure(home / relative)[0] for relative in relatives)
+            is_busy = instance_num in busy
+            homes[str(instance_num)] = {
+                "path": str(home), "mb": round(size / _MB, 1),
+                "categories": {k: round(v / _MB, 1) for k, v in categories.items()},
+                "running": is_busy, "standby": instance_num in standbys, "configured": instance_num <= num_players,
+                "last_used_days": round((now - newest) / _DAY, 1),
+            }
+            if is_busy:
+                continue
+            if (config.stale_home_days and instance_num > num_players
+                    and now - newest >= config.stale_home_days * _DAY):
+                actions.append(self._action(home, size, instance_num, "unconfigured home"))
+                continue
+
+            home_files = []
+            for category, relatives in CATEGORIES.items():
+                for relative in relatives:
+                    home_files.extend(self._list_files(home / relative, instance_num, category))
+            home_files.sort(key=lambda c: c.mtime)
+            remaining = []
+            for candidate in home_files:
+                max_age = self._max_age(config, candidate.category)
+                if max_age and now - candidate.mtime >= max_age:
+                    actions.append(self._action(candidate.path, candidate.size, instance_num, f"older than the {candidate.category} age limit"))
+                    size -= candidate.size
+                else:
+                    remaining.append(candidate)
+            budget = config.max_home_mb * _MB
+            while budget and size > budget and remaining:
+                candidate = remaining.pop(0)
+                actions.append(self._action(candidate.path, candidate.size, instance_num, "home over budget"))
+                size -= candidate.size
+            candidates.extend(remaining)
+
+        live_logs = self._live_log_paths()
+        log_size, _newest = self.index.measure(Config.LOG_DIR)
+        total += log_size
+        log_max_age = config.log_max_age_days * _DAY
+        for candidate in sorted(self._list_files(Config.LOG_DIR, None, "logs"), key=lambda c: c.mtime):
+            if str(candidate.path) in live_logs:
+                continue
+            if log_max_age and now - candidate.mtime >= log_max_age:
+                actions.append(self._action(candidate.path, candidate.size, None, "older than the logs age limit"))
+            else:
+                candidates.append(candidate)
+
+        planned = sum(action["bytes"] for action in actions)
+        budget = config.max_total_mb * _MB
+        if budget and total - planned > budget:
+            excess = total - planned - budget
+            for candidate in sorted(candidates, key=lambda c: c.mtime):
+                if excess <= 0:
+                    break
+                actions.append(self._action(candidate.path, candidate.size, candidate.instance_num, "total over budget"))
+                excess -= candidate.size
+
+        freed = sum(action["bytes"] for action in actions) if dry_run else self._apply(actions)
+        self.index.save()
+        report = {
+            "dry_run": dry_run,
+            "homes": homes,
+            "logs_mb": round(log_size / _MB, 1),
+            "total_mb": round(total / _MB, 1),
+            "actions": [dict(a, mb=round(a["bytes"] / _MB, 2)) for a in actions],
+            "freed_mb": round(freed / _MB, 1),
+            "seconds": round(time.monotonic() - start, 2),
+        }
+        self.last_report = report
+        verb = "Would free" if dry_run else "Freed"
+        self.logger.info(
+            f"Disk collection: {report['total_mb']:.0f} MB in {len(homes)} home(s) and logs; "
+            f"{verb} {report['freed_mb']:.0f} MB in {len(actions)} removal(s) ({report['seconds']:.1f}s)."
+        )
+        return report
+
+    @staticmethod
+    def _action(path: Path, size: int, instance_num: Optional[int], reason: str) -> dict:
+        return {"path": str(path), "bytes": size, "instance": instance_num, "reason": reason}
+
+    def _apply(self, actions: List[dict]) -> int:
+        freed = 0
+        skipped: Set[int] = set()
+        checked: Set[int] = set()
+        for action in actions:
+            instance_num = action["instance"]
+            if instance_num is not None and instance_num not in checked:
+                checked.add(instance_num)
+                if instance_num in self._live_instances():
+                    skipped.add(instance_num)
+            # Held while removing, so a launch claiming the home waits for it
+            with self._lock:
+                if instance_num is not None and (instance_num in self._claimed or instance_num in skipped):
+                    skipped.add(instance_num)
+                    continue
+                path = Path(action["path"])
+                try:
+                    if path.is_dir() and not path.is_symlink():
+                        shutil.rmtree(path)
+                    else:
+                        path.unlink()
+                    freed += action["bytes"]
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    self.logger.warning(f"Disk collection: Could not remove '{path}': {e}")
+        if skipped:
+            self.logger.info(f"Disk collection: Skipped instance(s) {sorted(skipped)} that started meanwhile.")
+        return freed
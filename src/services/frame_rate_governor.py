@@ -0,0 +1,235 @@
+import os
+import re
+import select
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..core.config import Config
+from ..core.logger import Logger
+
+# Gamescope's "no limit" value used when a profile sets no cap.
+UNLIMITED_FPS = 999
+DEFAULT_IDLE_SECONDS = 60
+DEFAULT_IDLE_FPS = 15
+
+# Gamescope reports the nested Xwayland display in its output, which the
+# instance log captures.
+_DISPLAY_RE = re.compile(rb"(?:DISPLAY=|Xwayland on |xwayland display )(:\d+)", re.IGNORECASE)
+# Bytes of the log searched again with the next read, so a match split
+# across two reads is still found.
+_DISPLAY_OVERLAP = 64
+
+
+class _TrackedInstance:
+    __slots__ = ("instance_num", "fds", "focused_fps", "idle_fps", "idle_seconds",
+                 "log_path", "log_offset", "display", "last_input", "current_fps", "ceiling")
+
+    def __init__(self, instance_num: int, fds: List[int], focused_fps: int, idle_fps: int,
+                 idle_seconds: int, log_path: Path):
+        self.instance_num = instance_num
+        self.fds = fds
+        self.focused_fps = focused_fps
+        self.idle_fps = idle_fps
+        self.idle_seconds = idle_seconds
+        self.log_path = log_path
+        # How far the log was searched for the display
+        self.log_offset = 0
+        self.display: Optional[str] = None
+        self.last_input = time.monotonic()
+        self.current_fps = focused_fps
+        # Upper bound imposed from outside (e.g. under host pressure)
+        self.ceiling: Optional[int] = None
+
+
+class FrameRateGovernor:
+    """
+    Lowers the frame rate cap of instances whose players are idle.
+
+    The governor watches each tracked instance's assigned evdev nodes
+    (read-only and without grabbing, so the game still receives every
+    event). After `idle_seconds` without input, the instance is capped at
+    `idle_fps`. The cap is restored on the next input. Caps are changed at
+    runtime through the ``GAMESCOPE_FPS_LIMIT`` root-window property of the
+    instance's nested Xwayland display.
+
+    Every adjustment is written to its own log with a timestamp, so power
+    and thermal effects can be correlated with it.
+    """
+
+    def __init__(self, logger: Logger, poll_interval: float = 1.0):
+        self.logger = logger
+        self.adjustment_logger = Logger("MultiScope-FPS", Config.LOG_DIR)
+        self._poll_interval = poll_interval
+        self._instances: Dict[int, _TrackedInstance] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def track(self, instance_num: int, device_paths: List[str], focused_fps: int, idle_fps: int,
+              idle_seconds: int, log_path: Path) -> None:
+        """Starts watching an instance's input devices."""
+        fds = []
+        for path in device_paths:
+            try:
+                fds.append(os.open(path, os.O_RDONLY | os.O_NONBLOCK))
+            except OSError as e:
+                self.logger.warning(f"Instance {instance_num}: Cannot watch '{path}' for activity: {e}")
+        if not fds:
+            self.logger.warning(f"Instance {instance_num}: No input devices to watch; dynamic FPS disabled.")
+            return
+
+        tracked = _TrackedInstance(instance_num, fds, focused_fps, idle_fps, idle_seconds, log_path)
+        with self._lock:
+            previous = self._instances.pop(instance_num, None)
+            if previous:
+                tracked.ceiling = previous.ceiling
+            self._instances[instance_num] = tracked
+        if previous:
+            self._close_fds(previous)
+        self.logger.info(
+            f"Instance {instance_num}: Dynamic FPS enabled (idle after {idle_seconds}s -> {idle_fps} FPS)."
+        )
+        self._ensure_thread()
+
+    def set_ceiling(self, instance_num: int, fps: Optional[int], base_fps: int, log_path: Path) -> None:
+        """
+        Caps an instance's frame rate at `fps` on top of its idle policy; None removes the cap.
+
+        Instances without dynamic FPS are added without watched devices, so
+        they simply run at `base_fps` under the cap.
+        """
+        with self._lock:
+            tracked = self._instances.get(instance_num)
+            if tracked is None:
+                if fps is None:
+                    return
+                tracked = _TrackedInstance(instance_num, [], base_fps, base_fps, 0, log_path)
+                self._instances[instance_num] = tracked
+            tracked.ceiling = fps
+        self._ensure_thread()
+
+    def untrack(self, instance_num: int) -> None:
+        with self._lock:
+            tracked = self._instances.pop(instance_num, None)
+        if tracked:
+            self._close_fds(tracked)
+
+    def stop(self) -> None:
+        """Stops the governor and releases all watched devices."""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        with self._lock:
+            instances = list(self._instances.values())
+            self._instances.clear()
+        for tracked in instances:
+            self._close_fds(tracked)
+        self._thread = None
+        self._stop.clear()
+
+    @staticmethod
+    def _close_fds(tracked: _TrackedInstance) -> None:
+        for fd in tracked.fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _ensure_thread(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="fps-governor", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                instances = list(self._instances.values())
+            if not instances:
+                return
+            fd_owner = {fd: t for t in instances for fd in t.fds}
+            try:
+                readable, _, _ = select.select(list(fd_owner), [], [], self._poll_interval)
+            except (OSError, ValueError):
+                # A device was closed or unplugged; rebuild on the next pass.
+                time.sleep(self._poll_interval)
+                continue
+            now = time.monotonic()
+            for fd in readable:
+                try:
+                    # Drain pending events; their content does not matter.
+                    while os.read(fd, 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+                except OSError as e:
+                    # Unplugged: it would be reported readable on every pass
+                    self._drop_fd(fd_owner[fd], fd, e)
+                    continue
+                fd_owner[fd].last_input = now
+            for tracked in instances:
+                idle = now - tracked.last_input >= tracked.idle_seconds
+                target = tracked.idle_fps if idle else tracked.focused_fps
+                if tracked.ceiling and tracked.ceiling < target:
+                    target = tracked.ceiling
+                if target != tracked.current_fps:
+                    if target == tracked.ceiling:
+                        reason = "capped"
+                    elif not tracked.fds:
+                        reason = "cap removed"
+                    else:
+                        reason = f"idle for {now - tracked.last_input:.0f}s" if idle else "input resumed"
+                    self._apply(tracked, target, reason)
+
+    def _drop_fd(self, tracked: _TrackedInstance, fd: int, error: OSError) -> None:
+        with self._lock:
+            if fd not in tracked.fds:
+                return
+            tracked.fds.remove(fd)
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+        self.logger.warning(f"Instance {tracked.instance_num}: Stopped watching an input device for activity: {error}")
+
+    def _find_display(self, tracked: _TrackedInstance) -> Optional[str]:
+        """Searches the part of the instance log written since the last attempt."""
+        if tracked.display:
+            return tracked.display
+        try:
+            with open(tracked.log_path, "rb") as f:
+                f.seek(tracked.log_offset)
+                chunk = f.read()
+        except OSError:
+            return None
+        match = _DISPLAY_RE.search(chunk)
+        if match:
+            tracked.display = match.group(1).decode()
+        else:
+            tracked.log_offset += max(0, len(chunk) - _DISPLAY_OVERLAP)
+        return tracked.display
+
+    def _apply(self, tracked: _TrackedInstance, fps: int, reason: str) -> None:
+        display = self._find_display(tracked)
+        if not display or not shutil.which("xprop"):
+            # Retry on the next pass; the display may not be known yet.
+            return
+        result = subprocess.run(
+            ["xprop", "-root", "-display", display, "-f", "GAMESCOPE_FPS_LIMIT", "32c",
+             "-set", "GAMESCOPE_FPS_LIMIT", str(fps)],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            self.logger.warning(
+                f"Instance {tracked.instance_num}: Failed to set FPS limit on {display}: {result.stderr.strip()}"
+            )
+            return
+        self.adjustment_logger.info(
+            f"t={time.time():.3f} instance={tracked.instance_num} display={display} "
+            f"fps={tracked.current_fps}->{fps} reason={reason}"
+        )
+        tracked.current_fps = fps
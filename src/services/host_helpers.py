@@ -0,0 +1,19 @@
+import re
+from typing import Optional
+
+
+def game_key(game_id: str) -> str:
+    """Turns a game id or profile name into a safe directory name."""
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", game_id).strip("._") or "default"
+
+
+def mem_available() -> Optional[int]:
+    """Returns MemAvailable from /proc/meminfo in bytes, or None if unknown."""
+    try:
+        with open("/proc/meminfo", "rb") as f:
+            for line in f:
+                if line.startswith(b"MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
@@ -0,0 +1,196 @@
+import os
+import select
+import threading
+import time
+from typing import Dict, List, Optional
+
+from evdev import AbsInfo, UInput, ecodes as e
+
+from ..core.exceptions import VirtualDeviceError
+from ..core.logger import Logger
+from .input_router import INPUT_EVENT, InputRouter, find_event_node
+
+# Routes measured by the harness.
+DIRECT = "direct"
+ROUTER = "router"
+
+# Sequence numbers travel in ABS_X, whose range matches the router's proxy
+# so values are forwarded unscaled. They are spread by an odd stride larger
+# than twice the proxy's fuzz, so the kernel neither drops consecutive
+# values as duplicates nor smooths them.
+_SEQ_RANGE = 65536
+_SEQ_MIN = -32768
+_SEQ_STRIDE = 97
+_SEQ_INVERSE = pow(_SEQ_STRIDE, -1, _SEQ_RANGE)
+_SOURCE_CAPS = {
+    e.EV_KEY: [e.BTN_SOUTH],
+    e.EV_ABS: [(e.ABS_X, AbsInfo(value=0, min=-32768, max=32767, fuzz=0, flat=0, resolution=0))],
+}
+# Time allowed for in-flight events to arrive once injection stops.
+_DRAIN_SECONDS = 0.5
+
+
+def _percentile(samples: List[int], p: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * p))] / 1000.0
+
+
+class InputLatencyBenchmark:
+    """
+    Measures the input path an instance sees, using uinput loopback devices.
+
+    Source devices stand in for physical controllers. Events are injected
+    into them at a fixed rate, and the injection time of each is recorded.
+    The events are then read back from the node the sandbox would get: the
+    source itself for a directly bound device (a bind mount shares the
+    same character device, so it adds no latency), or the input router's
+    proxy. The report gives latency percentiles and the share of events
+    lost under load.
+
+    Only `/dev/uinput` and evdev are needed: no GPU, Steam or display.
+    """
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+
+    def run(self, devices: int = 1, rate_hz: int = 1000, duration: float = 5.0, path: str = DIRECT) -> Dict:
+        """
+        Runs one measurement.
+
+        Args:
+            devices (int): Number of simulated controllers.
+            rate_hz (int): Events injected per second per device.
+            duration (float): Seconds of injection.
+            path (str): ``direct`` or ``router``.
+
+        Returns:
+            Dict: Overall and per-device latency (microseconds) and loss.
+        """
+        sources: List[UInput] = []
+        router: Optional[InputRouter] = None
+        read_fds: List[int] = []
+        try:
+            for index in range(devices):
+                name = f"MultiScope Latency Source {index + 1}"
+                try:
+                    sources.append(UInput(_SOURCE_CAPS, name=name, vendor=0x1234, product=0x5679))
+                except Exception as ex:
+                    raise VirtualDeviceError(f"Failed to create latency source device: {ex}") from ex
+                source_path = find_event_node(name)
+                if not source_path:
+                    raise VirtualDeviceError(f"Latency source '{name}' created but its event node was not found.")
+                if path == ROUTER:
+                    router = router or InputRouter(self.logger)
+                    read_path = router.attach_instance(index + 1, source_path)
+                else:
+                    read_path = source_path
+                read_fds.append(os.open(read_path, os.O_RDONLY | os.O_NONBLOCK))
+            return self._measure(sources, read_fds, rate_hz, duration, path)
+        finally:
+            for fd in read_fds:
+                os.close(fd)
+            if router:
+                router.stop()
+            for source in sources:
+                source.close()
+
+    def _measure(self, sources: List[UInput], read_fds: List[int], rate_hz: int, duration: float, path: str) -> Dict:
+        total = max(1, int(rate_hz * duration))
+        sent_ns = [[0] * total for _ in sources]
+        latencies: List[List[int]] = [[] for _ in sources]
+        sent_counts = [0] * len(sources)
+        done = threading.Event()
+
+        reader = threading.Thread(
+            target=self._read_loop, args=(read_fds, sent_ns, latencies, done), name="latency-reader", daemon=True
+        )
+        reader.start()
+        # Let the reader reach its poll before the first event
+        time.sleep(0.05)
+
+        interval_ns = 1_000_000_000 // rate_hz
+        start = time.monotonic_ns()
+        for seq in range(total):
+            deadline = start + seq * interval_ns
+            delay = deadline - time.monotonic_ns()
+            if delay > 0:
+                time.sleep(delay / 1_000_000_000)
+            value = _SEQ_MIN + seq * _SEQ_STRIDE % _SEQ_RANGE
+            packet = INPUT_EVENT.pack(0, 0, e.EV_ABS, e.ABS_X, value) + INPUT_EVENT.pack(0, 0, e.EV_SYN, e.SYN_REPORT, 0)
+            for index, source in enumerate(sources):
+                sent_ns[index][seq] = time.monotonic_ns()
+                os.write(source.fd, packet)
+                sent_counts[index] += 1
+        elapsed = (time.monotonic_ns() - start) / 1_000_000_000
+
+        time.sleep(_DRAIN_SECONDS)
+        done.set()
+        reader.join(timeout=2)
+
+        per_device = [self._summarize(latencies[i], sent_counts[i]) for i in range(len(sources))]
+        merged = sorted(sample for device in latencies for sample in device)
+        report = {
+            "path": path,
+            "devices": len(sources),
+            "rate_hz": rate_hz,
+            "achieved_rate_hz": round(total / elapsed, 1) if elapsed else float(rate_hz),
+            **self._summarize(merged, sum(sent_counts), presorted=True),
+            "per_device": per_device,
+        }
+        self.logger.info(
+            f"Input latency ({path}, {len(sources)} x {rate_hz} Hz): p50 {report['p50_us']:.0f}us, "
+            f"p99 {report['p99_us']:.0f}us, loss {report['loss_pct']:.2f}%."
+        )
+        return report
+
+    @staticmethod
+    def _read_loop(read_fds: List[int], sent_ns: List[List[int]], latencies: List[List[int]],
+                   done: threading.Event) -> None:
+        epoll = select.epoll()
+        owner = {fd: index for index, fd in enumerate(read_fds)}
+        for fd in read_fds:
+            epoll.register(fd, select.EPOLLIN)
+        total = len(sent_ns[0])
+        # Sequence numbers wrap; track how many wraps each device has seen
+        wraps = [0] * len(read_fds)
+        last_seq = [-1] * len(read_fds)
+        try:
+            while not done.is_set():
+                for fd, _mask in epoll.poll(0.05):
+                    now = time.monotonic_ns()
+                    index = owner[fd]
+                    try:
+                        data = os.read(fd, INPUT_EVENT.size * 512)
+                    except BlockingIOError:
+                        continue
+                    for _sec, _usec, ev_type, code, value in INPUT_EVENT.iter_unpack(data):
+                        if ev_type != e.EV_ABS or code != e.ABS_X:
+                            continue
+                        seq = (value - _SEQ_MIN) * _SEQ_INVERSE % _SEQ_RANGE
+                        if seq < last_seq[index] - _SEQ_RANGE // 2:
+                            wraps[index] += 1
+                        last_seq[index] = seq
+                        seq += wraps[index] * _SEQ_RANGE
+                        if seq < total and sent_ns[index][seq]:
+                            latencies[index].append(now - sent_ns[index][seq])
+        finally:
+            epoll.close()
+
+    @staticmethod
+    def _summarize(samples: List[int], sent: int, presorted: bool = False) -> Dict:
+        if not presorted:
+            samples = sorted(samples)
+        received = len(samples)
+        loss_pct = 100.0 * (sent - received) / sent if sent else 0.0
+        if not samples:
+            return {"sent": sent, "received": 0, "loss_pct": loss_pct,
+                    "p50_us": 0.0, "p90_us": 0.0, "p99_us": 0.0, "p999_us": 0.0, "max_us": 0.0}
+        return {
+            "sent": sent,
+            "received": received,
+            "loss_pct": round(loss_pct, 3),
+            "p50_us": _percentile(samples, 0.50),
+            "p90_us": _percentile(samples, 0.90),
+            "p99_us": _percentile(samples, 0.99),
+            "p999_us": _percentile(samples, 0.999),
+            "max_us": samples[-1] / 1000.0,
+        }
@@ -0,0 +1,479 @@
+import collections
+import fcntl
+import os
+import select
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from evdev import AbsInfo, InputDevice, UInput, ecodes as e, list_devices
+
+from ..core.exceptions import VirtualDeviceError
+from ..core.logger import Logger
+
+# struct input_event: struct timeval, __u16 type, __u16 code, __s32 value
+INPUT_EVENT = struct.Struct("llHHi")
+_READ_SIZE = INPUT_EVENT.size * 256
+# ioctl that switches an evdev fd's event timestamps to another clock
+_EVIOCSCLOCKID = 0x400445A0
+
+# How often unplugged devices are looked for again, in seconds.
+_REATTACH_INTERVAL = 1.0
+# Mouse motion window used when an instance has no frame rate cap (240 Hz).
+DEFAULT_COALESCE_WINDOW = 1 / 240
+_LATENCY_SAMPLES = 4096
+
+# Canonical gamepad layout of every proxy (that of an Xbox 360 pad, which
+# SDL and Steam map out of the box). Any physical pad is normalized to it,
+# so a proxy never changes when a different pad is swapped in.
+_STICK = AbsInfo(value=0, min=-32768, max=32767, fuzz=16, flat=128, resolution=0)
+_TRIGGER = AbsInfo(value=0, min=0, max=255, fuzz=0, flat=0, resolution=0)
+_HAT = AbsInfo(value=0, min=-1, max=1, fuzz=0, flat=0, resolution=0)
+_PROXY_ABS = {
+    e.ABS_X: _STICK, e.ABS_Y: _STICK, e.ABS_RX: _STICK, e.ABS_RY: _STICK,
+    e.ABS_Z: _TRIGGER, e.ABS_RZ: _TRIGGER,
+    e.ABS_HAT0X: _HAT, e.ABS_HAT0Y: _HAT,
+}
+_PROXY_KEYS = [
+    e.BTN_SOUTH, e.BTN_EAST, e.BTN_NORTH, e.BTN_WEST, e.BTN_TL, e.BTN_TR,
+    e.BTN_TL2, e.BTN_TR2, e.BTN_SELECT, e.BTN_START, e.BTN_MODE,
+    e.BTN_THUMBL, e.BTN_THUMBR,
+    e.BTN_DPAD_UP, e.BTN_DPAD_DOWN, e.BTN_DPAD_LEFT, e.BTN_DPAD_RIGHT,
+]
+
+GAMEPAD = "gamepad"
+MOUSE = "mouse"
+KEYBOARD = "keyboard"
+
+_REL_WHEEL_HI_RES = getattr(e, "REL_WHEEL_HI_RES", 0x0B)
+_REL_HWHEEL_HI_RES = getattr(e, "REL_HWHEEL_HI_RES", 0x0C)
+_MOUSE_KEYS = list(range(e.BTN_LEFT, e.BTN_TASK + 1))
+_MOUSE_RELS = [e.REL_X, e.REL_Y, e.REL_WHEEL, e.REL_HWHEEL, _REL_WHEEL_HI_RES, _REL_HWHEEL_HI_RES]
+# Every keyboard key code; buttons start at BTN_MISC (0x100).
+_KEYBOARD_KEYS = list(range(e.KEY_ESC, e.BTN_MISC))
+
+# Proxy name, capabilities, forwarded key codes and extra UInput arguments per kind
+_PROXY_SPECS = {
+    GAMEPAD: ("Pad", {e.EV_KEY: _PROXY_KEYS, e.EV_ABS: list(_PROXY_ABS.items())},
+              frozenset(_PROXY_KEYS), {"vendor": 0x045E, "product": 0x028E, "version": 0x110}),
+    MOUSE: ("Mouse", {e.EV_KEY: _MOUSE_KEYS, e.EV_REL: _MOUSE_RELS},
+            frozenset(_MOUSE_KEYS), {}),
+    KEYBOARD: ("Keyboard", {e.EV_KEY: _KEYBOARD_KEYS},
+               frozenset(_KEYBOARD_KEYS), {}),
+}
+_MOUSE_REL_SET = frozenset(_MOUSE_RELS)
+# udev kind of the physical devices routed to each proxy kind
+_DEVICE_KINDS = {GAMEPAD: "joystick", MOUSE: "mouse", KEYBOARD: "keyboard"}
+
+
+def find_event_node(device_name: str, timeout: float = 5.0) -> Optional[str]:
+    """Returns the event node of the input device named `device_name`."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for path in list_devices():
+            try:
+                device = InputDevice(path)
+            except OSError:
+                continue
+            try:
+                if device.name == device_name:
+                    return device.path
+            finally:
+                device.close()
+        time.sleep(0.05)
+    return None
+
+
+class _Route:
+    """One instance's proxy device and the physical device feeding it."""
+
+    __slots__ = ("instance_num", "kind", "keys", "proxy", "proxy_path", "device_path", "device",
+                 "monotonic", "grab_failed", "abs_map", "pending", "dropping", "pressed", "coalesce_ns",
+                 "motion", "motion_deadline")
+
+    def __init__(self, instance_num: int, kind: str, proxy: UInput, proxy_path: str, coalesce_ns: int = 0):
+        self.instance_num = instance_num
+        self.kind = kind
+        self.keys = _PROXY_SPECS[kind][2]
+        self.proxy = proxy
+        self.proxy_path = proxy_path
+        self.device_path: Optional[str] = None
+        self.device: Optional[InputDevice] = None
+        # Whether the device timestamps events on the monotonic clock
+        self.monotonic = False
+        # The device path a grab last failed for, so it is logged once
+        self.grab_failed: Optional[str] = None
+        # ABS code -> (source min, source span, proxy min, proxy span)
+        self.abs_map: Dict[int, tuple] = {}
+        # Events of the packet being read, written on its SYN_REPORT
+        self.pending: List[tuple] = []
+        self.dropping = False
+        self.pressed: set = set()
+        # Relative motion accumulated until the coalescing window closes
+        self.coalesce_ns = coalesce_ns
+        self.motion = [0, 0]
+        self.motion_deadline: Optional[int] = None
+
+
+class InputRouter:
+    """
+    Routes physical input devices to stable per-instance proxy devices.
+
+    Each instance gets a uinput proxy per device kind ("MultiScope Pad N",
+    "MultiScope Mouse N", "MultiScope Keyboard N"). The proxy exists for
+    the lifetime of the instance and is what the sandbox sees. Physical
+    devices are grabbed exclusively and their events are forwarded from a
+    single epoll loop. A packet is written to the proxy with one `write`
+    when its SYN_REPORT arrives. Because the sandbox only knows the proxy,
+    a device can be unplugged, re-plugged or moved to another instance at
+    runtime without restarting the game.
+
+    High-rate mice (1000-8000 Hz) produce far more motion reports than a
+    game renders frames. Pure motion on a mouse route is therefore summed
+    over a coalescing window and written once per window. Buttons and
+    wheel events flush the pending motion first, so ordering is kept.
+
+    The added latency, measured from the kernel's event timestamp to the
+    completed proxy write, is sampled for every packet forwarded without
+    coalescing from a device that accepted monotonic timestamps.
+    """
+
+    def __init__(self, logger: Logger, resolve: Optional[Callable[[str, str, List[str]], Optional[str]]] = None):
+        """
+        Args:
+            resolve: Maps an assigned device id, its udev kind ("joystick",
+                "mouse" or "keyboard") and the ids routed to other instances
+                to the current event node, or None while the device is
+                absent. Defaults to treating ids as paths.
+        """
+        self.logger = logger
+        self._resolve = resolve or (lambda device_id, kind, others: device_id if os.path.exists(device_id) else None)
+        self._routes: Dict[int, _Route] = {}
+        self._by_fd: Dict[int, _Route] = {}
+        self._lock = threading.Lock()
+        self._epoll = select.epoll()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._latencies_ns = collections.deque(maxlen=_LATENCY_SAMPLES)
+        self._motion_reports_in = 0
+        self._motion_reports_out = 0
+
+    # --- Public API ----------------------------------------------------
+
+    def attach_instance(self, instance_num: int, device_path: Optional[str], kind: str = GAMEPAD,
+                        coalesce_window: float = 0.0) -> str:
+        """
+        Creates the instance's proxy of a kind and routes `device_path` to it.
+
+        A device that is missing now is attached as soon as it appears.
+
+        Args:
+            coalesce_window (float): Seconds over which mouse motion is summed.
+
+        Returns:
+            str: The proxy's event node, to expose to the sandbox.
+        """
+        route = self._ensure_route(instance_num, kind, int(coalesce_window * 1_000_000_000))
+        self.assign(instance_num, device_path, kind)
+        return route.proxy_path
+
+    def assign(self, instance_num: int, device_path: Optional[str], kind: str = GAMEPAD) -> None:
+        """
+        Routes a physical device to an instance, replacing its current one.
+
+        A device routed to another instance is moved, leaving that instance
+        without one. `None` detaches the instance's device.
+        """
+        with self._lock:
+            route = self._routes.get((instance_num, kind))
+            if route is None:
+                raise VirtualDeviceError(f"Instance {instance_num} has no {kind} proxy")
+            if device_path:
+                for other in self._routes.values():
+                    if other is not route and other.device_path == device_path:
+                        self._detach(other)
+                        other.device_path = None
+                        self.logger.info(
+                            f"Instance {other.instance_num}: {kind.capitalize()} moved to instance {instance_num}."
+                        )
+            self._detach(route)
+            route.device_path = device_path
+            if device_path:
+                self._try_attach(route)
+        self._ensure_thread()
+
+    def release(self, instance_num: int) -> None:
+        """Ungrabs the instance's devices and destroys its proxies."""
+        with self._lock:
+            routes = [self._routes.pop(key) for key in list(self._routes) if key[0] == instance_num]
+            for route in routes:
+                self._detach(route)
+        if not routes:
+            return
+        for route in routes:
+            route.proxy.close()
+        stats = self.latency_stats()
+        if stats["samples"]:
+            self.logger.info(
+                f"Input router latency: p50 {stats['p50_us']:.0f}us, p99 {stats['p99_us']:.0f}us "
+                f"over {stats['samples']} packets."
+            )
+        if self._motion_reports_in:
+            self.logger.info(
+                f"Input router coalesced {self._motion_reports_in} mouse motion reports "
+                f"into {self._motion_reports_out}."
+            )
+
+    def stop(self) -> None:
+        """Releases every route and stops the forwarding loop."""
+        for instance_num in {key[0] for key in list(self._routes)}:
+            self.release(instance_num)
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+        self._stop.clear()
+
+    def latency_stats(self) -> Dict[str, float]:
+        """Returns percentiles, in microseconds, of the recent forwarding latency."""
+        samples = sorted(self._latencies_ns)
+        if not samples:
+            return {"samples": 0, "p50_us": 0.0, "p99_us": 0.0, "max_us": 0.0}
+
+        def percentile(p: float) -> float:
+            return samples[min(len(samples) - 1, int(len(samples) * p))] / 1000.0
+        return {
+            "samples": len(samples),
+            "p50_us": percentile(0.50),
+            "p99_us": percentile(0.99),
+            "max_us": samples[-1] / 1000.0,
+        }
+
+    # --- Routes --------------------------------------------------------
+
+    def _ensure_route(self, instance_num: int, kind: str, coalesce_ns: int) -> _Route:
+        with self._lock:
+            route = self._routes.get((instance_num, kind))
+            if route:
+                route.coalesce_ns = coalesce_ns
+                return route
+        label, capabilities, _keys, ids = _PROXY_SPECS[kind]
+        name = f"MultiScope {label} {instance_num}"
+        try:
+            proxy = UInput(capabilities, name=name, **ids)
+        except Exception as ex:
+            raise VirtualDeviceError(f"Failed to create {kind} proxy for instance {instance_num}: {ex}") from ex
+        proxy_path = find_event_node(name)
+        if not proxy_path:
+            proxy.close()
+            raise VirtualDeviceError(
+                f"{kind.capitalize()} proxy for instance {instance_num} created but its event node was not found."
+            )
+        route = _Route(instance_num, kind, proxy, proxy_path, coalesce_ns)
+        with self._lock:
+            self._routes[(instance_num, kind)] = route
+        self.logger.info(f"Instance {instance_num}: {kind.capitalize()} proxy at {proxy_path}.")
+        return route
+
+    def _try_attach(self, route: _Route) -> bool:
+        """Opens and grabs the route's device; the caller holds the lock."""
+        others = [other.device_path for other in self._routes.values() if other is not route and other.device_path]
+        node = self._resolve(route.device_path, _DEVICE_KINDS[route.kind], others)
+        if not node:
+            return False
+        try:
+            device = InputDevice(node)
+        except OSError:
+            return False
+        try:
+            device.grab()
+        except OSError as ex:
+            # Reattaching retries every second
+            if route.grab_failed != route.device_path:
+                self.logger.warning(f"Instance {route.instance_num}: Cannot grab '{route.device_path}': {ex}")
+                route.grab_failed = route.device_path
+            device.close()
+            return False
+        route.grab_failed = None
+        try:
+            # Timestamp events on the monotonic clock to measure latency
+            fcntl.ioctl(device.fd, _EVIOCSCLOCKID, struct.pack("i", time.CLOCK_MONOTONIC))
+            route.monotonic = True
+        except OSError:
+            # Realtime timestamps cannot be compared with time.monotonic_ns()
+            route.monotonic = False
+        os.set_blocking(device.fd, False)
+
+        abs_map = {}
+        for code, info in device.capabilities(absinfo=True).get(e.EV_ABS, []):
+            target = _PROXY_ABS.get(code)
+            if target and (info.min, info.max) != (target.min, target.max) and info.max > info.min:
+                abs_map[code] = (info.min, info.max - info.min, target.min, target.max - target.min)
+        route.device = device
+        route.abs_map = abs_map
+        route.pending = []
+        route.dropping = False
+        self._by_fd[device.fd] = route
+        self._epoll.register(device.fd, select.EPOLLIN)
+        self.logger.info(f"Instance {route.instance_num}: Routing '{device.name}' ({route.device_path}).")
+        return True
+
+    def _detach(self, route: _Route) -> None:
+        """Closes the route's device and releases held inputs; the caller holds the lock."""
+        device = route.device
+        if device is None:
+            return
+        route.device = None
+        self._by_fd.pop(device.fd, None)
+        try:
+            self._epoll.unregister(device.fd)
+        except (OSError, ValueError):
+            pass
+        try:
+            device.ungrab()
+        except OSError:
+            pass
+        device.close()
+        # Without this, buttons held at the moment of the swap stay pressed
+        neutral = [(e.EV_KEY, code, 0) for code in route.pressed]
+        if route.kind == GAMEPAD:
+            neutral += [(e.EV_ABS, code, 0) for code in _PROXY_ABS]
+        route.pressed.clear()
+        route.motion = [0, 0]
+        route.motion_deadline = None
+        self._write(route, neutral)
+
+    # --- Forwarding loop -------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="input-router", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        next_reattach = 0.0
+        timeout = _REATTACH_INTERVAL
+        while not self._stop.is_set():
+            try:
+                ready = self._epoll.poll(timeout)
+            except InterruptedError:
+                continue
+            with self._lock:
+                if not self._routes:
+                    return
+                for fd, _mask in ready:
+                    route = self._by_fd.get(fd)
+                    if route:
+                        self._forward(route)
+                timeout = self._flush_due_motion()
+                now = time.monotonic()
+                if now >= next_reattach:
+                    next_reattach = now + _REATTACH_INTERVAL
+                    for route in self._routes.values():
+                        if route.device_path and route.device is None:
+                            self._try_attach(route)
+
+    def _flush_due_motion(self) -> float:
+        """Writes coalesced motion whose window closed; returns the next poll timeout."""
+        now_ns = time.monotonic_ns()
+        timeout = _REATTACH_INTERVAL
+        for route in self._routes.values():
+            if route.motion_deadline is None:
+                continue
+            if now_ns >= route.motion_deadline:
+                self._write(route, self._take_motion(route))
+            else:
+                timeout = min(timeout, (route.motion_deadline - now_ns) / 1_000_000_000)
+        return timeout
+
+    def _take_motion(self, route: _Route) -> List[tuple]:
+        """Returns the route's accumulated motion as events and resets it."""
+        dx, dy = route.motion
+        route.motion = [0, 0]
+        route.motion_deadline = None
+        events = []
+        if dx:
+            events.append((e.EV_REL, e.REL_X, dx))
+        if dy:
+            events.append((e.EV_REL, e.REL_Y, dy))
+        if events:
+            self._motion_reports_out += 1
+        return events
+
+    def _forward(self, route: _Route) -> None:
+        try:
+            data = os.read(route.device.fd, _READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            self.logger.info(
+                f"Instance {route.instance_num}: {route.kind.capitalize()} '{route.device_path}' disconnected."
+            )
+            self._detach(route)
+            return
+
+        pending = route.pending
+        for sec, usec, ev_type, code, value in INPUT_EVENT.iter_unpack(data):
+            if ev_type == e.EV_SYN:
+                if code == e.SYN_DROPPED:
+                    # The kernel buffer overflowed; discard up to the next report
+                    pending.clear()
+                    route.dropping = True
+                elif code == e.SYN_REPORT:
+                    if not route.dropping and pending:
+                        self._write_packet(route, pending, sec * 1_000_000_000 + usec * 1000)
+                    pending.clear()
+                    route.dropping = False
+                continue
+            if route.dropping:
+                continue
+            if ev_type == e.EV_REL:
+                if code not in _MOUSE_REL_SET or route.kind != MOUSE:
+                    continue
+            elif ev_type == e.EV_ABS:
+                if route.kind != GAMEPAD:
+                    continue
+                scale = route.abs_map.get(code)
+                if scale:
+                    src_min, src_span, dst_min, dst_span = scale
+                    value = dst_min + (value - src_min) * dst_span // src_span
+                elif code not in _PROXY_ABS:
+                    continue
+            elif ev_type == e.EV_KEY:
+                if code not in route.keys:
+                    continue
+                if value:
+                    route.pressed.add(code)
+                else:
+                    route.pressed.discard(code)
+            else:
+                continue
+            pending.append((ev_type, code, value))
+
+    def _write_packet(self, route: _Route, events: List[tuple], event_time_ns: int) -> None:
+        """Forwards one input packet, coalescing pure mouse motion."""
+        if route.kind == MOUSE and route.coalesce_ns:
+            if all(ev_type == e.EV_REL and code in (e.REL_X, e.REL_Y) for ev_type, code, _ in events):
+                self._motion_reports_in += 1
+                for _ev_type, code, value in events:
+                    route.motion[code == e.REL_Y] += value
+                if route.motion_deadline is None:
+                    route.motion_deadline = time.monotonic_ns() + route.coalesce_ns
+                return
+            if route.motion_deadline is not None:
+                events = self._take_motion(route) + events
+        self._write(route, events)
+        if route.monotonic:
+            self._latencies_ns.append(time.monotonic_ns() - event_time_ns)
+
+    @staticmethod
+    def _write(route: _Route, events: List[tuple]) -> None:
+        """Writes a packet and its SYN_REPORT to the proxy in one system call."""
+        packet = b"".join(INPUT_EVENT.pack(0, 0, ev_type, code, value) for ev_type, code, value in events)
+        packet += INPUT_EVENT.pack(0, 0, e.EV_SYN, e.SYN_REPORT, 0)
+        try:
+            os.write(route.proxy.fd, packet)
+        except OSError:
+            pass
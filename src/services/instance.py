@@ -4,32 +4,276 @@ import copy
 import shutil
 import signal
 import subprocess
+import threading
 import time
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 # import psutil
 
 from ..core.config import Config
-from ..core.exceptions import DependencyError, VirtualDeviceError
+from ..core.exceptions import DependencyError, InstanceStateError, VirtualDeviceError
 from ..core.logger import Logger
+from ..models.launch_plan import InstancePlan, LaunchPlan, extract_mounts
+from ..models.layout import assign_outputs, scale_dimensions
 from ..models.profile import Profile, PlayerInstanceConfig
-from .virtual_device_service import VirtualDeviceService
+from .audio_service import AudioService, instance_sink_name
+from .device_identity import is_identity
+from .device_manager import DeviceManager
+from .disk_budget import DiskBudgetService
+from .frame_rate_governor import (DEFAULT_IDLE_FPS, DEFAULT_IDLE_SECONDS,
+                                  UNLIMITED_FPS, FrameRateGovernor)
+from .instance_state import AdoptedProcess, InstanceStateStore, signal_process_tree
+from .instance_suspend import InstanceSuspender
+from .launch_plan import LaunchPlanCache, compute_plan_key
+from .memory_merge import MemoryMergeService
+from .pipeline_cache import PipelineCacheService
+from .prefetch import PrefetchService
+from .prefix_clone import PrefixCloneService
+from .shared_cache import CACHE_DIRS, SharedCacheService
+from .steam_client import ClientFootprintMonitor, build_steam_command, client_environment
+from .warm_standby import WarmStandbyPool
+
+
+# Launcher environment variables that launch plans depend on.
+_PLAN_ENV_VARS = ("PATH", "HOME", "DISPLAY", "WAYLAND_DISPLAY", "XDG_RUNTIME_DIR", "PULSE_SERVER")
 
 
 class InstanceService:
     """Service responsible for managing Steam instances."""
 
-    def __init__(self, logger: Logger):
-        """Initializes the instance service."""
+    def __init__(self, logger: Logger, adopt: bool = True):
+        """
+        Initializes the instance service.
+
+        Args:
+            logger (Logger): Logger for instance events.
+            adopt (bool): Re-adopt instances left running by a previous
+                MultiScope process; off for services that only build plans.
+        """
         self.logger = logger
-        self.virtual_device_service = VirtualDeviceService(logger)
+        self._virtual_device_service = None
+        self._input_router = None
         self._virtual_joystick_path: Optional[str] = None
         self._virtual_joystick_checked: bool = False
+        # Launch preparation runs outside the registry's lock
+        self._virtual_joystick_lock = threading.Lock()
         self.pids: dict[int, int] = {}
         self.processes: dict[int, subprocess.Popen] = {}
+        # Profiles instances were launched with (not known for re-adopted ones)
+        self.launch_profiles: dict[int, Profile] = {}
         # self.cpu_count = psutil.cpu_count(logical=True)
         self.termination_in_progress = False
+        self.state_store = InstanceStateStore(logger)
+        self._frame_rate_governor: Optional[FrameRateGovernor] = None
+        self.device_manager = DeviceManager()
+        self.shared_cache_service = SharedCacheService(logger)
+        self.pipeline_cache_service = PipelineCacheService(logger)
+        self.prefix_clone_service = PrefixCloneService(logger)
+        self.plan_cache = LaunchPlanCache(logger)
+        self.warm_standby = WarmStandbyPool(logger, on_discard=self._discard_standby)
+        self.suspender = InstanceSuspender(logger)
+        self.prefetch = PrefetchService(logger)
+        self.memory_merge = MemoryMergeService(logger)
+        self.disk_budget = DiskBudgetService(logger)
+        self.client_footprint = ClientFootprintMonitor(logger)
+        self.audio = AudioService(logger)
+        if adopt:
+            self._adopt_running_instances()
+
+    def _adopt_running_instances(self) -> None:
+        """
+        Re-adopts instances left running by a previous MultiScope process.
+
+        Instances run in their own process group and survive the GUI, so
+        they are picked up again from their state records for monitoring
+        and termination instead of being launched a second time. Warm
+        standbys cannot be committed without the plan they were started
+        from: those of a live MultiScope process are left to it, those
+        whose owner is gone are killed.
+        """
+        orphaned_standbys = False
+        # Instances whose audio sinks stay, including other processes' standbys
+        keep_sinks = set()
+        for instance_num, record in self.state_store.rediscover().items():
+            process = AdoptedProcess(record["pid"], record["start_time"])
+            if record.get("standby"):
+                if self.state_store.is_owner_live(record):
+                    keep_sinks.add(instance_num)
+                else:
+                    self._kill_orphaned_standby(instance_num, process)
+                    orphaned_standbys = True
+                continue
+            self.pids[instance_num] = process.pid
+            self.processes[instance_num] = process
+            self.logger.info(
+                f"Re-adopted instance {instance_num} (PID {process.pid}, log: {record.get('log_path')})"
+            )
+        if (self.processes or orphaned_standbys) and self.audio.is_available():
+            self.audio.adopt_instance_sinks(keep_sinks | set(self.processes))
+
+    def _kill_orphaned_standby(self, instance_num: int, process: AdoptedProcess) -> None:
+        """Kills a warm standby left by a previous MultiScope process."""
+        self.logger.info(f"Instance {instance_num}: Killing the warm standby (PID {process.pid}) of a previous session.")
+        # SIGKILL also ends the stopped processes of a held standby
+        signal_process_tree(process.pid, signal.SIGKILL)
+        try:
+            process.wait(timeout=5)
+        except TimeoutError:
+            self.logger.warning(f"Instance {instance_num}: Standby PID {process.pid} did not exit.")
+        self.state_store.remove(instance_num)
+
+    def is_instance_running(self, instance_num: int) -> bool:
+        """Returns True if the instance's process is still alive."""
+        process = self.processes.get(instance_num)
+        return process is not None and process.poll() is None
+
+    def _release_instance_resources(self, instance_num: int) -> None:
+        """Releases the cache locks, input proxies, home claim and audio sink acquired for an instance's plan."""
+        self.shared_cache_service.release(instance_num)
+        self.disk_budget.release(instance_num)
+        self.audio.remove_instance_sink(instance_num)
+        if self._input_router:
+            self._input_router.release(instance_num)
+
+    def _discard_standby(self, instance_num: int) -> None:
+        """Releases what a killed warm standby held, including its state record."""
+        self._release_instance_resources(instance_num)
+        self.state_store.remove(instance_num)
+
+    def forget_instance(self, instance_num: int) -> None:
+        """Drops the bookkeeping of an instance whose process has exited."""
+        if self._frame_rate_governor:
+            self._frame_rate_governor.untrack(instance_num)
+        self._release_instance_resources(instance_num)
+        self.suspender.forget(instance_num)
+        self.processes.pop(instance_num, None)
+        self.pids.pop(instance_num, None)
+        self.launch_profiles.pop(instance_num, None)
+        self.state_store.remove(instance_num)
+
+    @property
+    def virtual_device_service(self):
+        """The virtual device service, created (and evdev imported) on first use."""
+        if self._virtual_device_service is None:
+            from .virtual_device_service import VirtualDeviceService
+            self._virtual_device_service = VirtualDeviceService(self.logger)
+        return self._virtual_device_service
+
+    @property
+    def input_router(self):
+        """The input router, created (and evdev imported) on first use."""
+        if self._input_router is None:
+            from .input_router import InputRouter
+            self._input_router = InputRouter(self.logger, resolve=self.device_manager.identity_index.resolve)
+        return self._input_router
+
+    def reassign_input(self, instance_num: int, device_path: Optional[str], kind: str = "gamepad") -> None:
+        """Moves a physical device to a running instance's proxy device of that kind."""
+        if not self.is_instance_running(instance_num):
+            raise InstanceStateError(f"Instance {instance_num} is not running")
+        self.input_router.assign(instance_num, device_path, kind)
+
+    def get_running_pid(self, instance_num: int) -> int:
+        """Returns the PID of a running instance, e.g. for `suspender`."""
+        if not self.is_instance_running(instance_num):
+            raise InstanceStateError(f"Instance {instance_num} is not running")
+        return self.pids[instance_num]
+
+    def apply_pressure_response(self, instance_num: int, action: str, value: Optional[int]) -> bool:
+        """
+        Caps the frame rate of, or lowers the CPU weight of, a running
+        instance under host pressure; a None value undoes it.
+
+        Returns False if the response is not available for the instance.
+        """
+        from .pressure_governor import CPU_WEIGHT, FPS_CAP
+
+        if not self.is_instance_running(instance_num):
+            return False
+        if action == CPU_WEIGHT:
+            return self.suspender.set_cpu_weight(instance_num, self.pids[instance_num], value)
+        if action == FPS_CAP:
+            profile = self.launch_profiles.get(instance_num)
+            if profile is None or not profile.use_gamescope:
+                return False
+            policy = profile.get_frame_rate_policy(instance_num)
+            self.frame_rate_governor.set_ceiling(
+                instance_num, value, policy.focused_fps or UNLIMITED_FPS,
+                Config.LOG_DIR / f"steam_instance_{instance_num}.log",
+            )
+            return True
+        return False
+
+    def _route_mouse_and_keyboard(self, profile: Profile, device_info: dict, instance_num: int) -> None:
+        """
+        Delivers an instance's dedicated mouse and keyboard through proxies.
+
+        The physical devices are grabbed by the input router, so the host
+        session and other instances stop seeing them, unlike gamescope's
+        all-or-nothing `--grab`.
+        """
+        mouse_id = device_info.get("mouse_id_for_instance")
+        keyboard_id = device_info.get("keyboard_id_for_instance")
+        if not mouse_id and not keyboard_id:
+            return
+        from .input_router import DEFAULT_COALESCE_WINDOW, KEYBOARD, MOUSE
+
+        if mouse_id:
+            if profile.mouse_coalesce_ms is not None:
+                window = profile.mouse_coalesce_ms / 1000
+            else:
+                focused_fps = profile.get_frame_rate_policy(instance_num).focused_fps
+                window = 1 / focused_fps if focused_fps else DEFAULT_COALESCE_WINDOW
+            device_info["mouse_path_str_for_instance"] = self.input_router.attach_instance(
+                instance_num, mouse_id, MOUSE, coalesce_window=window
+            )
+            self.logger.info(f"Instance {instance_num}: Coalescing mouse motion over {window * 1000:.1f} ms.")
+        if keyboard_id:
+            device_info["keyboard_path_str_for_instance"] = self.input_router.attach_instance(
+                instance_num, keyboard_id, KEYBOARD
+            )
+
+    @property
+    def frame_rate_governor(self) -> FrameRateGovernor:
+        if self._frame_rate_governor is None:
+            self._frame_rate_governor = FrameRateGovernor(self.logger)
+        return self._frame_rate_governor
+
+    def _resolve_output_placement(self, profile: Profile, instance_num: int) -> Optional[dict]:
+        """
+        Returns where an instance is pinned when it has an assigned output.
+
+        The result holds the output's topology entry, the instance's tile on
+        it, and whether the instance has the output to itself. None means the
+        instance uses the base-resolution layout.
+        """
+        assignments = profile.get_output_assignments()
+        if not any(monitor_id for _, monitor_id in assignments):
+            return None
+        topology = self.device_manager.get_display_topology()
+        orientation = profile.splitscreen.orientation if profile.splitscreen else "horizontal"
+        placement = assign_outputs(assignments, topology, orientation)
+        if instance_num not in placement:
+            monitor_id = dict(assignments).get(instance_num)
+            if monitor_id:
+                self.logger.warning(
+                    f"Instance {instance_num}: Output '{monitor_id}' is not connected or disabled. Using the tiling layout."
+                )
+            return None
+        output_id, tile = placement[instance_num]
+        output = topology[output_id]
+        exclusive = (tile.width, tile.height) == (output["width"], output["height"])
+        return {"output": output, "tile": tile, "exclusive": exclusive}
+
+    def _get_sdl_display_index(self, output_id: str) -> Optional[int]:
+        """Returns the SDL display index of an output (SDL lists the primary first)."""
+        outputs = [o for o in self.device_manager.get_display_topology().values() if o["width"]]
+        outputs.sort(key=lambda o: not o["primary"])
+        for index, output in enumerate(outputs):
+            if output["id"] == output_id:
+                return index
+        return None
 
     def validate_dependencies(self, use_gamescope: bool = True) -> None:
         """Validates if all necessary commands are available on the system."""
@@ -42,47 +286,304 @@ class InstanceService:
                 raise DependencyError(f"Required command '{cmd}' not found")
         self.logger.info("Dependencies validated successfully")
 
-    def _launch_single_instance(self, profile: Profile, instance_num: int) -> None:
-        """Launches a single steam instance."""
+    def _host_state(self) -> dict:
+        """Returns the host state that launch plans depend on besides the profile."""
+        self.device_manager.identity_index.refresh()
+        compat_dir = Path.home() / ".local/share/Steam/compatibilitytools.d"
+        return {
+            "input": sorted(
+                (node, identity.to_id()) for node, (identity, _kinds) in self.device_manager.identity_index.devices().items()
+            ),
+            "displays": self.device_manager.get_display_topology(),
+            "commands": {name: shutil.which(name) for name in ("script", "gamescope", "bwrap", "steam")},
+            "env": {name: os.environ.get(name) for name in _PLAN_ENV_VARS},
+            "compat_tools": sorted(p.name for p in compat_dir.iterdir()) if compat_dir.is_dir() else [],
+            "virtual_joystick": self._virtual_joystick_path,
+        }
+
+    def compile_instance_plan(self, profile: Profile, instance_num: int, dry_run: bool = False) -> InstancePlan:
+        """
+        Resolves everything needed to start an instance into a plan.
+
+        Outside of a dry run this also prepares what the instance needs on
+        disk and acquires its runtime resources (input proxies, cache locks).
+        """
         self.logger.info(f"Preparing instance {instance_num}...")
 
         home_path = Config.get_steam_home_path(instance_num)
-        home_path.mkdir(parents=True, exist_ok=True)
         self.logger.info(f"Instance {instance_num}: Using isolated home path '{home_path}'")
 
-        # Prepare minimal home structure - Steam will auto-install on first run
-        self._prepare_steam_home(home_path)
+        if not dry_run:
+            self._prepare_instance_home(profile, instance_num, home_path)
 
         instance_idx = instance_num - 1
         device_info = self._validate_input_devices(profile, instance_idx, instance_num)
+        routed = profile.input_router or bool(
+            device_info.get("mouse_id_for_instance") or device_info.get("keyboard_id_for_instance")
+        )
+        if not dry_run:
+            if profile.input_router:
+                # The sandbox only sees the instance's proxy; the physical pad is
+                # routed to it and may come and go while the instance runs.
+                physical_path = device_info.get("joystick_id_for_instance")
+                device_info["joystick_path_str_for_instance"] = self.input_router.attach_instance(
+                    instance_num, physical_path
+                )
+            self._route_mouse_and_keyboard(profile, device_info, instance_num)
 
         env = self._prepare_environment(profile, device_info, instance_num)
         total_instances = profile.effective_num_players()
-        cmd = self._build_command(profile, device_info, instance_num, home_path, total_instances)
+        cmd = self._build_command(profile, device_info, instance_num, home_path, total_instances, dry_run=dry_run)
+        env_set, env_unset = InstancePlan.diff_environment(os.environ, env)
+        cache_modes = (profile.cache_sharing.shadercache, profile.cache_sharing.depotcache, profile.cache_sharing.appcache)
+        return InstancePlan(
+            instance_num=instance_num,
+            argv=cmd,
+            env_set=env_set,
+            env_unset=env_unset,
+            mounts=extract_mounts(cmd),
+            device_info=device_info,
+            home_path=str(home_path),
+            log_path=str(Config.LOG_DIR / f"steam_instance_{instance_num}.log"),
+            replayable=not routed and "rw" not in cache_modes,
+        )
 
-        log_file = Config.LOG_DIR / f"steam_instance_{instance_num}.log"
-        self.logger.info(f"Launching instance {instance_num} (Log: {log_file})")
+    def _prepare_instance_home(self, profile: Profile, instance_num: int, home_path: Path) -> None:
+        """Prepares an instance's home on disk; cheap and idempotent, so replays run it too."""
+        home_path.mkdir(parents=True, exist_ok=True)
+        # Prepare minimal home structure - Steam will auto-install on first run
+        self._prepare_steam_home(home_path)
+        # Clone existing Proton prefixes so the game does not build its own
+        self.prefix_clone_service.provision(
+            profile.prefix_clone, profile.get_prefix_clone_app_ids(), instance_num,
+            home_path / ".local/share/Steam",
+        )
+
+    def build_launch_plan(self, profile: Profile, instance_nums: List[int], dry_run: bool = True) -> LaunchPlan:
+        """Builds the plan of several instances, by default without side effects (for export)."""
+        plan = LaunchPlan(key=compute_plan_key(profile, self._host_state()), dry_run=dry_run)
+        for instance_num in instance_nums:
+            plan.instances[instance_num] = self.compile_instance_plan(profile, instance_num, dry_run=dry_run)
+        return plan
+
+    def _get_instance_plan(self, profile: Profile, instance_num: int) -> InstancePlan:
+        """Returns a cached plan that still applies, or compiles (and caches) a new one."""
+        key = compute_plan_key(profile, self._host_state())
+        cached = self.plan_cache.load(key)
+        instance_plan = cached.get_instance(instance_num) if cached else None
+        if instance_plan and instance_plan.replayable:
+            reason = self.plan_cache.revalidate(instance_plan)
+            if reason is None:
+                self.logger.info(f"Instance {instance_num}: Replaying launch plan {key[:12]}.")
+                # The plan only records paths; what they point at may have been
+                # removed (gc) or gone stale (newly installed games' manifests).
+                self._prepare_instance_home(profile, instance_num, Path(instance_plan.home_path))
+                self.pipeline_cache_service.get_environment(
+                    profile.pipeline_cache, profile.game_id or profile.profile_name
+                )
+                return instance_plan
+            self.logger.info(f"Instance {instance_num}: Cached launch plan is stale ({reason}); rebuilding.")
 
+        instance_plan = self.compile_instance_plan(profile, instance_num)
+        if instance_plan.argv and instance_plan.replayable:
+            plan = cached or LaunchPlan(key=key)
+            plan.instances[instance_num] = instance_plan
+            try:
+                self.plan_cache.save(plan)
+            except OSError as e:
+                self.logger.warning(f"Could not cache the launch plan: {e}")
+        return instance_plan
+
+    def _launch_single_instance(self, profile: Profile, instance_num: int) -> None:
+        """Launches a single steam instance, resuming its warm standby if one matches."""
+        if self._release_standby(profile, instance_num):
+            return
+        plan = self._get_instance_plan(profile, instance_num)
+        if not plan.argv:
+            self.logger.error(f"Instance {instance_num}: Nothing to launch.")
+            self._release_instance_resources(instance_num)
+            return
+
+        self.logger.info(f"Launching instance {instance_num} (Log: {plan.log_path})")
         try:
-            # Use 'script' command to capture all terminal output from nested processes
-            # (gamescope -> bwrap -> steam). This is more reliable than stdout redirection
-            # because it captures output from a pseudo-terminal.
-            cmd_str = shlex.join(cmd)
-            script_cmd = ["script", "-q", "-e", "-c", cmd_str, str(log_file)]
-
-            process = subprocess.Popen(
-                script_cmd,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                env=env,
-                cwd=Path.home(),  # Launch from the user's real home directory
-                preexec_fn=os.setpgrp,
-            )
-            self.pids[instance_num] = process.pid
-            self.processes[instance_num] = process
-            self.logger.info(f"Instance {instance_num} started with PID: {process.pid}")
+            plan = self._prepare_audio_sink(profile, plan)
+            process = self._spawn(plan, merge_memory=self.memory_merge.prepare(profile.memory_merge))
+            self._register_process(profile, plan, process)
         except Exception as e:
             self.logger.error(f"Failed to launch instance {instance_num}: {e}")
+            self._release_instance_resources(instance_num)
+            return
+        self.prefetch.record_instance(profile, instance_num, process.pid)
+
+    def _prepare_audio_sink(self, profile: Profile, plan: InstancePlan) -> InstancePlan:
+        """
+        Creates the instance's dedicated audio sink if its policy asks for
+        one; if that fails, the plan is changed to play on the chosen output.
+        """
+        policy = profile.get_audio_policy(plan.instance_num)
+        if not policy.dedicated_sink:
+            return plan
+        output = plan.device_info.get("audio_device_id_for_instance")
+        if self.audio.is_available() and self.audio.ensure_instance_sink(
+            plan.instance_num, policy.sink == "loopback", output, policy.latency_msec
+        ):
+            return plan
+        self.logger.warning(f"Instance {plan.instance_num}: No dedicated audio sink; using '{output or 'the default sink'}'.")
+        env_set = dict(plan.env_set)
+        if output:
+            env_set["PULSE_SINK"] = output
+        else:
+            env_set.pop("PULSE_SINK", None)
+        return plan.model_copy(update={"env_set": env_set})
+
+    @staticmethod
+    def _script_command(plan: InstancePlan) -> List[str]:
+        # Use 'script' command to capture all terminal output from nested processes
+        # (gamescope -> bwrap -> steam). This is more reliable than stdout redirection
+        # because it captures output from a pseudo-terminal.
+        return ["script", "-q", "-e", "-c", shlex.join(plan.argv), plan.log_path]
+
+    def _spawn(self, plan: InstancePlan, merge_memory: bool = False) -> subprocess.Popen:
+        """Starts the process of a plan in its own process group, opted into KSM if asked."""
+        def preexec() -> None:
+            os.setpgrp()
+            if merge_memory:
+                self.memory_merge.opt_in()
+
+        process = subprocess.Popen(
+            self._script_command(plan),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=plan.build_environment(os.environ),
+            cwd=Path.home(),  # Launch from the user's real home directory
+            preexec_fn=preexec,
+        )
+        if merge_memory:
+            # Popen returns once the exec succeeded
+            self.memory_merge.check_launched(process.pid)
+        return process
+
+    def _register_process(self, profile: Profile, plan: InstancePlan, process: subprocess.Popen) -> None:
+        """Tracks a started instance process as running."""
+        instance_num = plan.instance_num
+        log_file = Path(plan.log_path)
+        self.pids[instance_num] = process.pid
+        self.processes[instance_num] = process
+        self.launch_profiles[instance_num] = profile
+        self.state_store.save(instance_num, process.pid, self._script_command(plan), log_file)
+        self.logger.info(f"Instance {instance_num} started with PID: {process.pid}")
+        self._start_frame_rate_governor(profile, plan.device_info, instance_num, log_file)
+        self.client_footprint.measure(instance_num, process.pid, profile.get_client_mode(instance_num))
+
+    # --- Warm standby ----------------------------------------------------
+
+    def prepare_standby(self, profile: Profile) -> List[int]:
+        """
+        Does the part of starting warm standbys that waits: the dependency
+        checks, the virtual joystick and the prefetch. Like `prepare_launch`
+        it changes no per-instance bookkeeping.
+
+        Standbys of another profile state are discarded first. Returns the
+        instances that still need a standby; none when warm standby is
+        disabled.
+        """
+        config = profile.warm_standby
+        if not config.enabled:
+            self.warm_standby.invalidate()
+            return []
+        self.warm_standby.config = config
+        self.warm_standby.invalidate(compute_plan_key(profile, None))
+
+        self.validate_dependencies(use_gamescope=profile.use_gamescope)
+        self._ensure_virtual_joystick(profile)
+        Config.LOG_DIR.mkdir(parents=True, exist_ok=True)
+        self.prefetch.start(profile)
+        return [
+            instance_num for instance_num in profile.get_launched_instances()
+            if not self.is_instance_running(instance_num) and not self.warm_standby.has(instance_num)
+        ]
+
+    def standby_has_room(self, profile: Profile, instance_num: int) -> bool:
+        """Returns True if one more standby fits the memory budget."""
+        if self.warm_standby.has_room():
+            return True
+        self.logger.info(
+            f"Warm standby: memory budget of {profile.warm_standby.memory_budget_mb} MB reached; "
+            f"instance {instance_num} and later start on Play."
+        )
+        return False
+
+    def start_standby(self, profile: Profile, instance_num: int) -> Optional[Tuple[InstancePlan, subprocess.Popen]]:
+        """Compiles and spawns an instance's standby; returns its plan and process, or None if it failed."""
+        self.disk_budget.claim(instance_num)
+        plan = self._get_instance_plan(profile, instance_num)
+        if not plan.argv:
+            self._release_instance_resources(instance_num)
+            return None
+        try:
+            plan = self._prepare_audio_sink(profile, plan)
+            process = self._spawn(plan, merge_memory=self.memory_merge.prepare(profile.memory_merge))
+        except Exception as e:
+            self.logger.error(f"Instance {instance_num}: Failed to start warm standby: {e}")
+            self._release_instance_resources(instance_num)
+            return None
+        return plan, process
+
+    def hold_standby(self, profile: Profile, plan: InstancePlan, process: subprocess.Popen) -> None:
+        """Puts a standby spawned by `start_standby` in the pool until Play."""
+        # Recorded so a standby outliving this process is found again, and
+        # so disk collection leaves its home alone
+        self.state_store.save(
+            plan.instance_num, process.pid, self._script_command(plan), Path(plan.log_path), standby=True
+        )
+        self.warm_standby.add(plan.instance_num, compute_plan_key(profile, None), plan, process)
+
+    def _release_standby(self, profile: Profile, instance_num: int) -> bool:
+        """Turns a matching standby into the running instance; returns False if there is none."""
+        if not self.warm_standby.has(instance_num):
+            return False
+        standby = self.warm_standby.take(
+            instance_num, compute_plan_key(profile, None), validate=self.plan_cache.revalidate
+        )
+        if standby is None:
+            return False
+        self._register_process(profile, standby.plan, standby.process)
+        return True
+
+    def release_standbys(self, profile: Profile, instance_nums: List[int]) -> List[int]:
+        """Releases the standbys of several instances at once; returns the ones released."""
+        return [n for n in instance_nums if not self.is_instance_running(n) and self._release_standby(profile, n)]
+
+    def memory_merge_report(self) -> dict:
+        """Returns the KSM counters of the session's instances and the memory they share."""
+        return self.memory_merge.report(dict(self.pids))
+
+    def client_footprint_report(self) -> dict:
+        """Returns the measured footprint of the Steam client per client mode."""
+        return self.client_footprint.report()
+
+    def _start_frame_rate_governor(self, profile: Profile, device_info: dict, instance_num: int, log_file: Path) -> None:
+        """Starts idle-based FPS throttling for an instance if its policy asks for it."""
+        policy = profile.get_frame_rate_policy(instance_num)
+        if not profile.use_gamescope or not policy.dynamic:
+            return
+        # Only devices a player actually touches count as activity; the
+        # shared virtual joystick never produces input.
+        device_paths = [
+            path for path in (
+                device_info.get("joystick_path_str_for_instance"),
+                device_info.get("mouse_path_str_for_instance"),
+                device_info.get("keyboard_path_str_for_instance"),
+            ) if path
+        ]
+        self.frame_rate_governor.track(
+            instance_num,
+            device_paths,
+            focused_fps=policy.focused_fps or UNLIMITED_FPS,
+            idle_fps=policy.idle_fps or DEFAULT_IDLE_FPS,
+            idle_seconds=policy.idle_seconds or DEFAULT_IDLE_SECONDS,
+            log_path=log_file,
+        )
 
     def launch_instance(
         self,
@@ -91,6 +592,70 @@ class InstanceService:
         use_gamescope_override: Optional[bool] = None,
     ) -> None:
         """Launches a single Steam instance."""
+        active_profile = self.prepare_launch(profile, instance_num, use_gamescope_override)
+        if active_profile is not None:
+            self.start_prepared_instance(active_profile, instance_num)
+
+    def prepare_launch(
+        self,
+        profile: Profile,
+        instance_num: int,
+        use_gamescope_override: Optional[bool] = None,
+    ) -> Optional[Profile]:
+        """
+        Does the part of a launch that waits: the virtual joystick, the
+        dependency checks and the prefetch head start. It changes no
+        per-instance bookkeeping, so callers need not serialize it.
+
+        Returns the profile to start the instance with, or None if the
+        instance is already running.
+        """
+        if self.is_instance_running(instance_num):
+            self.logger.warning(
+                f"Instance {instance_num} is already running (PID {self.pids[instance_num]}); not launching a duplicate."
+            )
+            return None
+
+        self._ensure_virtual_joystick(profile)
+        self.disk_budget.schedule(profile.disk_budget, profile.num_players)
+
+        active_profile = profile
+        if use_gamescope_override is not None:
+            active_profile = copy.deepcopy(profile)
+            active_profile.use_gamescope = use_gamescope_override
+
+        self.validate_dependencies(use_gamescope=active_profile.use_gamescope)
+        Config.LOG_DIR.mkdir(parents=True, exist_ok=True)
+        self._start_prefetch(active_profile)
+        return active_profile
+
+    def start_prepared_instance(self, profile: Profile, instance_num: int) -> None:
+        """Starts an instance prepared by `prepare_launch`."""
+        if self.is_instance_running(instance_num):
+            return
+        # Keeps the disk collector out of the home from here on
+        self.disk_budget.claim(instance_num)
+        self._launch_single_instance(profile, instance_num)
+
+    def _start_prefetch(self, profile: Profile) -> None:
+        """Starts the game's prefetch and gives it its configured head start over the first launch."""
+        job = self.prefetch.start(profile)
+        if job is None:
+            return
+        remaining = profile.prefetch.lead_seconds - (time.monotonic() - job.started_at)
+        if remaining > 0:
+            self.logger.info(f"Prefetch: Waiting up to {remaining:.1f}s before launching.")
+            self.prefetch.wait(job, remaining)
+
+    def _ensure_virtual_joystick(self, profile: Profile) -> None:
+        """Creates the shared virtual joystick if an instance has no physical one."""
+        # Routed instances each get their own proxy pad instead
+        if profile.input_router:
+            return
+        with self._virtual_joystick_lock:
+            self._ensure_virtual_joystick_locked(profile)
+
+    def _ensure_virtual_joystick_locked(self, profile: Profile) -> None:
         if not self._virtual_joystick_checked:
             self._virtual_joystick_checked = True
             needs_virtual_joystick = False
@@ -116,15 +681,6 @@ class InstanceService:
                     # Re-raise the exception to be caught by the UI layer
                     raise
 
-        active_profile = profile
-        if use_gamescope_override is not None:
-            active_profile = copy.deepcopy(profile)
-            active_profile.use_gamescope = use_gamescope_override
-
-        self.validate_dependencies(use_gamescope=active_profile.use_gamescope)
-        Config.LOG_DIR.mkdir(parents=True, exist_ok=True)
-        self._launch_single_instance(active_profile, instance_num)
-
     def terminate_instance(self, instance_num: int) -> None:
         """Terminates a single Steam instance."""
         if instance_num not in self.processes:
@@ -149,8 +705,7 @@ class InstanceService:
                     f"Failed to kill process group for PID {process.pid} for instance {instance_num}: {e}"
                 )
         process.wait()
-        del self.processes[instance_num]
-        del self.pids[instance_num]
+        self.forget_instance(instance_num)
 
     def _prepare_steam_home(self, home_path: Path) -> None:
         """
@@ -165,6 +720,9 @@ class InstanceService:
 
         # Create essential Steam directories within the instance's isolated path
         (instance_steam_local / "steamapps").mkdir(parents=True, exist_ok=True)
+        # Mount points for caches that may be shared from outside the instance
+        for cache_dir in CACHE_DIRS.values():
+            (instance_steam_local / cache_dir).mkdir(parents=True, exist_ok=True)
         instance_steam_dot_steam.mkdir(parents=True, exist_ok=True)
 
         # Copy .acf (app manifest) files from the host to the instance.
@@ -192,17 +750,34 @@ class InstanceService:
         # Enable this if you experience system crashes and graphical glitches.
         env["ENABLE_GAMESCOPE_WSI"] = "0"
         env["LD_PRELOAD"] = ""
+        # Open the nested Gamescope window on the instance's assigned output
+        placement = self._resolve_output_placement(profile, instance_num) if profile.use_gamescope else None
+        if placement:
+            display_index = self._get_sdl_display_index(placement["output"]["id"])
+            if display_index is not None:
+                env["SDL_VIDEO_FULLSCREEN_DISPLAY"] = str(display_index)
         # Handle audio device assignment
-        if device_info.get("audio_device_id_for_instance"):
+        audio = profile.get_audio_policy(instance_num)
+        if audio.dedicated_sink:
+            # Created right before the instance starts; see _prepare_audio_sink
+            env["PULSE_SINK"] = instance_sink_name(instance_num)
+            self.logger.info(f"Instance {instance_num}: Setting PULSE_SINK to its own sink '{env['PULSE_SINK']}'.")
+        elif device_info.get("audio_device_id_for_instance"):
             env["PULSE_SINK"] = device_info["audio_device_id_for_instance"]
             self.logger.info(f"Instance {instance_num}: Setting PULSE_SINK to '{device_info['audio_device_id_for_instance']}'.")
+        if audio.latency_msec:
+            env["PULSE_LATENCY_MSEC"] = str(audio.latency_msec)
+        if audio.quantum:
+            env["PIPEWIRE_LATENCY"] = f"{audio.quantum}/{audio.rate or 48000}"
+        env.update(client_environment(profile.get_client_mode(instance_num)))
 
         # Custom ENV variables are set via bwrap --setenv to target Steam directly.
 
         self.logger.info(f"Instance {instance_num}: Final environment prepared.")
         return env
 
-    def _build_command(self, profile: Profile, device_info: dict, instance_num: int, home_path: Path, total_instances: int = 2) -> List[str]:
+    def _build_command(self, profile: Profile, device_info: dict, instance_num: int, home_path: Path, total_instances: int = 2,
+                       dry_run: bool = False) -> List[str]:
         """
         Builds the final command array in the correct order:
         [taskset] -> [gamescope] -> [bwrap] -> [steam]  (when gamescope is enabled)
@@ -211,10 +786,10 @@ class InstanceService:
         instance_idx = instance_num - 1
 
         # 1. Build the innermost steam command
-        steam_cmd = self._build_base_steam_command(instance_num, profile.use_gamescope)
+        steam_cmd = self._build_base_steam_command(instance_num, profile.use_gamescope, profile.get_client_mode(instance_num))
 
         # 2. Build the bwrap command, which will wrap the steam command
-        bwrap_cmd = self._build_bwrap_command(profile, instance_idx, device_info, instance_num, home_path)
+        bwrap_cmd = self._build_bwrap_command(profile, instance_idx, device_info, instance_num, home_path, dry_run)
 
         # 3. Prepend bwrap to the steam command
         final_cmd = bwrap_cmd + steam_cmd
@@ -241,10 +816,24 @@ class InstanceService:
             if profile.player_configs and 0 <= instance_idx < len(profile.player_configs)
             else PlayerInstanceConfig() # Default empty config
         )
+        # Keeps an identity from resolving to another player's identical pad
+        other_ids = [
+            device_id
+            for idx, config in enumerate(profile.player_configs or []) if idx != instance_idx
+            for device_id in (config.PHYSICAL_DEVICE_ID, config.MOUSE_EVENT_PATH, config.KEYBOARD_EVENT_PATH)
+        ]
 
         def _validate_device(path_str: Optional[str], device_type: str) -> Optional[str]:
             if not path_str or not path_str.strip():
                 return None
+            if is_identity(path_str):
+                # Stable identities resolve to the current node in the index
+                node = self.device_manager.identity_index.resolve(path_str, device_type.lower(), other_ids)
+                if node:
+                    self.logger.info(f"Instance {instance_num}: {device_type} device '{path_str}' is {node}.")
+                    return node
+                self.logger.warning(f"Instance {instance_num}: {device_type} device '{path_str}' is not connected.")
+                return None
             path_obj = Path(path_str)
             if path_obj.exists() and path_obj.is_char_device():
                  self.logger.info(f"Instance {instance_num}: {device_type} device '{path_str}' assigned.")
@@ -254,10 +843,8 @@ class InstanceService:
             )
             return None
 
-        # mouse_path = _validate_device(player_config.MOUSE_EVENT_PATH, "Mouse")
-        # keyboard_path = _validate_device(player_config.KEYBOARD_EVENT_PATH, "Keyboard")
-        mouse_path = None
-        keyboard_path = None
+        mouse_path = _validate_device(player_config.MOUSE_EVENT_PATH, "Mouse")
+        keyboard_path = _validate_device(player_config.KEYBOARD_EVENT_PATH, "Keyboard")
         joystick_path = _validate_device(player_config.PHYSICAL_DEVICE_ID, "Joystick")
 
         audio_id = player_config.AUDIO_DEVICE_ID
@@ -268,13 +855,34 @@ class InstanceService:
             "mouse_path_str_for_instance": mouse_path,
             "keyboard_path_str_for_instance": keyboard_path,
             "joystick_path_str_for_instance": joystick_path,
+            "joystick_id_for_instance": player_config.PHYSICAL_DEVICE_ID or None,
+            "mouse_id_for_instance": player_config.MOUSE_EVENT_PATH or None,
+            "keyboard_id_for_instance": player_config.KEYBOARD_EVENT_PATH or None,
             "audio_device_id_for_instance": audio_id if audio_id and audio_id.strip() else None,
             "should_add_grab_flags": player_config.grab_input_devices,
         }
 
     def _build_gamescope_command(self, profile: Profile, should_add_grab_flags: bool, instance_num: int) -> List[str]:
         """Builds the Gamescope command."""
-        width, height = profile.get_instance_dimensions(instance_num)
+        placement = self._resolve_output_placement(profile, instance_num)
+        frame_rate = profile.get_frame_rate_policy(instance_num)
+        focused_fps = frame_rate.focused_fps
+        if placement:
+            output = placement["output"]
+            width, height = placement["tile"].width, placement["tile"].height
+            render_width, render_height = scale_dimensions(width, height, profile.get_render_scale(instance_num))
+            if not focused_fps and output["refresh"]:
+                # Match the output's native refresh rate
+                focused_fps = round(output["refresh"])
+            refresh = f"@{output['refresh']:.2f}Hz" if output["refresh"] else ""
+            self.logger.info(
+                f"Instance {instance_num}: Pinned to output '{output['id']}' at {width}x{height}{refresh}."
+            )
+        else:
+            width, height = profile.get_instance_dimensions(instance_num)
+            # The game renders at the internal size and gamescope upscales it
+            # to the tile, which keeps many instances within GPU budget.
+            render_width, render_height = profile.get_render_dimensions(instance_num)
         if not width or not height:
             self.logger.error(f"Instance {instance_num}: Invalid dimensions. Aborting launch.")
             return []
@@ -284,15 +892,30 @@ class InstanceService:
             "-e", # Enable Steam integration
             "-W", str(width),
             "-H", str(height),
-            "-w", str(width),
-            "-h", str(height),
-            "-o", "999", # Always set an unfocused FPS limit to a very high value
-            "-r", "999", # Always set a focused FPS limit to a very high value
+            "-w", str(render_width),
+            "-h", str(render_height),
+            "-o", str(frame_rate.unfocused_fps or UNLIMITED_FPS), # Unfocused FPS limit
+            "-r", str(focused_fps or UNLIMITED_FPS), # Focused FPS limit
             # "--xwayland-count", "2",
             # "--mangoapp",
         ]
 
-        if not profile.is_splitscreen_mode:
+        if (render_width, render_height) != (width, height):
+            self.logger.info(
+                f"Instance {instance_num}: Rendering at {render_width}x{render_height}, upscaled to {width}x{height}."
+            )
+            if profile.upscale_filter:
+                cmd.extend(["-F", profile.upscale_filter])
+
+        if placement:
+            cmd.extend(["--prefer-output", placement["output"]["id"]])
+            if placement["exclusive"]:
+                cmd.append("-f")
+                if placement["output"]["vrr_capable"]:
+                    cmd.append("--adaptive-sync")
+            else:
+                cmd.append("-b") # Borderless, sharing the output with other instances
+        elif not profile.is_splitscreen_mode:
             cmd.extend(["-f", "--adaptive-sync"])
         else:
             cmd.append("-b") # Borderless
@@ -303,16 +926,19 @@ class InstanceService:
 
         return cmd
 
-    def _build_base_steam_command(self, instance_num: int, use_gamescope: bool = True) -> List[str]:
+    def _build_base_steam_command(self, instance_num: int, use_gamescope: bool = True,
+                                  client_mode: str = "full") -> List[str]:
         """Builds the base steam command."""
-        if use_gamescope:
+        if client_mode != "full":
+            self.logger.info(f"Instance {instance_num}: Using the '{client_mode}' Steam client.")
+        elif use_gamescope:
             self.logger.info(f"Instance {instance_num}: Using Steam command with Gamescope flags.")
-            return ["steam", "-gamepadui", "-steamdeck", "-steamos3"]
         else:
             self.logger.info(f"Instance {instance_num}: Using plain Steam command.")
-            return ["steam"]
+        return build_steam_command(client_mode, use_gamescope)
 
-    def _build_bwrap_command(self, profile: Profile, instance_idx: int, device_info: dict, instance_num: int, home_path: Path) -> List[str]:
+    def _build_bwrap_command(self, profile: Profile, instance_idx: int, device_info: dict, instance_num: int, home_path: Path,
+                             dry_run: bool = False) -> List[str]:
         """
         Builds the bwrap command for sandboxing.
         This strategy uses the real user's home directory but mounts instance-specific
@@ -389,11 +1015,28 @@ class InstanceService:
             for folder in host_compat.iterdir():
                 if folder.is_dir() and folder.name not in ignore:
                     cmd.extend(["--bind", str(folder), str(sandbox_compat / folder.name)])
+
+        # Share shader/depot/app caches according to the profile's policy
+        cmd.extend(self.shared_cache_service.get_bind_args(
+            profile.cache_sharing, instance_num, Path(sandbox_steam_path), dry_run=dry_run
+        ))
         # --- End Steam Directory Isolation ---
 
+        # Shared per-game pipeline caches live under Config.LOCAL_DIR,
+        # which the sandbox already sees; only the variables are needed.
+        try:
+            cache_env = self.pipeline_cache_service.get_environment(
+                profile.pipeline_cache, profile.game_id or profile.profile_name, dry_run=dry_run
+            )
+        except OSError as e:
+            self.logger.warning(f"Instance {instance_num}: Pipeline cache unavailable, launching without it: {e}")
+            cache_env = {}
+
         # Ensure custom ENV variables reach Steam inside the sandbox
         try:
             extra_env = profile.get_env_for_instance(instance_idx) if hasattr(profile, "get_env_for_instance") else {}
+            # User-defined ENV values take precedence over the preset.
+            extra_env = {**cache_env, **(extra_env or {})}
             for k, v in (extra_env or {}).items():
                 if v is None:
                     v = ""
@@ -411,6 +1054,8 @@ class InstanceService:
         try:
             self.termination_in_progress = True
             self.logger.info("Starting termination of all instances...")
+            self.warm_standby.clear()
+            self.prefetch.forget()
 
             for instance_num in list(self.processes.keys()):
                 self.terminate_instance(instance_num)
@@ -418,10 +1063,17 @@ class InstanceService:
             self.logger.info("Instance termination complete.")
             self.pids.clear()
             self.processes.clear()
+            if self._frame_rate_governor:
+                self._frame_rate_governor.stop()
+            if self._input_router:
+                self._input_router.stop()
 
-            if self._virtual_joystick_path:
-                self.virtual_device_service.destroy_virtual_joystick()
-                self._virtual_joystick_path = None
-            self._virtual_joystick_checked = False
+            with self._virtual_joystick_lock:
+                if self._virtual_joystick_path:
+                    self.virtual_device_service.destroy_virtual_joystick()
+                    self._virtual_joystick_path = None
+                self._virtual_joystick_checked = False
+            self.memory_merge.finish()
+            self.client_footprint.stop()
         finally:
             self.termination_in_progress = False
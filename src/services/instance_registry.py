@@ -0,0 +1,386 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from ..core.exceptions import InstanceStateError
+from ..core.logger import Logger
+from ..models.profile import Profile
+from .instance import InstanceService
+from .pressure_governor import PAUSE, PressureGovernor
+
+# Instance lifecycle states.
+STOPPED = "stopped"
+STARTING = "starting"
+RUNNING = "running"
+SUSPENDED = "suspended"
+STOPPING = "stopping"
+EXITED = "exited"
+FAILED = "failed"
+
+ACTIVE_STATES = (STARTING, RUNNING, SUSPENDED, STOPPING)
+
+# Allowed transitions of the instance state machine.
+_TRANSITIONS = {
+    STOPPED: (STARTING,),
+    EXITED: (STARTING,),
+    FAILED: (STARTING,),
+    STARTING: (RUNNING, FAILED, STOPPING),
+    RUNNING: (STOPPING, EXITED, SUSPENDED),
+    SUSPENDED: (RUNNING, STOPPING, EXITED),
+    STOPPING: (STOPPED,),
+}
+
+
+class InstanceRegistry:
+    """
+    Thread-safe owner of the running instances and their lifecycle state.
+
+    All launches and terminations go through a single registry, so every
+    front-end (GUI buttons, CLI, control-plane clients) sees the same
+    processes. State lives in a small dict guarded by a lock that is never
+    held while launching or killing, which keeps `status` queries cheap
+    while the slow work runs on the caller's thread.
+
+    Attributes:
+        service (InstanceService): The service that spawns the processes.
+    """
+
+    def __init__(self, logger: Logger, service: Optional[InstanceService] = None, poll_interval: float = 0.5):
+        self.logger = logger
+        self.service = service or InstanceService(logger=logger)
+        self._lock = threading.Lock()
+        # Serializes access to InstanceService, whose dicts are not thread-safe.
+        self._service_lock = threading.RLock()
+        self._states: Dict[int, dict] = {}
+        # Instances whose warm standby is being started, outside any lock
+        self._standbys_starting: Set[int] = set()
+        self._standby_started = threading.Condition(self._lock)
+        self._subscribers: List[Callable[[dict], None]] = []
+        self._poll_interval = poll_interval
+        self._reaper: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+        self._pressure_governor: Optional[PressureGovernor] = None
+        self._adopt_service_instances()
+
+    def _adopt_service_instances(self) -> None:
+        """Marks instances the service re-adopted on startup as running."""
+        with self._service_lock:
+            adopted = dict(self.service.pids)
+        if not adopted:
+            return
+        with self._lock:
+            for instance_num, pid in adopted.items():
+                self._states[instance_num] = {
+                    "instance": instance_num, "state": RUNNING, "pid": pid,
+                    "since": time.time(), "adopted": True,
+                }
+        self._ensure_reaper()
+
+    # --- State machine -------------------------------------------------
+
+    def _transition(self, instance_num: int, new_state: str, **fields) -> dict:
+        with self._lock:
+            record = self._states.setdefault(instance_num, {"instance": instance_num, "state": STOPPED, "pid": None})
+            current = record["state"]
+            if new_state not in _TRANSITIONS.get(current, ()):
+                raise InstanceStateError(
+                    f"Instance {instance_num} cannot go from '{current}' to '{new_state}'"
+                )
+            record["state"] = new_state
+            record["since"] = time.time()
+            record.update(fields)
+            event = {"ev": "state", **record}
+            subscribers = list(self._subscribers)
+        self._publish(subscribers, event)
+        return event
+
+    def _publish(self, subscribers: List[Callable[[dict], None]], event: dict) -> None:
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                self.logger.error(f"Instance registry subscriber failed: {e}")
+
+    def subscribe(self, callback: Callable[[dict], None]) -> Callable[[], None]:
+        """
+        Registers a callback for state events.
+
+        Callbacks run on the thread that caused the change and must not
+        block. Returns a function that removes the subscription.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def status(self) -> Dict[int, dict]:
+        """Returns a snapshot of every known instance's state."""
+        with self._lock:
+            return {num: dict(record) for num, record in self._states.items()}
+
+    def get_state(self, instance_num: int) -> str:
+        with self._lock:
+            record = self._states.get(instance_num)
+            return record["state"] if record else STOPPED
+
+    def is_any_active(self) -> bool:
+        with self._lock:
+            return any(r["state"] in ACTIVE_STATES for r in self._states.values())
+
+    # --- Operations ----------------------------------------------------
+
+    def launch_instance(
+        self,
+        instance_num: int,
+        profile: Optional[Profile] = None,
+        use_gamescope_override: Optional[bool] = None,
+    ) -> dict:
+        """
+        Launches an instance and returns its resulting state record.
+
+        When no profile is given, the saved profile is loaded, which is what
+        out-of-process clients rely on.
+        """
+        self._transition(instance_num, STARTING, suspend_report=None)
+        try:
+            if profile is None:
+                profile = Profile.load()
+            # A standby being started for the instance is taken over instead
+            self._wait_for_standbys([instance_num])
+            # The waiting part runs unlocked, so stops and queries stay responsive
+            active_profile = self.service.prepare_launch(profile, instance_num, use_gamescope_override)
+            with self._service_lock:
+                # A stop that arrived meanwhile found nothing to terminate
+                if active_profile is not None and self.get_state(instance_num) == STARTING:
+                    self.service.start_prepared_instance(active_profile, instance_num)
+                pid = self.service.pids.get(instance_num)
+        except Exception as e:
+            try:
+                self._transition(instance_num, FAILED, pid=None, error=str(e))
+            except InstanceStateError:
+                self.logger.info(f"Instance {instance_num} was stopped while starting.")
+            raise
+        try:
+            if pid is None:
+                self._transition(instance_num, FAILED, pid=None, error="process could not be started")
+            else:
+                self._transition(instance_num, RUNNING, pid=pid, error=None)
+                self._ensure_reaper()
+                self._govern_pressure(instance_num, profile)
+        except InstanceStateError:
+            # A stop request arrived while starting; it terminates the process.
+            self.logger.info(f"Instance {instance_num} was stopped while starting.")
+        return self.status()[instance_num]
+
+    def stop_instance(self, instance_num: int) -> dict:
+        """Terminates an instance and returns its resulting state record."""
+        if self.get_state(instance_num) not in ACTIVE_STATES:
+            return self.status().get(instance_num, {"instance": instance_num, "state": STOPPED, "pid": None})
+        self._transition(instance_num, STOPPING)
+        if self._pressure_governor:
+            self._pressure_governor.untrack(instance_num)
+        with self._service_lock:
+            self.service.terminate_instance(instance_num)
+        self._transition(instance_num, STOPPED, pid=None)
+        return self.status()[instance_num]
+
+    def reassign_input(self, instance_num: int, device_path: Optional[str], kind: str = "gamepad") -> None:
+        """Routes a physical input device to a running instance without restarting it."""
+        if self.get_state(instance_num) != RUNNING:
+            raise InstanceStateError(f"Instance {instance_num} is not running")
+        with self._service_lock:
+            self.service.reassign_input(instance_num, device_path, kind)
+
+    def suspend_instance(self, instance_num: int) -> dict:
+        """Pauses a running instance; the CPU report is kept in its state record."""
+        if self.get_state(instance_num) != RUNNING:
+            raise InstanceStateError(f"Instance {instance_num} is not running")
+        with self._service_lock:
+            pid = self.service.get_running_pid(instance_num)
+        # Sampling the CPU usage alone takes a second
+        report = self.service.suspender.suspend(instance_num, pid)
+        try:
+            self._transition(instance_num, SUSPENDED, suspend_report=report)
+        except InstanceStateError:
+            # A stop request arrived meanwhile; it terminates the process.
+            pass
+        return report
+
+    def resume_instance(self, instance_num: int) -> dict:
+        """Resumes a suspended instance."""
+        if self.get_state(instance_num) != SUSPENDED:
+            raise InstanceStateError(f"Instance {instance_num} is not suspended")
+        with self._service_lock:
+            pid = self.service.get_running_pid(instance_num)
+        # Sampling the CPU usage alone takes a second
+        report = self.service.suspender.resume(instance_num, pid)
+        try:
+            self._transition(instance_num, RUNNING, suspend_report=report)
+        except InstanceStateError:
+            pass
+        return report
+
+    def prepare_standby(self, profile: Optional[Profile] = None) -> List[int]:
+        """
+        Starts warm standbys of the profile's instances; returns the ones started.
+
+        Standbys are not instances yet: they stay out of the state machine
+        until `release_standbys` (or a launch) turns them into running ones.
+        """
+        if profile is None:
+            profile = Profile.load()
+        # Only putting a spawned standby in the pool takes the service lock;
+        # compiling and spawning it can take seconds.
+        started = []
+        for instance_num in self.service.prepare_standby(profile):
+            with self._lock:
+                # Launches started meanwhile go without a standby
+                record = self._states.get(instance_num)
+                if (record and record["state"] in ACTIVE_STATES) or instance_num in self._standbys_starting:
+                    continue
+                self._standbys_starting.add(instance_num)
+            try:
+                if not self.service.standby_has_room(profile, instance_num):
+                    break
+                spawned = self.service.start_standby(profile, instance_num)
+                if spawned:
+                    with self._service_lock:
+                        self.service.hold_standby(profile, *spawned)
+                    started.append(instance_num)
+            finally:
+                with self._standby_started:
+                    self._standbys_starting.discard(instance_num)
+                    self._standby_started.notify_all()
+        return started
+
+    def _wait_for_standbys(self, instance_nums: Iterable[int]) -> None:
+        """Waits until none of the instances has a standby being started."""
+        wanted = set(instance_nums)
+        with self._standby_started:
+            self._standby_started.wait_for(lambda: not wanted & self._standbys_starting)
+
+    def release_standbys(self, instance_nums: List[int], profile: Optional[Profile] = None) -> List[int]:
+        """Releases the matching standbys of several instances at once; returns the ones now running."""
+        if profile is None:
+            profile = Profile.load()
+        # Standbys still starting are released with the others
+        self._wait_for_standbys(instance_nums)
+        candidates = [n for n in instance_nums if self.get_state(n) not in ACTIVE_STATES]
+        with self._service_lock:
+            released = self.service.release_standbys(profile, candidates)
+            pids = {n: self.service.pids.get(n) for n in released}
+        for instance_num in released:
+            self._transition(instance_num, STARTING, suspend_report=None)
+            self._transition(instance_num, RUNNING, pid=pids[instance_num], error=None)
+            self._govern_pressure(instance_num, profile)
+        if released:
+            self._ensure_reaper()
+        return released
+
+    def discard_standby(self) -> None:
+        """Kills every warm standby."""
+        with self._service_lock:
+            self.service.warm_standby.invalidate()
+
+    def standby_metrics(self) -> dict:
+        """Returns warm standby counters and the startup time they saved."""
+        return self.service.warm_standby.metrics()
+
+    def prefetch_status(self) -> dict:
+        """Returns the page-cache prefetch progress and its effect on load times."""
+        return self.service.prefetch.status()
+
+    def memory_merge_report(self) -> dict:
+        """Returns the pages KSM merged across the instances and the memory saved."""
+        return self.service.memory_merge_report()
+
+    def client_footprint_report(self) -> dict:
+        """Returns the steady-state footprint of the Steam client per client mode."""
+        return self.service.client_footprint_report()
+
+    # --- Pressure governor ---------------------------------------------
+
+    def _govern_pressure(self, instance_num: int, profile: Profile) -> None:
+        """Puts a newly running instance under the pressure governor if the profile enables it."""
+        config = profile.pressure_governor
+        if not config.enabled:
+            return
+        if self._pressure_governor is None:
+            self._pressure_governor = PressureGovernor(
+                self.logger, apply=self._apply_pressure_response, cgroup_of=self.service.suspender.cgroup_path
+            )
+        self._pressure_governor.configure(config)
+        self._pressure_governor.track(instance_num, profile.get_instance_priority(instance_num))
+
+    def _apply_pressure_response(self, instance_num: int, action: str, value: Optional[int]) -> bool:
+        # Pausing goes through the state machine so every front-end sees it
+        if action == PAUSE:
+            try:
+                if value is None:
+                    self.resume_instance(instance_num)
+                else:
+                    self.suspend_instance(instance_num)
+            except InstanceStateError:
+                return False
+            return True
+        with self._service_lock:
+            return self.service.apply_pressure_response(instance_num, action, value)
+
+    def pressure_snapshot(self) -> dict:
+        """Returns the pressure readings and the responses applied to each instance."""
+        if self._pressure_governor is None:
+            return {"pressure": {}, "stages": {}}
+        return self._pressure_governor.snapshot()
+
+    def stop_all(self) -> None:
+        """Terminates every instance and releases shared resources."""
+        for instance_num, record in self.status().items():
+            if record["state"] in (RUNNING, SUSPENDED, STARTING):
+                try:
+                    self.stop_instance(instance_num)
+                except InstanceStateError:
+                    pass
+        if self._pressure_governor:
+            self._pressure_governor.stop()
+        with self._service_lock:
+            self.service.terminate_all()
+
+    def close(self) -> None:
+        """Stops all instances and the exit monitor."""
+        self._closed.set()
+        self.stop_all()
+
+    # --- Exit monitoring -----------------------------------------------
+
+    def _ensure_reaper(self) -> None:
+        with self._lock:
+            if self._reaper and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, name="instance-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        while not self._closed.wait(self._poll_interval):
+            running = [num for num, r in self.status().items() if r["state"] in (RUNNING, SUSPENDED)]
+            if not running:
+                return
+            for instance_num in running:
+                with self._service_lock:
+                    process = self.service.processes.get(instance_num)
+                    exit_code = process.poll() if process else None
+                    if process and exit_code is not None:
+                        self.service.forget_instance(instance_num)
+                if exit_code is None:
+                    continue
+                if self._pressure_governor:
+                    self._pressure_governor.untrack(instance_num)
+                try:
+                    self._transition(instance_num, EXITED, pid=None, exit_code=exit_code)
+                    self.logger.info(f"Instance {instance_num} exited with code {exit_code}.")
+                except InstanceStateError:
+                    # Raced with a stop request; the stop owns the transition.
+                    pass
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..core.config import Config
+
+
+def read_proc_start_time(pid: int) -> Optional[int]:
+    """
+    Returns the start time of a process in clock ticks since boot.
+
+    Together with the PID this identifies a process uniquely, so a recycled
+    PID is never mistaken for the original instance.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces or parentheses; fields restart
+    # after the last ')'. Field 22 (starttime) is the 20th after it.
+    fields = stat[stat.rfind(b")") + 2:].split()
+    if len(fields) < 20 or fields[0] == b"Z":
+        return None
+    return int(fields[19])
+
+
+def list_process_tree(root_pid: int) -> List[int]:
+    """
+    Returns a process and all of its live descendants, parents first.
+
+    Instances cannot be addressed as one process group: bwrap starts the
+    sandbox in a new session, so the tree is followed by parent PID.
+    """
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Fields after the command name: state, ppid, ...
+        fields = stat[stat.rfind(b")") + 2:].split()
+        if len(fields) > 1 and fields[0] != b"Z":
+            children.setdefault(int(fields[1]), []).append(int(entry))
+    tree = [root_pid]
+    for pid in tree:
+        tree.extend(children.get(pid, ()))
+    return tree
+
+
+def signal_process_tree(root_pid: int, signum: int) -> None:
+    """Sends a signal to a process and all of its descendants."""
+    for pid in list_process_tree(root_pid):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def read_proc_cpu_ticks(pid: int) -> int:
+    """Returns the user plus system CPU time of a process in clock ticks."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return 0
+    # utime and stime are fields 14 and 15, the 12th and 13th after the name
+    fields = stat[stat.rfind(b")") + 2:].split()
+    if len(fields) < 13:
+        return 0
+    return int(fields[11]) + int(fields[12])
+
+
+def read_proc_pss(pid: int) -> int:
+    """
+    Returns the proportional set size of a process in bytes.
+
+    Pages shared between processes (Steam's libraries, a common Proton)
+    are split among them, so summing PSS over several instances does not
+    count shared memory twice. Falls back to RSS when `smaps_rollup` is
+    not readable.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "rb") as f:
+            for line in f:
+                if line.startswith(b"Pss:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        with open(f"/proc/{pid}/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def hash_command(argv: List[str]) -> str:
+    """Hashes an argv the same way `/proc/<pid>/cmdline` stores it."""
+    return hashlib.sha1(b"\0".join(a.encode() for a in argv) + b"\0").hexdigest()
+
+
+def read_proc_command_hash(pid: int) -> Optional[str]:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class AdoptedProcess:
+    """
+    A `subprocess.Popen`-like handle for an instance started by a previous
+    MultiScope process.
+
+    It is not our child, so it cannot be waited for; liveness is checked
+    against the recorded start time instead.
+    """
+
+    def __init__(self, pid: int, start_time: int):
+        self.pid = pid
+        self.start_time = start_time
+        self.returncode: Optional[int] = None
+
+    def poll(self) -> Optional[int]:
+        if self.returncode is None and read_proc_start_time(self.pid) != self.start_time:
+            # The real exit status is only available to the original parent.
+            self.returncode = 0
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"PID {self.pid} is still running")
+            time.sleep(0.05)
+        return self.returncode
+
+
+class InstanceStateStore:
+    """
+    Persists one small JSON record per launched instance.
+
+    A record holds the PID, process group, PID start time, a hash of the
+    launch command, the log path and whether the instance is a warm standby
+    not yet committed to by Play. A standby is only usable by the process
+    holding it, so its record also names that owner. On startup the records are validated
+    directly against `/proc/<pid>`, so rediscovery costs two small reads per
+    recorded instance instead of a process-table scan.
+    """
+
+    def __init__(self, logger, state_dir: Optional[Path] = None):
+        self.logger = logger
+        self.state_dir = Path(state_dir or Config.get_instance_state_dir())
+
+    def _path(self, instance_num: int) -> Path:
+        return self.state_dir / f"instance_{instance_num}.json"
+
+    def save(self, instance_num: int, pid: int, argv: List[str], log_path: Path, standby: bool = False) -> None:
+        start_time = read_proc_start_time(pid)
+        if start_time is None:
+            return
+        try:
+            pgid = os.getpgid(pid)
+        except ProcessLookupError:
+            return
+        record = {
+            "instance": instance_num,
+            "pid": pid,
+            "pgid": pgid,
+            "start_time": start_time,
+            "cmd_hash": hash_command(argv),
+            "log_path": str(log_path),
+            "standby": standby,
+        }
+        if standby:
+            record["owner_pid"] = os.getpid()
+            record["owner_start_time"] = read_proc_start_time(os.getpid())
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path(instance_num).with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(record), encoding="utf-8")
+        tmp_path.replace(self._path(instance_num))
+
+    def remove(self, instance_num: int) -> None:
+        self._path(instance_num).unlink(missing_ok=True)
+
+    def load_all(self) -> Dict[int, dict]:
+        records = {}
+        if not self.state_dir.is_dir():
+            return records
+        for path in self.state_dir.glob("instance_*.json"):
+            try:
+                record = json.loads(path.read_text(encoding="utf-8"))
+                records[int(record["instance"])] = record
+            except (OSError, ValueError, KeyError, TypeError):
+                path.unlink(missing_ok=True)
+        return records
+
+    def is_live(self, record: dict) -> bool:
+        """Checks that a record still describes the same running process."""
+        pid = record.get("pid")
+        if not pid or read_proc_start_time(pid) != record.get("start_time"):
+            return False
+        return read_proc_command_hash(pid) == record.get("cmd_hash")
+
+    @staticmethod
+    def is_owner_live(record: dict) -> bool:
+        """Checks that the process holding a standby is still running."""
+        owner_pid = record.get("owner_pid")
+        return bool(owner_pid) and read_proc_start_time(owner_pid) == record.get("owner_start_time")
+
+    def rediscover(self) -> Dict[int, dict]:
+        """
+        Returns the records of instances that are still running.
+
+        Stale records (exited processes, recycled PIDs) are removed.
+        """
+        start = time.perf_counter()
+        live = {}
+        for instance_num, record in self.load_all().items():
+            if self.is_live(record):
+                live[instance_num] = record
+            else:
+                self.remove(instance_num)
+        if live:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.logger.info(
+                f"Rediscovered running instances {sorted(live)} in {elapsed_ms:.2f} ms."
+            )
+        return live
@@ -0,0 +1,311 @@
+import errno
+import math
+import os
+import resource
+import signal
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..core.logger import Logger
+from .audio_service import AudioService
+from .instance_state import list_process_tree, read_proc_cpu_ticks, signal_process_tree
+
+_CGROUP_ROOT = "/sys/fs/cgroup"
+# Window over which CPU usage is sampled before and after a change.
+CPU_SAMPLE_SECONDS = 0.5
+# How long to wait for the kernel to report a cgroup (un)frozen.
+FREEZE_TIMEOUT = 2.0
+
+FREEZER = "cgroup"
+SIGNALS = "signal"
+
+
+def _read_cgroup(pid: int) -> Optional[str]:
+    """Returns the cgroup v2 path of a process, relative to the hierarchy root."""
+    try:
+        with open(f"/proc/{pid}/cgroup", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    return line[3:].strip()
+    except OSError:
+        pass
+    return None
+
+
+def _read_host_cpu() -> Tuple[int, int]:
+    """Returns (busy, total) jiffies of all CPUs from /proc/stat."""
+    try:
+        with open("/proc/stat", "rb") as f:
+            values = [int(v) for v in f.readline().split()[1:]]
+    except (OSError, ValueError):
+        return 0, 0
+    # idle and iowait
+    idle = values[3] + (values[4] if len(values) > 4 else 0)
+    total = sum(values[:8])
+    return total - idle, total
+
+
+class _Suspension:
+    __slots__ = ("pid", "method", "muted_streams", "since")
+
+    def __init__(self, pid: int, method: str, muted_streams: List[str]):
+        self.pid = pid
+        self.method = method
+        self.muted_streams = muted_streams
+        self.since = time.monotonic()
+
+
+class InstanceSuspender:
+    """
+    Pauses, resumes and throttles instances without terminating them.
+
+    The cgroup v2 freezer is used when the instance's cgroup is writable
+    (it is under a systemd user session): the instance's processes are
+    moved into a child cgroup of their own, which is then frozen. Frozen
+    processes cannot fork, so nothing escapes. Otherwise the process tree
+    is stopped with SIGSTOP; the tree rather than the process group,
+    because bwrap starts the sandbox in a new session.
+
+    The instance's audio streams are muted while it is paused, and the CPU
+    usage of the instance and of the host is sampled before and after, so
+    the freed headroom can be reported.
+
+    CPU weight is lowered through the cgroup's ``cpu.weight`` when the cpu
+    controller is available to it, and otherwise by renicing the tree.
+
+    Suspending and resuming take about a second and run without the
+    caller's locks; they are serialized per instance here. A suspension
+    recorded for a PID that is no longer the instance's is ignored.
+    """
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+        self.audio = AudioService(logger)
+        self._cgroups: Dict[int, str] = {}
+        self._suspended: Dict[int, _Suspension] = {}
+        # Original nice values of reniced processes, per instance
+        self._niced: Dict[int, Dict[int, int]] = {}
+        self._instance_locks: Dict[int, threading.Lock] = {}
+
+    def is_suspended(self, instance_num: int) -> bool:
+        return instance_num in self._suspended
+
+    def _instance_lock(self, instance_num: int) -> threading.Lock:
+        return self._instance_locks.setdefault(instance_num, threading.Lock())
+
+    def suspend(self, instance_num: int, pid: int) -> dict:
+        """
+        Pauses an instance's process tree.
+
+        Returns:
+            dict: The method used, the number of muted audio streams and
+            the CPU usage (percent of one core for the instance, percent of
+            all cores for the host) before and after.
+        """
+        with self._instance_lock(instance_num):
+            return self._suspend(instance_num, pid)
+
+    def _suspend(self, instance_num: int, pid: int) -> dict:
+        suspension = self._suspended.get(instance_num)
+        if suspension and suspension.pid == pid:
+            return {"instance": instance_num, "method": suspension.method, "changed": False}
+        cpu_before = self._sample_cpu(pid)
+        muted = self.audio.mute_streams_of(list_process_tree(pid)) if self.audio.is_available() else []
+        if self._set_frozen(instance_num, pid, True):
+            method = FREEZER
+        else:
+            signal_process_tree(pid, signal.SIGSTOP)
+            method = SIGNALS
+        self._suspended[instance_num] = _Suspension(pid, method, muted)
+        cpu_after = self._sample_cpu(pid)
+        self.logger.info(
+            f"Instance {instance_num}: Suspended ({method}); CPU {cpu_before['instance_pct']:.0f}% -> "
+            f"{cpu_after['instance_pct']:.0f}%, host busy {cpu_before['host_pct']:.0f}% -> "
+            f"{cpu_after['host_pct']:.0f}%; {len(muted)} audio stream(s) muted."
+        )
+        return {
+            "instance": instance_num, "method": method, "changed": True, "muted_streams": len(muted),
+            "cpu_before": cpu_before, "cpu_after": cpu_after,
+        }
+
+    def resume(self, instance_num: int, pid: int) -> dict:
+        """Resumes a paused instance; returns the same report as `suspend`."""
+        with self._instance_lock(instance_num):
+            return self._resume(instance_num, pid)
+
+    def _resume(self, instance_num: int, pid: int) -> dict:
+        suspension = self._suspended.pop(instance_num, None)
+        if suspension is None or suspension.pid != pid:
+            return {"instance": instance_num, "method": None, "changed": False}
+        cpu_before = self._sample_cpu(pid)
+        if suspension.method == FREEZER:
+            if not self._set_frozen(instance_num, pid, False):
+                self.logger.warning(f"Instance {instance_num}: Could not thaw its cgroup; sending SIGCONT.")
+                signal_process_tree(pid, signal.SIGCONT)
+        else:
+            signal_process_tree(pid, signal.SIGCONT)
+        if suspension.muted_streams:
+            self.audio.unmute_streams(suspension.muted_streams)
+        cpu_after = self._sample_cpu(pid)
+        paused_for = time.monotonic() - suspension.since
+        self.logger.info(
+            f"Instance {instance_num}: Resumed after {paused_for:.0f}s; CPU {cpu_before['instance_pct']:.0f}% -> "
+            f"{cpu_after['instance_pct']:.0f}%, host busy {cpu_before['host_pct']:.0f}% -> {cpu_after['host_pct']:.0f}%."
+        )
+        return {
+            "instance": instance_num, "method": suspension.method, "changed": True,
+            "muted_streams": len(suspension.muted_streams), "paused_seconds": round(paused_for, 1),
+            "cpu_before": cpu_before, "cpu_after": cpu_after,
+        }
+
+    def cgroup_path(self, instance_num: int) -> Optional[str]:
+        """Returns the instance's own cgroup, if one was created for it."""
+        return self._cgroups.get(instance_num)
+
+    def set_cpu_weight(self, instance_num: int, pid: int, weight: Optional[int]) -> bool:
+        """
+        Lowers an instance's CPU weight (100 is the default); None restores it.
+
+        Returns False if neither the cgroup nor renicing can do it. Renicing
+        is only used when the nice values can be lowered back afterwards,
+        which unprivileged processes can only do within RLIMIT_NICE.
+        """
+        path = self._instance_cgroup(instance_num, pid)
+        if path and os.path.exists(os.path.join(path, "cpu.weight")):
+            try:
+                with open(os.path.join(path, "cpu.weight"), "w", encoding="utf-8") as f:
+                    f.write(str(weight or 100))
+                return True
+            except OSError as e:
+                self.logger.info(f"Instance {instance_num}: Cannot write cpu.weight ({e}); renicing instead.")
+
+        if weight is None:
+            return self._restore_nice(instance_num)
+        # The scheduler's weight changes by about 1.25x per nice level
+        nice = max(0, min(19, round(math.log(100 / weight, 1.25))))
+        # Root (CAP_SYS_NICE) may always lower nice values again
+        lowest_restorable = -20 if os.geteuid() == 0 else 20 - resource.getrlimit(resource.RLIMIT_NICE)[0]
+        originals: Dict[int, int] = {}
+        for member in list_process_tree(pid):
+            try:
+                current = os.getpriority(os.PRIO_PROCESS, member)
+            except OSError:
+                continue
+            if current < lowest_restorable:
+                continue
+            originals[member] = current
+        if not originals:
+            return False
+        for member, current in originals.items():
+            try:
+                os.setpriority(os.PRIO_PROCESS, member, max(current, nice))
+            except OSError:
+                pass
+        self._niced[instance_num] = originals
+        return True
+
+    def _restore_nice(self, instance_num: int) -> bool:
+        originals = self._niced.pop(instance_num, None)
+        if not originals:
+            return False
+        for member, nice in originals.items():
+            try:
+                os.setpriority(os.PRIO_PROCESS, member, nice)
+            except OSError:
+                pass
+        return True
+
+    def forget(self, instance_num: int) -> None:
+        """Drops the state of an instance that exited and removes its empty cgroup."""
+        self._suspended.pop(instance_num, None)
+        self._niced.pop(instance_num, None)
+        path = self._cgroups.pop(instance_num, None)
+        if path:
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+
+    # --- cgroup v2 freezer ---------------------------------------------
+
+    def _instance_cgroup(self, instance_num: int, pid: int) -> Optional[str]:
+        """Returns the instance's own cgroup, moving its processes into one if needed."""
+        path = self._cgroups.get(instance_num)
+        if path and os.path.isdir(path):
+            return path
+        if not os.path.exists(os.path.join(_CGROUP_ROOT, "cgroup.controllers")):
+            return None  # Not a cgroup v2 (unified) hierarchy
+        current = _read_cgroup(pid)
+        if current is None:
+            return None
+        parent = os.path.join(_CGROUP_ROOT, current.lstrip("/"))
+        name = f"multiscope-instance-{instance_num}"
+        path = parent if os.path.basename(parent) == name else os.path.join(parent, name)
+        try:
+            os.makedirs(path, exist_ok=True)
+            # A second pass catches children forked while the first one ran
+            for _ in range(2):
+                for member in list_process_tree(pid):
+                    self._move_to_cgroup(path, member)
+        except OSError as e:
+            self.logger.info(f"Instance {instance_num}: cgroup freezer unavailable ({e}); using signals.")
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+            return None
+        self._cgroups[instance_num] = path
+        return path
+
+    @staticmethod
+    def _move_to_cgroup(path: str, pid: int) -> None:
+        try:
+            with open(os.path.join(path, "cgroup.procs"), "w", encoding="utf-8") as f:
+                f.write(str(pid))
+        except OSError as e:
+            if e.errno != errno.ESRCH:  # The process already exited
+                raise
+
+    def _set_frozen(self, instance_num: int, pid: int, frozen: bool) -> bool:
+        path = self._instance_cgroup(instance_num, pid)
+        if not path:
+            return False
+        try:
+            with open(os.path.join(path, "cgroup.freeze"), "w", encoding="utf-8") as f:
+                f.write("1" if frozen else "0")
+        except OSError as e:
+            self.logger.info(f"Instance {instance_num}: Cannot write cgroup.freeze ({e}); using signals.")
+            return False
+        # Freezing is asynchronous; cgroup.events reports when it completed
+        expected = f"frozen {int(frozen)}"
+        deadline = time.monotonic() + FREEZE_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                with open(os.path.join(path, "cgroup.events"), "r", encoding="utf-8") as f:
+                    if expected in f.read().splitlines():
+                        return True
+            except OSError:
+                break
+            time.sleep(0.01)
+        self.logger.warning(f"Instance {instance_num}: cgroup did not report '{expected}' in time.")
+        return True
+
+    # --- CPU usage -----------------------------------------------------
+
+    @staticmethod
+    def _sample_cpu(pid: int) -> dict:
+        """Samples the instance's and the host's CPU usage over `CPU_SAMPLE_SECONDS`."""
+        tree = list_process_tree(pid)
+        ticks_start = sum(read_proc_cpu_ticks(p) for p in tree)
+        busy_start, total_start = _read_host_cpu()
+        start = time.monotonic()
+        time.sleep(CPU_SAMPLE_SECONDS)
+        elapsed = time.monotonic() - start
+        ticks_end = sum(read_proc_cpu_ticks(p) for p in tree)
+        busy_end, total_end = _read_host_cpu()
+        ticks_per_second = os.sysconf("SC_CLK_TCK")
+        instance_pct = max(0, ticks_end - ticks_start) / ticks_per_second / elapsed * 100
+        host_total = total_end - total_start
+        host_pct = 100.0 * (busy_end - busy_start) / host_total if host_total > 0 else 0.0
+        return {"instance_pct": round(instance_pct, 1), "host_pct": round(host_pct, 1)}
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import ValidationError
+
+from ..core.config import Config
+from ..core.logger import Logger
+from ..models.launch_plan import PLAN_FORMAT_VERSION, InstancePlan, LaunchPlan
+from ..models.profile import Profile
+
+# Cached plans kept on disk; older ones are pruned.
+MAX_CACHED_PLANS = 8
+
+
+def compute_plan_key(profile: Profile, host_state: Any) -> str:
+    """Hashes the profile and the host state a launch plan depends on."""
+    payload = json.dumps(
+        {
+            "version": PLAN_FORMAT_VERSION,
+            "profile": profile.model_dump(by_alias=True, mode="json"),
+            "host": host_state,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LaunchPlanCache:
+    """
+    Stores launch plans on disk, keyed by profile and host state.
+
+    A key changes whenever a launch-relevant setting or the host (input
+    devices, outputs, installed tools) changes, so a plan found under the
+    current key only needs the cheap checks in `revalidate` before it is
+    replayed.
+    """
+
+    def __init__(self, logger: Logger, cache_dir: Optional[Path] = None):
+        self.logger = logger
+        self.cache_dir = Path(cache_dir or Config.get_launch_plan_dir())
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def load(self, key: str) -> Optional[LaunchPlan]:
+        path = self._path(key)
+        try:
+            plan = LaunchPlan.model_validate_json(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValidationError) as e:
+            self.logger.warning(f"Discarding unreadable launch plan '{path}': {e}")
+            path.unlink(missing_ok=True)
+            return None
+        if plan.version != PLAN_FORMAT_VERSION or plan.key != key:
+            return None
+        return plan
+
+    def save(self, plan: LaunchPlan) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(plan.key)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(plan.to_json(), encoding="utf-8")
+        tmp_path.replace(path)
+        self._prune()
+
+    def _prune(self) -> None:
+        plans = sorted(self.cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in plans[MAX_CACHED_PLANS:]:
+            stale.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for path in self.cache_dir.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def revalidate(plan: InstancePlan) -> Optional[str]:
+        """
+        Checks that a cached plan still applies; returns why not, or None.
+
+        Only things the plan key cannot see are checked: that the mounted
+        sources and the assigned device nodes still exist.
+        """
+        for flag, source, _target in plan.mounts:
+            if flag != "--tmpfs" and not os.path.exists(source):
+                return f"mount source '{source}' is gone"
+        for key, value in plan.device_info.items():
+            if key.endswith("_path_str_for_instance") and value and not os.path.exists(value):
+                return f"device '{value}' is gone"
+        return None
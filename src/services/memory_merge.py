@@ -0,0 +1,220 @@
+import ctypes
+import errno
+import os
+from typing import Dict, Optional
+
+from ..core.logger import Logger
+from ..models.profile import MemoryMergeConfig
+from .instance_state import list_process_tree, read_proc_pss
+
+KSM_ROOT = "/sys/kernel/mm/ksm"
+# prctl options, since Linux 6.4; the flag survives execve since 6.7
+PR_SET_MEMORY_MERGE = 67
+PR_GET_MEMORY_MERGE = 68
+
+# System counters reported from KSM_ROOT; general_profit needs Linux 6.7.
+SYSTEM_COUNTERS = ("pages_shared", "pages_sharing", "pages_unshared", "pages_volatile", "full_scans", "general_profit")
+
+
+def read_ksm_stat(pid: int) -> Dict[str, int]:
+    """
+    Reads a process's ``/proc/<pid>/ksm_stat``, falling back to
+    ``ksm_merging_pages`` on older kernels; yes/no fields become 1/0.
+    """
+    stat: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/ksm_stat", "r", encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.replace(":", " ").partition(" ")
+                value = value.strip()
+                if value in ("yes", "no"):
+                    stat[key] = int(value == "yes")
+                else:
+                    try:
+                        stat[key] = int(value)
+                    except ValueError:
+                        continue
+        return stat
+    except OSError:
+        pass
+    try:
+        with open(f"/proc/{pid}/ksm_merging_pages", "r", encoding="utf-8") as f:
+            stat["ksm_merging_pages"] = int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        pass
+    return stat
+
+
+class MemoryMergeService:
+    """
+    Opts instance process trees into kernel same-page merging (KSM).
+
+    Instances of one game hold many identical anonymous pages (decompressed
+    assets, Wine heaps) that KSM can share. Each launcher process sets
+    ``PR_SET_MEMORY_MERGE`` on itself between fork and exec; the flag is
+    inherited by everything the instance forks. The prctl exists since
+    Linux 6.4 (needing CAP_SYS_RESOURCE on the first kernels that had it),
+    but the flag only survives the exec since Linux 6.7, or kernels with
+    that fix backported. The first launched process is checked, and the
+    launches stop opting in if its flag was dropped. Pages are only merged
+    while ksmd runs, which is started for the session when it is stopped
+    and may be started.
+
+    The saving is measured from the growth of ``pages_sharing`` since the
+    session began, and split across the instances beyond the first.
+    """
+
+    def __init__(self, logger: Logger, ksm_root: str = KSM_ROOT):
+        self.logger = logger
+        self.ksm_root = ksm_root
+        self._libc = None
+        # Whether launches opt in; None until checked for the session
+        self._ready: Optional[bool] = None
+        # Whether a launched process was checked for the flag
+        self._checked = False
+        self._started_ksmd = False
+        self._baseline: Dict[str, int] = {}
+
+    def _read_counter(self, name: str) -> Optional[int]:
+        try:
+            with open(os.path.join(self.ksm_root, name), "r", encoding="utf-8") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _write_run(self, value: int) -> bool:
+        try:
+            with open(os.path.join(self.ksm_root, "run"), "w", encoding="utf-8") as f:
+                f.write(str(value))
+            return True
+        except OSError:
+            return False
+
+    def _probe_prctl(self) -> Optional[int]:
+        """
+        Checks that this process may use PR_SET_MEMORY_MERGE; returns None
+        if it may, or the errno it would fail with.
+        """
+        if self._libc is None:
+            try:
+                self._libc = ctypes.CDLL(None, use_errno=True)
+            except OSError:
+                return errno.ENOSYS
+        if self._libc.prctl(PR_GET_MEMORY_MERGE, 0, 0, 0, 0) == 1:
+            return None
+        # Clearing the flag that is not set changes nothing, but goes
+        # through the same checks as setting it.
+        if self._libc.prctl(PR_SET_MEMORY_MERGE, 0, 0, 0, 0) < 0:
+            return ctypes.get_errno()
+        return None
+
+    def prepare(self, config: MemoryMergeConfig) -> bool:
+        """
+        Checks once per session that launches can opt into KSM, starting
+        ksmd if allowed; returns True if they should.
+        """
+        if not config.enabled:
+            return False
+        if self._ready is not None:
+            return self._ready
+        self._ready = False
+        failure = self._probe_prctl() if self._read_counter("run") is not None else errno.ENOSYS
+        if failure == errno.ENOSYS:
+            self.logger.info("Memory merging: The kernel has no KSM support.")
+        elif failure == errno.EINVAL:
+            self.logger.info("Memory merging: The kernel does not support PR_SET_MEMORY_MERGE (instances need Linux 6.7+).")
+        elif failure is not None:
+            self.logger.warning(
+                f"Memory merging: PR_SET_MEMORY_MERGE is not permitted ({os.strerror(failure)}); "
+                "older kernels require CAP_SYS_RESOURCE."
+            )
+        else:
+            self._ready = True
+            if self._read_counter("run") != 1:
+                if config.start_ksmd and self._write_run(1):
+                    self._started_ksmd = True
+                    self.logger.info("Memory merging: Started ksmd for this session.")
+                else:
+                    self.logger.warning(
+                        f"Memory merging: ksmd is stopped; nothing is merged until {self.ksm_root}/run is 1."
+                    )
+            self._baseline = self.read_system()
+            self.logger.info("Memory merging: Instances will be launched with KSM enabled.")
+        return self._ready
+
+    def opt_in(self) -> None:
+        """Enables KSM for the calling process; runs in the child before exec."""
+        if self._libc is not None:
+            self._libc.prctl(PR_SET_MEMORY_MERGE, 1, 0, 0, 0)
+
+    def check_launched(self, pid: int) -> None:
+        """
+        Checks once per session that a process opted in by `opt_in` kept
+        the flag across its exec.
+        """
+        if self._checked or not self._ready:
+            return
+        self._checked = True
+        # Kernels without ksm_merge_any cannot tell
+        if read_ksm_stat(pid).get("ksm_merge_any", 1) == 0:
+            self._ready = False
+            self.logger.warning(
+                "Memory merging: PR_SET_MEMORY_MERGE did not survive the launcher's exec, which needs Linux 6.7+ "
+                "(or the fix backported); instances are launched without it."
+            )
+
+    def finish(self) -> None:
+        """Ends the session: stops ksmd again if it was started for it."""
+        if self._started_ksmd:
+            # 0 stops ksmd but keeps the pages merged until they are written
+            self._write_run(0)
+            self._started_ksmd = False
+        self._ready = None
+        self._checked = False
+        self._baseline = {}
+
+    def read_system(self) -> Dict[str, int]:
+        counters = {}
+        for name in SYSTEM_COUNTERS:
+            value = self._read_counter(name)
+            if value is not None:
+                counters[name] = value
+        return counters
+
+    def report(self, instance_pids: Dict[int, int]) -> dict:
+        """
+        Returns the KSM counters of the system and of each instance's
+        process tree, and the memory saved per instance beyond the first.
+        """
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        mb = 1024 * 1024
+        instances = {}
+        for instance_num, pid in sorted(instance_pids.items()):
+            tree = list_process_tree(pid)
+            totals = {"ksm_merging_pages": 0, "ksm_process_profit": 0, "ksm_zero_pages": 0}
+            merge_any = 0
+            for member in tree:
+                stat = read_ksm_stat(member)
+                for key in totals:
+                    totals[key] += stat.get(key, 0)
+                merge_any = max(merge_any, stat.get("ksm_merge_any", 0))
+            instances[str(instance_num)] = {
+                "merging_mb": round(totals["ksm_merging_pages"] * page_size / mb, 1),
+                "profit_mb": round(totals["ksm_process_profit"] / mb, 1),
+                "zero_pages": totals["ksm_zero_pages"],
+                "merge_any": bool(merge_any),
+                "pss_mb": round(sum(read_proc_pss(member) for member in tree) / mb, 1),
+            }
+
+        system = self.read_system()
+        sharing_gained = max(0, system.get("pages_sharing", 0) - self._baseline.get("pages_sharing", 0))
+        saved_mb = sharing_gained * page_size / mb
+        extra = len(instances) - 1
+        return {
+            "active": bool(self._ready),
+            "ksmd_running": self._read_counter("run") == 1,
+            "system": system,
+            "instances": instances,
+            "saved_mb": round(saved_mb, 1),
+            "saved_per_extra_instance_mb": round(saved_mb / extra, 1) if extra > 0 else None,
+        }
@@ -0,0 +1,120 @@
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..core.config import Config
+from ..core.logger import Logger
+from .host_helpers import game_key
+from .shared_cache import directory_size
+
+# Cache kinds kept in each per-game directory.
+CACHE_KINDS = ("dxvk", "vkd3d", "mesa", "nvidia")
+
+_WARM_MARKER = ".warmed"
+
+
+class PipelineCacheService:
+    """
+    Points driver-level pipeline caches at a shared per-game directory.
+
+    DXVK, VKD3D-Proton, Mesa and the NVIDIA driver normally keep their
+    pipeline caches in per-instance or sandbox-private places, so every
+    instance rebuilds them. With this preset, all instances of one game use
+    `Config.get_pipeline_cache_dir() / <game>`, and every instance after the
+    first starts with a hot cache. The caches are designed for concurrent
+    use (Mesa and NVIDIA lock their files, DXVK and VKD3D validate their
+    entries), so no extra locking is needed.
+    """
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+
+    def get_cache_dir(self, game_id: str) -> Path:
+        return Config.get_pipeline_cache_dir() / game_key(game_id)
+
+    @staticmethod
+    def _host_sources(kind: str, game_id: str) -> List[Path]:
+        """Host cache locations a per-game cache can be warmed from."""
+        home = Path.home()
+        if kind == "mesa":
+            return [home / ".cache/mesa_shader_cache", home / ".cache/mesa_shader_cache_db"]
+        if kind == "nvidia":
+            return [home / ".cache/nvidia/GLCache", home / ".nv/GLCache"]
+        if game_id.isdigit():
+            # Proton keeps these next to Steam's shader pre-caches per app id
+            shader_dir = home / ".local/share/Steam/steamapps/shadercache" / game_id
+            name = "DXVK_state_cache" if kind == "dxvk" else "vkd3d_proton_shader_cache"
+            return [shader_dir / name]
+        return []
+
+    def _warm_copy(self, cache_dir: Path, game_id: str) -> int:
+        """Copies host caches into an empty per-game cache; returns bytes copied."""
+        copied = 0
+        for kind in CACHE_KINDS:
+            target = cache_dir / kind
+            for source in self._host_sources(kind, game_id):
+                if not source.exists():
+                    continue
+                if source.is_dir():
+                    shutil.copytree(source, target, dirs_exist_ok=True)
+                else:
+                    shutil.copy2(source, target / source.name)
+                copied += directory_size(source) if source.is_dir() else source.stat().st_size
+        (cache_dir / _WARM_MARKER).touch()
+        return copied
+
+    def get_environment(self, cache_config, game_id: str, dry_run: bool = False) -> Dict[str, str]:
+        """
+        Prepares the per-game cache and returns the variables that use it.
+
+        Args:
+            cache_config (PipelineCacheConfig): The profile's cache preset.
+            game_id (str): Steam app id or name keying the cache.
+            dry_run (bool): Only compute the variables; the cache is left untouched.
+        """
+        if not cache_config.enabled:
+            return {}
+        cache_dir = self.get_cache_dir(game_id)
+        env = {
+            "DXVK_STATE_CACHE_PATH": str(cache_dir / "dxvk"),
+            "VKD3D_SHADER_CACHE_PATH": str(cache_dir / "vkd3d"),
+            "MESA_SHADER_CACHE_DIR": str(cache_dir / "mesa"),
+            "MESA_GLSL_CACHE_DIR": str(cache_dir / "mesa"),
+            "__GL_SHADER_DISK_CACHE": "1",
+            "__GL_SHADER_DISK_CACHE_PATH": str(cache_dir / "nvidia"),
+            "__GL_SHADER_DISK_CACHE_SKIP_CLEANUP": "1",
+        }
+        if cache_config.max_size_mb:
+            env["MESA_SHADER_CACHE_MAX_SIZE"] = f"{cache_config.max_size_mb}M"
+            env["__GL_SHADER_DISK_CACHE_SIZE"] = str(cache_config.max_size_mb * 1024 * 1024)
+        if dry_run:
+            return env
+
+        for kind in CACHE_KINDS:
+            (cache_dir / kind).mkdir(parents=True, exist_ok=True)
+
+        if cache_config.warm_from_host and not (cache_dir / _WARM_MARKER).exists():
+            copied = self._warm_copy(cache_dir, game_id)
+            self.logger.info(
+                f"Pipeline cache for '{game_id}' warmed from host caches ({copied / (1024 * 1024):.1f} MB)."
+            )
+
+        usage = self.get_usage(game_id)
+        summary = ", ".join(f"{kind} {size / (1024 * 1024):.1f} MB" for kind, size in usage.items())
+        self.logger.info(f"Pipeline cache for '{game_id}' at '{cache_dir}': {summary}.")
+        return env
+
+    def get_usage(self, game_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Returns the size in bytes of each cache kind.
+
+        With a `game_id`, the sizes of that game's cache; otherwise the
+        total size of every game's cache keyed by game directory.
+        """
+        if game_id is not None:
+            cache_dir = self.get_cache_dir(game_id)
+            return {kind: directory_size(cache_dir / kind) for kind in CACHE_KINDS}
+        root = Config.get_pipeline_cache_dir()
+        if not root.is_dir():
+            return {}
+        return {entry.name: directory_size(entry) for entry in root.iterdir() if entry.is_dir()}
@@ -0,0 +1,385 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..core.config import Config
+from ..core.logger import Logger
+from ..models.profile import PrefetchConfig, Profile
+from .host_helpers import game_key, mem_available
+from .instance_state import list_process_tree
+
+# Never prefetch more than this share of the memory available at the start,
+# so the rest of the page cache is not evicted for it.
+MEMORY_SHARE = 0.5
+_READ_CHUNK = 1024 * 1024
+# O_NOATIME saves an inode write per file, but only on one's own files.
+_NOATIME = getattr(os, "O_NOATIME", 0)
+# An instance has finished loading once it opened no new game file for this long.
+LOAD_QUIET_SECONDS = 20.0
+# Recording stops after this long even if the instance keeps opening files.
+MAX_RECORD_SECONDS = 600.0
+_RECORD_INTERVAL = 0.5
+# Load times kept per game.
+MAX_LOAD_HISTORY = 20
+
+_MANIFEST_INSTALLDIR = re.compile(r'"installdir"\s+"([^"]+)"')
+
+
+def _steam_library() -> Path:
+    return Path.home() / ".local/share/Steam/steamapps"
+
+
+class PrefetchJob:
+    """
+    One prefetch of an install directory.
+
+    Attributes:
+        game_key (str): Safe name of the game, also the name of its state file.
+        install_dir (Path): The directory being read.
+        cap_bytes (int): Most data the job will read.
+        bytes_read (int): Data read so far.
+        files_read (int): Files read so far, fully or up to the cap.
+        files_total (int): Files found in the directory.
+        learned_files (int): Files ordered by a previous session.
+    """
+
+    def __init__(self, game_key: str, install_dir: Path, cap_bytes: int):
+        self.game_key = game_key
+        self.install_dir = install_dir
+        self.cap_bytes = cap_bytes
+        self.bytes_read = 0
+        self.files_read = 0
+        self.files_total = 0
+        self.learned_files = 0
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+        self._reserved = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, size: int) -> int:
+        """Claims up to `size` bytes of the cap; returns how many were granted."""
+        with self._lock:
+            granted = max(0, min(size, self.cap_bytes - self._reserved))
+            self._reserved += granted
+            return granted
+
+    def account(self, size: int) -> None:
+        with self._lock:
+            self.bytes_read += size
+            self.files_read += 1
+
+    def summary(self) -> dict:
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        mb = self.bytes_read / (1024 * 1024)
+        return {
+            "install_dir": str(self.install_dir),
+            "done": self.done.is_set(),
+            "mb": round(mb, 1),
+            "cap_mb": round(self.cap_bytes / (1024 * 1024), 1),
+            "files": self.files_read,
+            "files_total": self.files_total,
+            "learned_files": self.learned_files,
+            "seconds": round(elapsed, 1),
+            "mb_per_second": round(mb / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+class PrefetchService:
+    """
+    Reads a game's install directory into the page cache before and while
+    its instances start.
+
+    Staggered instances all read the same game files; the first one would
+    otherwise read them cold while the others wait on the same disk. The
+    files are hinted with ``posix_fadvise(WILLNEED)`` and then read through
+    on a bounded pool of workers, in the order in which previous sessions'
+    instances opened them, followed by the files never seen opened. The
+    amount read is capped at the configured size and at half the memory
+    available, so the prefetch cannot push everything else out of the cache.
+
+    The access order is learned by sampling the open files and mappings of
+    each launched instance's process tree. The same samples give the
+    instance's load time (until it stops opening new game files), which is
+    recorded with whether the files were prefetched, so the effect of the
+    prefetch can be reported per game.
+    """
+
+    def __init__(self, logger: Logger, state_dir: Optional[Path] = None):
+        self.logger = logger
+        self.state_dir = Path(state_dir or Config.get_prefetch_dir())
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, PrefetchJob] = {}
+
+    # --- Install directories -------------------------------------------
+
+    def resolve_install_dir(self, profile: Profile) -> Optional[Path]:
+        """Returns the profile's game directory: the configured one, or the Steam app's."""
+        if profile.prefetch.install_dir:
+            path = Path(profile.prefetch.install_dir).expanduser()
+            return path if path.is_dir() else None
+        game_id = profile.game_id
+        if not game_id or not game_id.isdigit():
+            return None
+        manifest = _steam_library() / f"appmanifest_{game_id}.acf"
+        try:
+            match = _MANIFEST_INSTALLDIR.search(manifest.read_text(encoding="utf-8", errors="replace"))
+        except OSError:
+            return None
+        if not match:
+            return None
+        path = _steam_library() / "common" / match.group(1)
+        return path if path.is_dir() else None
+
+    @staticmethod
+    def _profile_key(profile: Profile) -> str:
+        return game_key(profile.game_id or profile.profile_name)
+
+    # --- Prefetch ------------------------------------------------------
+
+    def start(self, profile: Profile) -> Optional[PrefetchJob]:
+        """
+        Starts prefetching the profile's game unless it is already being or
+        has been prefetched; returns the job, or None if there is nothing
+        to prefetch.
+        """
+        config = profile.prefetch
+        if not config.enabled:
+            return None
+        key = self._profile_key(profile)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                return job
+            install_dir = self.resolve_install_dir(profile)
+            if install_dir is None:
+                self.logger.info(f"Prefetch: No install directory found for '{profile.game_id or profile.profile_name}'.")
+                return None
+            job = PrefetchJob(key, install_dir, self._cap_bytes(config))
+            self._jobs[key] = job
+        threading.Thread(target=self._run, args=(job, config), name="prefetch", daemon=True).start()
+        return job
+
+    def wait(self, job: PrefetchJob, seconds: float) -> bool:
+        """Waits up to `seconds` for a job to finish; returns True if it did."""
+        return job.done.wait(seconds)
+
+    def forget(self) -> None:
+        """Drops the finished jobs so the next launch prefetches again."""
+        with self._lock:
+            for key in [k for k, job in self._jobs.items() if job.done.is_set()]:
+                del self._jobs[key]
+
+    def status(self) -> dict:
+        """Returns the progress of each prefetch and the recorded effect on load times."""
+        with self._lock:
+            jobs = dict(self._jobs)
+        return {key: dict(job.summary(), loads=self.load_report(key)) for key, job in jobs.items()}
+
+    @staticmethod
+    def _cap_bytes(config: PrefetchConfig) -> int:
+        cap = config.max_mb * 1024 * 1024
+        available = mem_available()
+        if available is not None:
+            cap = min(cap, int(available * MEMORY_SHARE))
+        return cap
+
+    def _ordered_files(self, job: PrefetchJob) -> List[tuple]:
+        """Returns (path, size) of every file, learned order first."""
+        files: Dict[str, int] = {}
+        for root, dirs, names in os.walk(job.install_dir):
+            dirs.sort()
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path, follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.st_size and os.path.isfile(path) and not os.path.islink(path):
+                    files[os.path.relpath(path, job.install_dir)] = stat.st_size
+        job.files_total = len(files)
+
+        ordered = []
+        for relative in self._load_state(job.game_key).get("order", []):
+            size = files.pop(relative, None)
+            if size is not None:
+                ordered.append((os.path.join(job.install_dir, relative), size))
+        job.learned_files = len(ordered)
+        ordered.extend((os.path.join(job.install_dir, relative), size) for relative, size in files.items())
+        return ordered
+
+    def _run(self, job: PrefetchJob, config: PrefetchConfig) -> None:
+        try:
+            files = self._ordered_files(job)
+            self.logger.info(
+                f"Prefetch: Reading up to {job.cap_bytes / (1024 * 1024):.0f} MB of {len(files)} files "
+                f"from '{job.install_dir}' ({job.learned_files} in learned order)."
+            )
+            # Sizes are granted in file order, so reads follow the learned order
+            # even though the workers finish out of order.
+            with ThreadPoolExecutor(max_workers=config.workers, thread_name_prefix="prefetch") as pool:
+                for path, size in files:
+                    granted = job.reserve(size)
+                    if not granted:
+                        break
+                    pool.submit(self._read_file, job, path, granted)
+        except Exception as e:
+            self.logger.error(f"Prefetch of '{job.install_dir}' failed: {e}")
+        finally:
+            job.finished_at = time.monotonic()
+            job.done.set()
+        summary = job.summary()
+        self.logger.info(
+            f"Prefetch: Read {summary['mb']:.0f} MB in {summary['files']}/{summary['files_total']} files "
+            f"in {summary['seconds']:.1f}s ({summary['mb_per_second']:.0f} MB/s)."
+        )
+
+    def _read_file(self, job: PrefetchJob, path: str, length: int) -> None:
+        read = 0
+        try:
+            fd = os.open(path, os.O_RDONLY | _NOATIME)
+        except PermissionError:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                return
+        except OSError:
+            return
+        try:
+            # Starts asynchronous readahead; the reads below wait for it, so
+            # the job knows when the data is actually cached.
+            os.posix_fadvise(fd, 0, length, os.POSIX_FADV_WILLNEED)
+            buffer = bytearray(_READ_CHUNK)
+            view = memoryview(buffer)
+            while read < length:
+                count = os.readv(fd, [view[:min(_READ_CHUNK, length - read)]])
+                if not count:
+                    break
+                read += count
+        except OSError as e:
+            self.logger.debug(f"Prefetch: Stopped reading '{path}': {e}")
+        finally:
+            os.close(fd)
+            job.account(read)
+
+    # --- Access order and load times -------------------------------------
+
+    def record_instance(self, profile: Profile, instance_num: int, pid: int) -> None:
+        """Learns the order in which a started instance opens the game's files and its load time."""
+        if not profile.prefetch.enabled:
+            return
+        key = self._profile_key(profile)
+        with self._lock:
+            job = self._jobs.get(key)
+        install_dir = job.install_dir if job else self.resolve_install_dir(profile)
+        if install_dir is None:
+            return
+        threading.Thread(
+            target=self._record, args=(key, install_dir, instance_num, pid, job is not None),
+            name=f"prefetch-record-{instance_num}", daemon=True,
+        ).start()
+
+    @staticmethod
+    def _open_files(pid: int, marker: str) -> List[str]:
+        """Returns the game files (relative to the install dir) open or mapped by a process."""
+        paths = []
+        fd_dir = f"/proc/{pid}/fd"
+        try:
+            for fd in os.listdir(fd_dir):
+                try:
+                    paths.append(os.readlink(os.path.join(fd_dir, fd)))
+                except OSError:
+                    continue
+        except OSError:
+            pass
+        try:
+            with open(f"/proc/{pid}/maps", "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    fields = line.split(None, 5)
+                    if len(fields) == 6:
+                        paths.append(fields[5].rstrip("\n"))
+        except OSError:
+            pass
+        # Sandboxes may mount the library elsewhere, so match on the tail
+        return [path.split(marker, 1)[1] for path in paths if marker in path]
+
+    def _record(self, key: str, install_dir: Path, instance_num: int, pid: int, prefetched: bool) -> None:
+        marker = f"steamapps/common/{install_dir.name}/"
+        if "steamapps/common" not in str(install_dir):
+            marker = str(install_dir).rstrip("/") + "/"
+        started = time.monotonic()
+        last_new = None
+        order: List[str] = []
+        seen = set()
+        while True:
+            now = time.monotonic()
+            if not os.path.exists(f"/proc/{pid}"):
+                break
+            if last_new is not None and now - last_new >= LOAD_QUIET_SECONDS:
+                break
+            if now - started >= MAX_RECORD_SECONDS:
+                break
+            for member in list_process_tree(pid):
+                for relative in self._open_files(member, marker):
+                    if relative not in seen:
+                        seen.add(relative)
+                        order.append(relative)
+                        last_new = now
+            time.sleep(_RECORD_INTERVAL)
+        if not order:
+            return
+        load_seconds = round(last_new - started, 1)
+        self._save_session(key, order, {
+            "instance": instance_num, "seconds": load_seconds, "prefetched": prefetched,
+            "files": len(order), "at": int(time.time()),
+        })
+        report = self.load_report(key)
+        comparison = ""
+        if report["with_prefetch"] is not None and report["without_prefetch"] is not None:
+            comparison = (f"; average {report['with_prefetch']:.1f}s with prefetch, "
+                          f"{report['without_prefetch']:.1f}s without")
+        self.logger.info(
+            f"Instance {instance_num}: Loaded {len(order)} game files in {load_seconds:.1f}s"
+            f"{' (prefetched)' if prefetched else ''}{comparison}."
+        )
+
+    def _state_path(self, key: str) -> Path:
+        return self.state_dir / f"{key}.json"
+
+    def _load_state(self, key: str) -> dict:
+        try:
+            return json.loads(self._state_path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_session(self, key: str, order: List[str], load: dict) -> None:
+        with self._lock:
+            state = self._load_state(key)
+            # The latest session decides the order; files it did not open keep
+            # their earlier place at the end.
+            seen = set(order)
+            state["order"] = order + [f for f in state.get("order", []) if f not in seen]
+            state["loads"] = (state.get("loads", []) + [load])[-MAX_LOAD_HISTORY:]
+            try:
+                self.state_dir.mkdir(parents=True, exist_ok=True)
+                path = self._state_path(key)
+                tmp_path = path.with_suffix(".tmp")
+                tmp_path.write_text(json.dumps(state), encoding="utf-8")
+                tmp_path.replace(path)
+            except OSError as e:
+                self.logger.warning(f"Prefetch: Could not save the access order of '{key}': {e}")
+
+    def load_report(self, key: str) -> dict:
+        """Returns the average recorded load time with and without prefetch, and the latest loads."""
+        loads = self._load_state(key).get("loads", [])
+
+        def average(prefetched: bool) -> Optional[float]:
+            times = [load["seconds"] for load in loads if load.get("prefetched") == prefetched]
+            return round(sum(times) / len(times), 1) if times else None
+
+        return {"with_prefetch": average(True), "without_prefetch": average(False), "recent": loads[-5:]}
@@ -0,0 +1,164 @@
+import errno
+import fcntl
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable
+
+from ..core.config import Config
+from ..core.logger import Logger
+
+# ioctl request that shares a file's extents with another (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+# Wine/Proton rewrites these in place by replacing the file, so sharing
+# their data through hard links is safe when reflinks are unavailable.
+_HARDLINK_SAFE_SUFFIXES = (".dll", ".exe", ".drv", ".sys", ".ocx", ".acm", ".tlb", ".nls")
+
+_MACHINE_GUID_RE = re.compile(r'("MachineGuid"=")[^"]*(")')
+
+
+class PrefixCloneService:
+    """
+    Provisions Proton compatdata prefixes for new instances by cloning.
+
+    Building a Wine prefix from scratch takes minutes and hundreds of MB per
+    instance per game. Instead, an existing prefix (from the host Steam or
+    from instance 1) is cloned file by file with reflinks where the
+    filesystem supports them. Otherwise Wine's system libraries can be
+    hard-linked (Proton replaces rather than edits them), and everything
+    else is copied. Per-instance identity is then rewritten so the clones
+    do not share a machine GUID.
+    """
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+
+    @staticmethod
+    def get_source_prefix(source: str, app_id: str) -> Path:
+        if source == "instance1":
+            steam_root = Config.get_steam_home_path(1) / ".local/share/Steam"
+        else:
+            steam_root = Path.home() / ".local/share/Steam"
+        return steam_root / "steamapps/compatdata" / app_id
+
+    def _clone_file(self, src: Path, dst: Path, allow_hardlink: bool, stats: Dict[str, int]) -> None:
+        if stats["reflink_supported"]:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                try:
+                    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                    stats["reflinked"] += 1
+                    return
+                except OSError as e:
+                    if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+                        raise
+                    stats["reflink_supported"] = 0
+            dst.unlink()
+
+        if allow_hardlink and src.name.lower().endswith(_HARDLINK_SAFE_SUFFIXES):
+            try:
+                os.link(src, dst)
+                stats["hardlinked"] += 1
+                return
+            except OSError:
+                pass
+
+        shutil.copyfile(src, dst)
+        stats["copied"] += 1
+        stats["bytes_written"] += src.stat().st_size
+
+    def clone_prefix(self, source: Path, destination: Path, allow_hardlink: bool = False) -> Dict[str, float]:
+        """
+        Clones a compatdata prefix directory.
+
+        Returns:
+            Dict[str, float]: Counts of reflinked, hard-linked and copied
+            files, the bytes actually written and the elapsed seconds.
+        """
+        start = time.perf_counter()
+        stats = {"reflinked": 0, "hardlinked": 0, "copied": 0, "bytes_written": 0, "reflink_supported": 1}
+        staging = destination.with_name(destination.name + ".cloning")
+        if staging.exists():
+            shutil.rmtree(staging)
+
+        try:
+            for root, dirs, files in os.walk(source):
+                target_dir = staging / Path(root).relative_to(source)
+                target_dir.mkdir(parents=True, exist_ok=True)
+                for name in dirs + files:
+                    src = Path(root) / name
+                    dst = target_dir / name
+                    if src.is_symlink():
+                        # dosdevices and Proton's builtin DLL links stay links
+                        os.symlink(os.readlink(src), dst)
+                        if name in dirs:
+                            dirs.remove(name)
+                    elif name in files:
+                        self._clone_file(src, dst, allow_hardlink, stats)
+                        shutil.copystat(src, dst, follow_symlinks=False)
+                shutil.copystat(root, target_dir)
+
+            self._rewrite_identity(staging)
+            staging.rename(destination)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        stats.pop("reflink_supported")
+        stats["elapsed"] = time.perf_counter() - start
+        return stats
+
+    def _rewrite_identity(self, prefix_dir: Path) -> None:
+        """Gives a cloned prefix its own Windows machine GUID."""
+        system_reg = prefix_dir / "pfx/system.reg"
+        if not system_reg.is_file():
+            return
+        content = system_reg.read_text(encoding="utf-8", errors="surrogateescape")
+        new_content = _MACHINE_GUID_RE.sub(rf"\g<1>{uuid.uuid4()}\g<2>", content)
+        if new_content != content:
+            # Write a new file so a reflinked or hard-linked original is untouched
+            tmp_path = system_reg.with_suffix(".reg.tmp")
+            tmp_path.write_text(new_content, encoding="utf-8", errors="surrogateescape")
+            shutil.copystat(system_reg, tmp_path)
+            tmp_path.replace(system_reg)
+
+    def provision(self, clone_config, app_ids: Iterable[str], instance_num: int, steam_root: Path) -> None:
+        """
+        Clones every configured prefix that the instance does not have yet.
+
+        Args:
+            clone_config (PrefixCloneConfig): The profile's cloning settings.
+            app_ids (Iterable[str]): Steam app ids whose prefixes to provide.
+            instance_num (int): The instance being prepared.
+            steam_root (Path): The instance's isolated Steam root.
+        """
+        if not clone_config.enabled:
+            return
+        if clone_config.source == "instance1" and instance_num == 1:
+            return
+        compatdata = steam_root / "steamapps/compatdata"
+        for app_id in app_ids:
+            destination = compatdata / app_id
+            if destination.exists():
+                continue
+            source = self.get_source_prefix(clone_config.source, app_id)
+            if not (source / "pfx").is_dir():
+                self.logger.warning(
+                    f"Instance {instance_num}: No prefix for app {app_id} at '{source}' to clone."
+                )
+                continue
+            compatdata.mkdir(parents=True, exist_ok=True)
+            try:
+                stats = self.clone_prefix(source, destination, clone_config.allow_hardlinks)
+            except OSError as e:
+                self.logger.error(f"Instance {instance_num}: Failed to clone prefix for app {app_id}: {e}")
+                continue
+            self.logger.info(
+                f"Instance {instance_num}: Cloned prefix for app {app_id} in {stats['elapsed']:.2f}s "
+                f"({stats['reflinked']} reflinked, {stats['hardlinked']} hard-linked, {stats['copied']} copied, "
+                f"{stats['bytes_written'] / (1024 * 1024):.1f} MB written)."
+            )
+
@@ -0,0 +1,259 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from ..core.config import Config
+from ..core.logger import Logger
+from ..models.profile import PressureGovernorConfig
+
+PSI_ROOT = "/proc/pressure"
+
+# Responses, from mildest to harshest. An instance at stage N has the
+# first N applied.
+FPS_CAP = "fps_cap"
+CPU_WEIGHT = "cpu_weight"
+PAUSE = "pause"
+STAGES = (FPS_CAP, CPU_WEIGHT, PAUSE)
+
+# avg10 needs about ten seconds to reflect a change, so the governor waits
+# that long after acting before it judges the result.
+SETTLE_SECONDS = 10.0
+# A response is undone once pressure falls below this share of its threshold.
+RELEASE_FACTOR = 0.5
+
+
+def read_psi(path: str) -> Dict[str, Dict[str, float]]:
+    """
+    Parses a PSI file (``/proc/pressure/*`` or a cgroup's ``*.pressure``).
+
+    Returns:
+        Dict[str, Dict[str, float]]: ``{"some": {"avg10": ..., ...}, "full": {...}}``;
+        empty if the file cannot be read.
+    """
+    result: Dict[str, Dict[str, float]] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return result
+    for line in lines:
+        kind, _, rest = line.partition(" ")
+        values = {}
+        for field in rest.split():
+            key, _, value = field.partition("=")
+            try:
+                values[key] = float(value)
+            except ValueError:
+                continue
+        result[kind] = values
+    return result
+
+
+class _Tracked:
+    __slots__ = ("instance_num", "priority", "stage", "applied")
+
+    def __init__(self, instance_num: int, priority: int):
+        self.instance_num = instance_num
+        self.priority = priority
+        self.stage = 0
+        # Responses that actually took effect, and so must be undone
+        self.applied: set = set()
+
+
+class PressureGovernor:
+    """
+    Sheds load from the least important instances under host pressure.
+
+    The governor reads the ``some avg10`` stall share of the configured
+    resources from ``/proc/pressure`` and from each instance's own cgroup
+    when it has one, and takes the highest as the current pressure. Each
+    threshold it exceeds calls for one more response: capping the frame
+    rate, lowering the CPU weight, and pausing. Responses are applied one
+    at a time, `SETTLE_SECONDS` apart, to the least important instance
+    that has fewer than the called-for responses; the most important
+    instance is never touched. Once pressure stays below `RELEASE_FACTOR`
+    of a response's threshold for `recover_seconds`, responses are undone
+    in reverse order, most important instance first.
+
+    Actions are carried out by the `apply` callback and every one is
+    written to its own log with the pressure that caused it.
+    """
+
+    def __init__(self, logger: Logger, apply: Callable[[int, str, Optional[int]], bool],
+                 cgroup_of: Optional[Callable[[int], Optional[str]]] = None,
+                 pressure_root: str = PSI_ROOT, poll_interval: float = 2.0):
+        """
+        Args:
+            logger (Logger): Logger for governor events.
+            apply (Callable[[int, str, Optional[int]], bool]): Applies a
+                response to an instance, with its value (capped FPS, CPU
+                weight, 1 for pause), or undoes it when the value is None.
+                Returns False if the response is unavailable.
+            cgroup_of (Optional[Callable[[int], Optional[str]]]): Returns an
+                instance's cgroup directory, if it has one.
+            pressure_root (str): Directory of the system PSI files.
+            poll_interval (float): Seconds between evaluations.
+        """
+        self.logger = logger
+        self.action_logger = Logger("MultiScope-Pressure", Config.LOG_DIR)
+        self.config = PressureGovernorConfig()
+        self._apply = apply
+        self._cgroup_of = cgroup_of
+        self._pressure_root = pressure_root
+        self._poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._instances: Dict[int, _Tracked] = {}
+        self._last_action = float("-inf")
+        self._calm_since: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def configure(self, config: PressureGovernorConfig) -> None:
+        self.config = config
+
+    def track(self, instance_num: int, priority: int = 0) -> None:
+        """Starts governing a running instance."""
+        with self._lock:
+            self._instances[instance_num] = _Tracked(instance_num, priority)
+        self._ensure_thread()
+
+    def untrack(self, instance_num: int) -> None:
+        """Stops governing an instance that exited; nothing is undone."""
+        with self._lock:
+            self._instances.pop(instance_num, None)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+        self._stop.clear()
+        with self._lock:
+            self._instances.clear()
+
+    def snapshot(self) -> dict:
+        """Returns the current pressure readings and each instance's stage."""
+        readings = self.read_pressure()
+        with self._lock:
+            stages = {n: list(STAGES[:t.stage]) for n, t in self._instances.items()}
+        return {"pressure": readings, "stages": stages}
+
+    # --- Readings ------------------------------------------------------
+
+    def read_pressure(self) -> Dict[str, Dict[str, float]]:
+        """Returns the ``some avg10`` of each resource, for the system and per instance cgroup."""
+        readings = {"system": self._read_group(self._pressure_root, "{}")}
+        if self._cgroup_of:
+            with self._lock:
+                instance_nums = list(self._instances)
+            for instance_num in instance_nums:
+                path = self._cgroup_of(instance_num)
+                if path:
+                    group = self._read_group(path, "{}.pressure")
+                    if group:
+                        readings[str(instance_num)] = group
+        return readings
+
+    def _read_group(self, directory: str, name_format: str) -> Dict[str, float]:
+        group = {}
+        for resource in self.config.resources:
+            psi = read_psi(os.path.join(directory, name_format.format(resource)))
+            if "some" in psi:
+                group[resource] = psi["some"].get("avg10", 0.0)
+        return group
+
+    # --- Decisions -----------------------------------------------------
+
+    def evaluate(self, now: Optional[float] = None) -> Optional[tuple]:
+        """
+        Reads the pressure and takes at most one action.
+
+        Returns:
+            Optional[tuple]: ``(instance_num, action, engaged)`` of the
+            action taken, or None.
+        """
+        now = time.monotonic() if now is None else now
+        readings = self.read_pressure()
+        pressure = max((v for group in readings.values() for v in group.values()), default=0.0)
+        if now - self._last_action < SETTLE_SECONDS:
+            return None
+
+        thresholds = (self.config.fps_cap_at, self.config.cpu_weight_at, self.config.pause_at)
+        level = sum(1 for threshold in thresholds if pressure >= threshold)
+        with self._lock:
+            # Least important first; the most important instance is spared
+            ordered = sorted(self._instances.values(), key=lambda t: (t.priority, -t.instance_num))
+        candidates = ordered[:-1]
+
+        for tracked in candidates:
+            if tracked.stage < level:
+                self._calm_since = None
+                return self._step(tracked, True, pressure, readings, now)
+
+        for tracked in reversed(candidates):
+            if tracked.stage == 0:
+                continue
+            if pressure >= thresholds[tracked.stage - 1] * RELEASE_FACTOR:
+                self._calm_since = None
+                return None
+            if self._calm_since is None:
+                self._calm_since = now
+            if now - self._calm_since < self.config.recover_seconds:
+                return None
+            self._calm_since = None
+            return self._step(tracked, False, pressure, readings, now)
+        self._calm_since = None
+        return None
+
+    def _step(self, tracked: _Tracked, engage: bool, pressure: float, readings: dict, now: float) -> tuple:
+        """Applies the instance's next response, or undoes its last one."""
+        action = STAGES[tracked.stage] if engage else STAGES[tracked.stage - 1]
+        value = None
+        if engage:
+            value = {FPS_CAP: self.config.capped_fps, CPU_WEIGHT: self.config.cpu_weight, PAUSE: 1}[action]
+        if engage or action in tracked.applied:
+            try:
+                applied = self._apply(tracked.instance_num, action, value)
+            except Exception as e:
+                self.logger.error(f"Instance {tracked.instance_num}: Pressure response '{action}' failed: {e}")
+                applied = False
+        else:
+            applied = False
+
+        if engage:
+            tracked.stage += 1
+            if applied:
+                tracked.applied.add(action)
+        else:
+            tracked.stage -= 1
+            tracked.applied.discard(action)
+        self._last_action = now
+
+        verb = "apply" if engage else "release"
+        outcome = "ok" if applied else ("unavailable" if engage else "skipped")
+        self.action_logger.info(
+            f"t={time.time():.3f} instance={tracked.instance_num} priority={tracked.priority} "
+            f"action={verb}:{action} value={value} outcome={outcome} pressure={pressure:.1f} readings={readings}"
+        )
+        self.logger.info(
+            f"Instance {tracked.instance_num}: Pressure {pressure:.1f}% -> {verb} {action}"
+            f"{'' if applied else f' ({outcome})'}."
+        )
+        return tracked.instance_num, action, engage
+
+    def _ensure_thread(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="pressure-governor", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._poll_interval):
+            with self._lock:
+                if not self._instances:
+                    return
+            try:
+                self.evaluate()
+            except Exception as e:
+                self.logger.error(f"Pressure governor evaluation failed: {e}")
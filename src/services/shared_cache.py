@@ -0,0 +1,113 @@
+import fcntl
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..core.config import Config
+from ..core.logger import Logger
+
+# Cache directories relative to the Steam root that can be shared.
+CACHE_DIRS: Dict[str, str] = {
+    "shadercache": "steamapps/shadercache",
+    "depotcache": "depotcache",
+    "appcache": "appcache",
+}
+
+
+def directory_size(path: Path) -> int:
+    """Returns the apparent size in bytes of all files below `path`."""
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class SharedCacheService:
+    """
+    Shares Steam's shader, depot and app caches between instances.
+
+    Each cache type is bind-mounted into the sandbox from the host Steam
+    directory or from a MultiScope-owned shared directory, either read-only
+    or read-write. Concurrent Steam clients writing the same cache can
+    corrupt it, so read-write access is granted to one instance at a time
+    through an exclusive `flock` on a lock file per cache, kept under
+    `Config.get_cache_lock_dir()` so host Steam directories are not written
+    to; other instances asking for read-write get the cache read-only
+    instead. Locks are held until the instance is terminated.
+    """
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+        self._locks: Dict[int, List[int]] = {}
+
+    @staticmethod
+    def get_source_dir(cache_type: str, source: str) -> Path:
+        if source == "host":
+            return Path.home() / ".local/share/Steam" / CACHE_DIRS[cache_type]
+        return Config.get_shared_cache_dir() / cache_type
+
+    def _try_lock(self, cache_type: str, source: str) -> Optional[int]:
+        lock_dir = Config.get_cache_lock_dir()
+        lock_dir.mkdir(parents=True, exist_ok=True)
+        fd = os.open(lock_dir / f"{source}_{cache_type}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def get_bind_args(self, cache_config, instance_num: int, sandbox_steam_root: Path,
+                      dry_run: bool = False) -> List[str]:
+        """
+        Returns the bwrap arguments that mount the shared caches.
+
+        Args:
+            cache_config (CacheSharingConfig): The profile's sharing policy.
+            instance_num (int): The instance being launched.
+            sandbox_steam_root (Path): The Steam root as seen in the sandbox.
+            dry_run (bool): Report the requested modes without taking locks
+                or creating directories.
+        """
+        args: List[str] = []
+        for cache_type in CACHE_DIRS:
+            mode = getattr(cache_config, cache_type)
+            if mode == "off":
+                continue
+            source_dir = self.get_source_dir(cache_type, cache_config.source)
+            if cache_config.source == "host" and not source_dir.is_dir():
+                self.logger.warning(
+                    f"Instance {instance_num}: Host {cache_type} '{source_dir}' not found; not sharing it."
+                )
+                continue
+            if not dry_run:
+                source_dir.mkdir(parents=True, exist_ok=True)
+
+            if mode == "rw" and not dry_run:
+                fd = self._try_lock(cache_type, cache_config.source)
+                if fd is None:
+                    self.logger.info(
+                        f"Instance {instance_num}: {cache_type} is being written by another instance; sharing it read-only."
+                    )
+                    mode = "ro"
+                else:
+                    self._locks.setdefault(instance_num, []).append(fd)
+
+            target = sandbox_steam_root / CACHE_DIRS[cache_type]
+            bind_flag = "--bind" if mode == "rw" else "--ro-bind"
+            args.extend([bind_flag, str(source_dir), str(target)])
+            self.logger.info(f"Instance {instance_num}: Sharing {cache_type} ({mode}) from '{source_dir}'.")
+        return args
+
+    def release(self, instance_num: int) -> None:
+        """Releases the read-write cache locks held for an instance."""
+        for fd in self._locks.pop(instance_num, []):
+            try:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+            except OSError:
+                pass
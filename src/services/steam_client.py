@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..core.config import Config
+from ..core.logger import Logger
+from .instance_state import list_process_tree, read_proc_cpu_ticks, read_proc_pss
+
+FULL = "full"
+LITE = "lite"
+MINIMAL = "minimal"
+
+# Options the Steam client and its CEF web helper accept that shrink the
+# client: no GPU process or compositing in steamwebhelper, and no friends
+# or chat windows (and so none of their web views).
+_LITE_FLAGS = ["-cef-disable-gpu-compositing", "-cef-disable-gpu", "-nofriendsui", "-nochatui"]
+# Minimal mode also runs CEF in one process and, outside gamescope, opens
+# the small mode library instead of the full one.
+_MINIMAL_FLAGS = _LITE_FLAGS + ["-cef-single-process"]
+_SMALL_MODE_URL = "steam://open/minigameslist"
+# Keeps the in-game overlay from drawing; it is injected into every game.
+_LOW_FOOTPRINT_ENV = {"SteamNoOverlayUIDrawing": "1"}
+
+# The client only settles once the web helper has loaded the library and
+# the initial update check is over.
+SETTLE_SECONDS = 120.0
+SAMPLE_SECONDS = 30.0
+# Measurements kept per mode.
+MAX_SAMPLES = 20
+
+
+def build_steam_command(mode: str, use_gamescope: bool) -> List[str]:
+    """Returns the Steam client command of a client mode."""
+    if mode == FULL:
+        return ["steam", "-gamepadui", "-steamdeck", "-steamos3"] if use_gamescope else ["steam"]
+    # Gamescope sessions still need the gamepad UI to be usable
+    if mode == LITE:
+        return ["steam"] + (["-gamepadui"] if use_gamescope else []) + _LITE_FLAGS
+    if use_gamescope:
+        return ["steam", "-gamepadui"] + _MINIMAL_FLAGS
+    return ["steam"] + _MINIMAL_FLAGS + [_SMALL_MODE_URL]
+
+
+def client_environment(mode: str) -> Dict[str, str]:
+    """Returns the environment variables a client mode sets."""
+    return {} if mode == FULL else dict(_LOW_FOOTPRINT_ENV)
+
+
+def _is_client_process(pid: int) -> bool:
+    """Matches steam, steamwebhelper and the runtime's steam-* helpers, not the game."""
+    try:
+        with open(f"/proc/{pid}/comm", "r", encoding="utf-8") as f:
+            return f.read().strip().lower().startswith("steam")
+    except OSError:
+        return False
+
+
+def _read_rss(pid: int) -> int:
+    """Returns the resident set size of a process in bytes, or 0."""
+    try:
+        with open(f"/proc/{pid}/statm", "r", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class ClientFootprintMonitor:
+    """
+    Measures the steady-state footprint of each instance's Steam client.
+
+    Once an instance's client has had `SETTLE_SECONDS` to settle, the RSS,
+    PSS and CPU usage of the client processes in its tree (the game is left
+    out) are sampled over `SAMPLE_SECONDS`. Measurements are kept per client
+    mode, so the light modes can be compared with the full client.
+    """
+
+    def __init__(self, logger: Logger, history_path: Optional[Path] = None):
+        self.logger = logger
+        self.history_path = Path(history_path or Config.get_client_footprint_path())
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def measure(self, instance_num: int, pid: int, mode: str) -> None:
+        """Measures an instance's client in the background once it has settled."""
+        self._stop.clear()
+        threading.Thread(
+            target=self._measure, args=(instance_num, pid, mode),
+            name=f"client-footprint-{instance_num}", daemon=True,
+        ).start()
+
+    def stop(self) -> None:
+        """Abandons measurements in progress; the session is ending."""
+        self._stop.set()
+
+    def _measure(self, instance_num: int, pid: int, mode: str) -> None:
+        if self._stop.wait(SETTLE_SECONDS) or not os.path.exists(f"/proc/{pid}"):
+            return
+        clients = [member for member in list_process_tree(pid) if _is_client_process(member)]
+        if not clients:
+            return
+        ticks_start = sum(read_proc_cpu_ticks(member) for member in clients)
+        start = time.monotonic()
+        if self._stop.wait(SAMPLE_SECONDS) or not os.path.exists(f"/proc/{pid}"):
+            return
+        elapsed = time.monotonic() - start
+        ticks_end = sum(read_proc_cpu_ticks(member) for member in clients)
+        mb = 1024 * 1024
+        sample = {
+            "instance": instance_num,
+            "processes": len(clients),
+            "rss_mb": round(sum(_read_rss(member) for member in clients) / mb, 1),
+            "pss_mb": round(sum(read_proc_pss(member) for member in clients) / mb, 1),
+            "cpu_pct": round(max(0, ticks_end - ticks_start) / os.sysconf("SC_CLK_TCK") / elapsed * 100, 1),
+            "at": int(time.time()),
+        }
+        self._save_sample(mode, sample)
+        self.logger.info(
+            f"Instance {instance_num}: Steam client ({mode}) settled at {sample['rss_mb']:.0f} MB RSS, "
+            f"{sample['pss_mb']:.0f} MB PSS, {sample['cpu_pct']:.1f}% CPU in {len(clients)} processes."
+        )
+
+    def _load_history(self) -> dict:
+        try:
+            return json.loads(self.history_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_sample(self, mode: str, sample: dict) -> None:
+        with self._lock:
+            history = self._load_history()
+            history[mode] = (history.get(mode, []) + [sample])[-MAX_SAMPLES:]
+            try:
+                self.history_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.history_path.with_suffix(".tmp")
+                tmp_path.write_text(json.dumps(history), encoding="utf-8")
+                tmp_path.replace(self.history_path)
+            except OSError as e:
+                self.logger.warning(f"Could not save the Steam client footprint: {e}")
+
+    def report(self) -> dict:
+        """
+        Returns the average footprint of each client mode measured so far,
+        with the difference to the full client where both were measured.
+        """
+        history = self._load_history()
+        modes = {}
+        for mode, samples in history.items():
+            if not samples:
+                continue
+            modes[mode] = {
+                key: round(sum(s[key] for s in samples) / len(samples), 1)
+                for key in ("rss_mb", "pss_mb", "cpu_pct", "processes")
+            }
+            modes[mode]["samples"] = len(samples)
+        full = modes.get(FULL)
+        if full:
+            for mode, averages in modes.items():
+                if mode != FULL:
+                    averages["vs_full"] = {
+                        key: round(averages[key] - full[key], 1) for key in ("rss_mb", "pss_mb", "cpu_pct")
+                    }
+        return modes
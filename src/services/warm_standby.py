@@ -0,0 +1,252 @@
+import signal
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from ..core.logger import Logger
+from ..models.launch_plan import InstancePlan
+from ..models.profile import WarmStandbyConfig
+from .host_helpers import mem_available
+from .instance_state import list_process_tree, read_proc_pss, signal_process_tree
+
+# Memory assumed for a standby before one has been measured.
+DEFAULT_STANDBY_ESTIMATE = 600 * 1024 * 1024
+
+
+class Standby:
+    """
+    An instance started ahead of Play.
+
+    Attributes:
+        instance_num (int): The instance it will become.
+        key (str): Hash of the profile it was started for.
+        plan (InstancePlan): The plan it was started from.
+        process (subprocess.Popen): The launcher process.
+        spawned_at (float): Monotonic time of the spawn.
+        ready_at (Optional[float]): When warm-up ended and it was held.
+        pss_bytes (int): Last measured memory of its process tree.
+    """
+    __slots__ = ("instance_num", "key", "plan", "process", "spawned_at", "ready_at", "pss_bytes", "stopped")
+
+    def __init__(self, instance_num: int, key: str, plan: InstancePlan, process: subprocess.Popen):
+        self.instance_num = instance_num
+        self.key = key
+        self.plan = plan
+        self.process = process
+        self.spawned_at = time.monotonic()
+        self.ready_at: Optional[float] = None
+        self.pss_bytes = 0
+        self.stopped = False
+
+    def warmed_seconds(self, now: float) -> float:
+        """Startup time already spent; after `ready_at` a standby is only held."""
+        end = self.ready_at if self.ready_at else now
+        return max(0.0, end - self.spawned_at)
+
+
+class WarmStandbyPool:
+    """
+    Holds instances that were started before the user pressed Play.
+
+    A standby runs its normal startup (sandbox, compositor and Steam
+    client) for `warmup_seconds` and is then held: stopped with SIGSTOP,
+    so it uses no CPU, or left idle. Committing resumes it, so the time it
+    already spent starting up is saved.
+
+    Standbys are keyed by a hash of the profile they were started for and
+    are discarded when the key no longer matches. Their combined memory is
+    measured as PSS and kept within the configured budget by discarding the
+    most recently started ones.
+    """
+
+    def __init__(self, logger: Logger, on_discard: Callable[[int], None], poll_interval: float = 1.0):
+        """
+        Args:
+            logger (Logger): Logger for standby events.
+            on_discard (Callable[[int], None]): Releases the resources an
+                instance's plan acquired, after its standby was killed.
+            poll_interval (float): Seconds between warm-up and memory checks.
+        """
+        self.logger = logger
+        self.config = WarmStandbyConfig()
+        self._on_discard = on_discard
+        self._poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._standbys: Dict[int, Standby] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._metrics = {
+            "spawned": 0, "committed": 0, "invalidated": 0, "evicted": 0, "exited": 0,
+            "seconds_saved": 0.0, "last_saved": {},
+        }
+
+    # --- Membership ----------------------------------------------------
+
+    def instance_nums(self) -> List[int]:
+        with self._lock:
+            return sorted(self._standbys)
+
+    def has(self, instance_num: int) -> bool:
+        with self._lock:
+            return instance_num in self._standbys
+
+    def has_room(self) -> bool:
+        """Returns True if one more standby is expected to fit the memory budget."""
+        budget = self.config.memory_budget_mb * 1024 * 1024
+        with self._lock:
+            used = sum(s.pss_bytes for s in self._standbys.values())
+            measured = [s.pss_bytes for s in self._standbys.values() if s.pss_bytes]
+        estimate = max(measured) if measured else DEFAULT_STANDBY_ESTIMATE
+        available = mem_available()
+        return used + estimate <= budget and (available is None or estimate <= available)
+
+    def add(self, instance_num: int, key: str, plan: InstancePlan, process: subprocess.Popen) -> None:
+        with self._lock:
+            self._standbys[instance_num] = Standby(instance_num, key, plan, process)
+            self._metrics["spawned"] += 1
+        self.logger.info(f"Instance {instance_num}: Warm standby started (PID {process.pid}).")
+        self._ensure_monitor()
+
+    def take(self, instance_num: int, key: str,
+             validate: Optional[Callable[[InstancePlan], Optional[str]]] = None) -> Optional[Standby]:
+        """
+        Removes and resumes the standby of an instance if it matches `key`.
+
+        A standby that was started for another key, whose process exited,
+        or whose plan `validate` rejects (by returning a reason) is
+        discarded and None is returned.
+        """
+        with self._lock:
+            standby = self._standbys.pop(instance_num, None)
+            # Resumed under the lock the monitor holds to stop it, so a
+            # standby is never stopped again once it was taken.
+            if standby is not None and standby.stopped:
+                signal_process_tree(standby.process.pid, signal.SIGCONT)
+                standby.stopped = False
+        if standby is None:
+            return None
+        if standby.key != key:
+            self._kill(standby, "the profile changed", "invalidated")
+            return None
+        if standby.process.poll() is not None:
+            self._kill(standby, "it exited", "exited")
+            return None
+        reason = validate(standby.plan) if validate else None
+        if reason:
+            self._kill(standby, reason, "invalidated")
+            return None
+        saved = standby.warmed_seconds(time.monotonic())
+        with self._lock:
+            self._metrics["committed"] += 1
+            self._metrics["seconds_saved"] += saved
+            self._metrics["last_saved"][instance_num] = round(saved, 1)
+        self.logger.info(f"Instance {instance_num}: Released warm standby; saved {saved:.1f}s of startup.")
+        return standby
+
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """Discards every standby not started for `key` (all of them if None); returns how many."""
+        with self._lock:
+            stale = [s for s in self._standbys.values() if key is None or s.key != key]
+            for standby in stale:
+                del self._standbys[standby.instance_num]
+        for standby in stale:
+            self._kill(standby, "the profile changed" if key else "standby was cancelled", "invalidated")
+        return len(stale)
+
+    def clear(self) -> None:
+        """Discards every standby and stops the monitor."""
+        self.invalidate()
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def metrics(self) -> dict:
+        """Returns counters, time saved and the memory currently held."""
+        with self._lock:
+            metrics = dict(self._metrics, last_saved=dict(self._metrics["last_saved"]))
+            metrics["standby"] = {
+                num: {
+                    "pid": s.process.pid,
+                    "held": s.ready_at is not None,
+                    "pss_mb": round(s.pss_bytes / (1024 * 1024), 1),
+                }
+                for num, s in self._standbys.items()
+            }
+        metrics["seconds_saved"] = round(metrics["seconds_saved"], 1)
+        metrics["memory_budget_mb"] = self.config.memory_budget_mb
+        return metrics
+
+    def _kill(self, standby: Standby, reason: str, counter: str) -> None:
+        self.logger.info(f"Instance {standby.instance_num}: Discarding warm standby because {reason}.")
+        if standby.process.poll() is None:
+            # The whole tree, since the sandbox runs in its own session;
+            # SIGKILL also ends stopped processes.
+            signal_process_tree(standby.process.pid, signal.SIGKILL)
+            try:
+                standby.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.logger.warning(f"Instance {standby.instance_num}: Standby PID {standby.process.pid} did not exit.")
+        with self._lock:
+            self._metrics[counter] += 1
+        self._on_discard(standby.instance_num)
+
+    # --- Warm-up and budget --------------------------------------------
+
+    def _ensure_monitor(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._monitor, name="warm-standby", daemon=True)
+        self._thread.start()
+
+    def _monitor(self) -> None:
+        while not self._stop_event.wait(self._poll_interval):
+            with self._lock:
+                standbys = list(self._standbys.values())
+            if not standbys:
+                return
+            now = time.monotonic()
+            for standby in standbys:
+                if standby.process.poll() is not None:
+                    if self._detach(standby):
+                        self._kill(standby, "it exited during warm-up", "exited")
+                    continue
+                if standby.ready_at is None:
+                    # Memory grows during startup; held standbys are measured once
+                    standby.pss_bytes = sum(read_proc_pss(pid) for pid in list_process_tree(standby.process.pid))
+                    if now - standby.spawned_at >= self.config.warmup_seconds:
+                        self._hold(standby, now)
+            self._enforce_budget()
+
+    def _hold(self, standby: Standby, now: float) -> None:
+        with self._lock:
+            # take() may have handed it to Play since the monitor looked
+            if self._standbys.get(standby.instance_num) is not standby:
+                return
+            standby.ready_at = now
+            if self.config.hold == "stop":
+                signal_process_tree(standby.process.pid, signal.SIGSTOP)
+                standby.stopped = True
+        self.logger.info(
+            f"Instance {standby.instance_num}: Warm standby ready after {now - standby.spawned_at:.1f}s "
+            f"({standby.pss_bytes / (1024 * 1024):.0f} MB), {'stopped' if standby.stopped else 'idle'} until Play."
+        )
+
+    def _detach(self, standby: Standby) -> bool:
+        with self._lock:
+            return self._standbys.pop(standby.instance_num, None) is standby
+
+    def _enforce_budget(self) -> None:
+        budget = self.config.memory_budget_mb * 1024 * 1024
+        with self._lock:
+            newest_first = sorted(self._standbys.values(), key=lambda s: s.spawned_at, reverse=True)
+        used = sum(s.pss_bytes for s in newest_first)
+        for standby in newest_first:
+            if used <= budget:
+                break
+            if self._detach(standby):
+                used -= standby.pss_bytes
+                self._kill(standby, f"standbys exceed the {self.config.memory_budget_mb} MB memory budget", "evicted")
+
@@ -0,0 +1,19 @@
+import subprocess
+
+import pytest
+
+from src.core.logger import Logger
+
+
+@pytest.fixture
+def logger(tmp_path):
+    return Logger("MultiScope-Test", tmp_path / "logs")
+
+
+@pytest.fixture
+def process():
+    """A process standing in for an instance's."""
+    proc = subprocess.Popen(["sleep", "30"])
+    yield proc
+    proc.kill()
+    proc.wait()
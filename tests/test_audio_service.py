@@ -0,0 +1,134 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from src.services.audio_service import AudioService, instance_sink_name
+
+# Keeps the loaded modules in a JSON file next to itself and logs every call
+STUB_PACTL = '''#!{python}
+import json, os, sys
+here = os.path.dirname(os.path.abspath(__file__))
+state_path = os.path.join(here, "modules.json")
+state = json.load(open(state_path)) if os.path.exists(state_path) else {{"next": 30, "modules": []}}
+args = sys.argv[1:]
+with open(os.path.join(here, "calls.log"), "a") as log:
+    log.write(json.dumps(args) + "\\n")
+if args[:3] == ["list", "short", "modules"]:
+    for index, name, arguments in state["modules"]:
+        print(f"{{index}}\\t{{name}}\\t{{arguments}}\\t")
+elif args[0] == "load-module":
+    state["modules"].append([state["next"], args[1], " ".join(args[2:])])
+    print(state["next"])
+    state["next"] += 1
+elif args[0] == "unload-module":
+    state["modules"] = [m for m in state["modules"] if str(m[0]) != args[1]]
+json.dump(state, open(state_path, "w"))
+'''
+
+
+class StubPactl:
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = directory / "pactl"
+        self.path.write_text(STUB_PACTL.format(python=sys.executable), encoding="utf-8")
+        self.path.chmod(0o755)
+
+    def calls(self, command=None):
+        log = self.directory / "calls.log"
+        lines = log.read_text(encoding="utf-8").splitlines() if log.exists() else []
+        calls = [json.loads(line) for line in lines]
+        return [call for call in calls if command is None or call[0] == command]
+
+    def modules(self):
+        state = json.loads((self.directory / "modules.json").read_text(encoding="utf-8"))
+        return {index: (name, arguments) for index, name, arguments in state["modules"]}
+
+    def load(self, name, arguments):
+        """Loads a module behind the service's back."""
+        subprocess.run([str(self.path), "load-module", name, *arguments.split()], check=True, capture_output=True)
+
+
+@pytest.fixture
+def pactl(tmp_path):
+    return StubPactl(tmp_path)
+
+
+@pytest.fixture
+def audio(pactl, logger):
+    return AudioService(logger, pactl=str(pactl.path))
+
+
+def test_repeated_ensure_loads_nothing_new(audio, pactl):
+    assert audio.ensure_instance_sink(1, loopback=True, output="alsa_output.hdmi", latency_msec=20)
+    loaded = pactl.modules()
+    assert sorted(name for name, _ in loaded.values()) == ["module-loopback", "module-null-sink"]
+
+    for _ in range(3):
+        assert audio.ensure_instance_sink(1, loopback=True, output="alsa_output.hdmi", latency_msec=20)
+    assert len(pactl.calls("load-module")) == 2
+    assert pactl.calls("unload-module") == []
+    assert pactl.modules() == loaded
+
+
+@pytest.mark.parametrize("change", [
+    {"output": "alsa_output.usb"},
+    {"latency_msec": 60},
+    {"loopback": False},
+])
+def test_changed_sink_replaces_the_modules(audio, pactl, change):
+    wanted = dict(loopback=True, output="alsa_output.hdmi", latency_msec=20)
+    audio.ensure_instance_sink(1, **wanted)
+    before = set(pactl.modules())
+
+    wanted.update(change)
+    assert audio.ensure_instance_sink(1, **wanted)
+    after = pactl.modules()
+    assert not before & set(after)
+    loopbacks = [arguments for name, arguments in after.values() if name == "module-loopback"]
+    if wanted["loopback"]:
+        (arguments,) = loopbacks
+        assert f"sink={wanted['output']}" in arguments.split()
+        assert f"latency_msec={wanted['latency_msec']}" in arguments.split()
+    else:
+        assert loopbacks == []
+
+
+def test_loopback_is_unloaded_before_the_null_sink(audio, pactl):
+    audio.ensure_instance_sink(1, loopback=True)
+    index_of = {name: str(index) for index, (name, _) in pactl.modules().items()}
+
+    assert audio.remove_instance_sink(1) == 2
+    assert pactl.calls("unload-module") == [
+        ["unload-module", index_of["module-loopback"]], ["unload-module", index_of["module-null-sink"]],
+    ]
+    assert pactl.modules() == {}
+    # Nothing is left to remove
+    assert audio.remove_instance_sink(1) == 0
+
+
+def test_sinks_of_other_instances_are_kept(audio, pactl):
+    audio.ensure_instance_sink(1, loopback=True)
+    audio.ensure_instance_sink(2, loopback=True)
+    audio.remove_instance_sink(1)
+    assert all(instance_sink_name(2) in arguments for _, arguments in pactl.modules().values())
+    assert len(pactl.modules()) == 2
+
+
+def test_adopt_removes_sinks_of_instances_that_are_gone(pactl, logger):
+    # Left behind by a previous MultiScope process
+    previous = AudioService(logger, pactl=str(pactl.path))
+    for instance_num in (1, 2, 3):
+        previous.ensure_instance_sink(instance_num, loopback=True)
+    pactl.load("module-null-sink", "sink_name=someone_elses_sink")
+
+    audio = AudioService(logger, pactl=str(pactl.path))
+    audio.adopt_instance_sinks([2])
+
+    remaining = [arguments for _, arguments in pactl.modules().values()]
+    assert not any(instance_sink_name(n) in arguments for n in (1, 3) for arguments in remaining)
+    assert sum(instance_sink_name(2) in arguments for arguments in remaining) == 2
+    assert "sink_name=someone_elses_sink" in remaining
+    # The adopted sink is still removed when its instance ends
+    assert audio.remove_instance_sink(2) == 2
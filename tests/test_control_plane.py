@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+
+from src.core.exceptions import ControlPlaneError, InstanceStateError
+from src.models.profile import Profile
+from src.services.control_plane import ControlClient, ControlDaemon
+from src.services.instance_registry import RUNNING, STARTING, STOPPED, SUSPENDED
+
+
+class FakeRegistry:
+    """Answers status queries from a fixed snapshot and records the calls it gets."""
+
+    def __init__(self, states):
+        self.states = states
+        self.calls = []
+
+    def status(self):
+        return {num: {"state": state} for num, state in self.states.items()}
+
+    def launch_instance(self, instance_num, profile=None, use_gamescope_override=None):
+        self.calls.append(("launch", instance_num, profile, use_gamescope_override))
+        return {"instance": instance_num, "state": RUNNING}
+
+    def stop_instance(self, instance_num):
+        self.calls.append(("stop", instance_num))
+        self.states[instance_num] = STOPPED
+        return {"instance": instance_num, "state": STOPPED}
+
+    def suspend_instance(self, instance_num):
+        if self.states.get(instance_num) != RUNNING:
+            raise InstanceStateError(f"Instance {instance_num} is not running")
+        self.states[instance_num] = SUSPENDED
+        return {"instance": instance_num, "method": "signal", "changed": True}
+
+    def resume_instance(self, instance_num):
+        if self.states.get(instance_num) != SUSPENDED:
+            raise InstanceStateError(f"Instance {instance_num} is not suspended")
+        self.states[instance_num] = RUNNING
+        return {"instance": instance_num, "method": "signal", "changed": True}
+
+    def reassign_input(self, instance_num, device_path, kind="gamepad"):
+        if device_path == "/dev/input/broken":
+            raise RuntimeError("device vanished")
+        self.calls.append(("assign_input", instance_num, device_path, kind))
+
+    def subscribe(self, callback):
+        return lambda: None
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(tmp_path, logger):
+    registry = FakeRegistry({1: RUNNING, 2: STARTING})
+    daemon = ControlDaemon(logger, registry=registry, socket_path=tmp_path / "control.sock")
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    client = ControlClient(daemon.socket_path, timeout=5.0)
+    client.registry = registry
+    for _ in range(100):
+        if ControlClient.is_daemon_running(daemon.socket_path):
+            break
+        threading.Event().wait(0.01)
+    yield client
+    daemon.shutdown()
+    thread.join(timeout=5)
+
+
+def test_client_reports_instance_states(client):
+    assert client.get_state(1) == RUNNING
+    assert client.get_state(2) == STARTING
+    # Instances the daemon never saw are stopped, as in the registry
+    assert client.get_state(3) == STOPPED
+    assert client.is_any_active()
+
+
+def test_unsaved_profile_reaches_the_daemon(client):
+    profile = Profile(profile_name="Unsaved", num_players=3)
+    assert client.launch_instance(2, profile, use_gamescope_override=False)["state"] == RUNNING
+    ((op, instance_num, sent, gamescope),) = client.registry.calls
+    assert (op, instance_num, gamescope) == ("launch", 2, False)
+    assert sent == profile
+
+    # Without a profile the daemon uses the saved one
+    client.launch_instance(1)
+    assert client.registry.calls[-1][2] is None
+
+
+def test_stop_round_trip(client):
+    assert client.stop_instance(1) == {"instance": 1, "state": STOPPED}
+    assert client.registry.calls == [("stop", 1)]
+    assert client.get_state(1) == STOPPED
+
+
+def test_suspend_and_resume_round_trip(client):
+    assert client.suspend_instance(1)["changed"]
+    assert client.get_state(1) == SUSPENDED
+    assert client.resume_instance(1)["changed"]
+    assert client.get_state(1) == RUNNING
+
+
+def test_assign_input_round_trip(client):
+    assert client.reassign_input(1, "/dev/input/event7", kind="mouse") is None
+    assert client.registry.calls == [("assign_input", 1, "/dev/input/event7", "mouse")]
+
+
+def test_errors_are_raised_as_their_own_type(client):
+    with pytest.raises(InstanceStateError, match="Instance 2 is not running"):
+        client.suspend_instance(2)
+    with pytest.raises(InstanceStateError, match="not suspended"):
+        client.resume_instance(1)
+    # Errors that are not MultiScope's own arrive as control-plane errors
+    with pytest.raises(ControlPlaneError, match="device vanished"):
+        client.reassign_input(1, "/dev/input/broken")
@@ -0,0 +1,92 @@
+import pytest
+
+from src.services.device_identity import DeviceIdentity, DeviceIdentityIndex
+
+# A DualSense over Bluetooth: three event nodes sharing every id
+_DUALSENSE = {"bustype": "0005", "vendor": "054c", "product": "0ce6", "version": "8100"}
+_DUALSENSE_UNIQ = "a0:ab:51:00:00:01"
+_DUALSENSE_PHYS = "00:1a:7d:da:71:13"
+
+
+def _add_node(sysfs, udev, event_name, dev_numbers, ids, name, uniq="", phys="", udev_props=(), handlers=()):
+    device_dir = sysfs / event_name / "device"
+    (device_dir / "id").mkdir(parents=True)
+    for key, value in ids.items():
+        (device_dir / "id" / key).write_text(value + "\n")
+    (device_dir / "name").write_text(name + "\n")
+    (device_dir / "uniq").write_text(uniq + "\n")
+    (device_dir / "phys").write_text(phys + "\n")
+    for handler in handlers:
+        (device_dir / handler).mkdir()
+    (sysfs / event_name / "dev").write_text(dev_numbers + "\n")
+    if udev_props:
+        udev.mkdir(exist_ok=True)
+        (udev / f"c{dev_numbers}").write_text("".join(f"E:{prop}=1\n" for prop in udev_props))
+
+
+def _add_dualsense(sysfs, udev, with_udev=True):
+    nodes = [
+        ("event20", "13:84", "Sony Interactive Entertainment DualSense Wireless Controller",
+         ("ID_INPUT", "ID_INPUT_JOYSTICK"), ("js0",)),
+        ("event21", "13:85", "Sony Interactive Entertainment DualSense Wireless Controller Motion Sensors",
+         ("ID_INPUT", "ID_INPUT_ACCELEROMETER"), ()),
+        ("event22", "13:86", "Sony Interactive Entertainment DualSense Wireless Controller Touchpad",
+         ("ID_INPUT", "ID_INPUT_TOUCHPAD"), ("mouse2",)),
+    ]
+    for event_name, dev_numbers, name, props, handlers in nodes:
+        _add_node(sysfs, udev, event_name, dev_numbers, _DUALSENSE, name, _DUALSENSE_UNIQ, _DUALSENSE_PHYS,
+                  props if with_udev else (), handlers)
+
+
+def _dualsense_id():
+    return DeviceIdentity(0x05, 0x054C, 0x0CE6, 0x8100, _DUALSENSE_UNIQ, _DUALSENSE_PHYS).to_id()
+
+
+@pytest.mark.parametrize("with_udev", [True, False])
+def test_pad_with_several_nodes_resolves_to_its_gamepad_node(tmp_path, with_udev):
+    sysfs, udev = tmp_path / "sys", tmp_path / "udev"
+    _add_dualsense(sysfs, udev, with_udev)
+    index = DeviceIdentityIndex(str(sysfs), str(udev))
+
+    assert index.resolve(_dualsense_id(), "joystick") == "/dev/input/event20"
+
+
+def test_ambiguous_identity_without_kind_is_not_guessed(tmp_path):
+    sysfs, udev = tmp_path / "sys", tmp_path / "udev"
+    _add_dualsense(sysfs, udev)
+    index = DeviceIdentityIndex(str(sysfs), str(udev))
+
+    assert index.resolve(_dualsense_id()) is None
+
+
+def test_identical_pads_are_told_apart_by_serial(tmp_path):
+    sysfs, udev = tmp_path / "sys", tmp_path / "udev"
+    ids = {"bustype": "0003", "vendor": "045e", "product": "028e", "version": "0114"}
+    _add_node(sysfs, udev, "event5", "13:69", ids, "Xbox 360 Pad", uniq="A1", phys="usb-1/input0",
+              udev_props=("ID_INPUT_JOYSTICK",))
+    _add_node(sysfs, udev, "event6", "13:70", ids, "Xbox 360 Pad", uniq="B2", phys="usb-2/input0",
+              udev_props=("ID_INPUT_JOYSTICK",))
+    index = DeviceIdentityIndex(str(sysfs), str(udev))
+
+    # A firmware update changed the version; the serial still matches
+    moved = DeviceIdentity(0x03, 0x045E, 0x028E, 0x0115, "B2", "usb-3/input0").to_id()
+    assert index.resolve(moved, "joystick") == "/dev/input/event6"
+    # The model alone is ambiguous
+    unknown = DeviceIdentity(0x03, 0x045E, 0x028E, 0x0114, "", "").to_id()
+    assert index.resolve(unknown, "joystick") is None
+
+
+def test_unplugged_pad_does_not_take_an_identical_pad_of_another_player(tmp_path):
+    sysfs, udev = tmp_path / "sys", tmp_path / "udev"
+    ids = {"bustype": "0003", "vendor": "045e", "product": "028e", "version": "0114"}
+    player_1 = DeviceIdentity(0x03, 0x045E, 0x028E, 0x0114, "", "usb-0000:00:14.0-1/input0").to_id()
+    player_2 = DeviceIdentity(0x03, 0x045E, 0x028E, 0x0114, "", "usb-0000:00:14.0-2/input0").to_id()
+    # Only player 2's pad is plugged in
+    _add_node(sysfs, udev, "event7", "13:71", ids, "Xbox 360 Pad", phys="usb-0000:00:14.0-2/input0",
+              udev_props=("ID_INPUT_JOYSTICK",))
+    index = DeviceIdentityIndex(str(sysfs), str(udev))
+
+    assert index.resolve(player_1, "joystick", others=[player_2]) is None
+    assert index.resolve(player_2, "joystick", others=[player_1]) == "/dev/input/event7"
+    # With no other player using the model, a pad moved to another port is still found
+    assert index.resolve(player_1, "joystick") == "/dev/input/event7"
@@ -0,0 +1,63 @@
+import os
+import time
+
+import pytest
+
+from src.core.config import Config
+from src.models.profile import DiskBudgetConfig
+from src.services.disk_budget import DiskBudgetService
+from src.services.instance_state import InstanceStateStore
+
+DAY = 24 * 3600
+# Old enough for every age limit
+OLD = time.time() - 400 * DAY
+
+
+@pytest.fixture
+def local_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "LOCAL_DIR", tmp_path / "local")
+    monkeypatch.setattr(Config, "LOG_DIR", tmp_path / "logs")
+    Config.LOG_DIR.mkdir(parents=True)
+    return Config.LOCAL_DIR
+
+
+def _old_file(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * 4096)
+    os.utime(path, (OLD, OLD))
+    return path
+
+
+def _home_with_old_cache(instance_num):
+    home = Config.get_steam_home_path(instance_num)
+    return _old_file(home / ".local/share/Steam/config/htmlcache/Cache/data_0")
+
+
+@pytest.mark.parametrize("standby", [False, True])
+def test_collection_leaves_recorded_instances_alone(local_dir, process, logger, standby):
+    kept = _home_with_old_cache(1)
+    removed = _home_with_old_cache(2)
+    log_path = _old_file(Config.LOG_DIR / "steam_instance_1.log")
+    # As recorded by the process that started the instance; a collection
+    # run from the CLI has no claims of its own to go by
+    InstanceStateStore(logger).save(1, process.pid, ["sleep", "30"], log_path, standby=standby)
+
+    report = DiskBudgetService(logger).collect(DiskBudgetConfig(ENABLED=True), num_players=2)
+
+    assert kept.exists() and log_path.exists()
+    assert not removed.exists()
+    assert report["homes"]["1"]["running"]
+    assert report["homes"]["1"]["standby"] == standby
+    assert not report["homes"]["2"]["running"]
+    assert {action["instance"] for action in report["actions"]} == {2}
+
+
+def test_collection_ignores_stale_records(local_dir, logger):
+    cache_file = _home_with_old_cache(1)
+    InstanceStateStore(logger).save(1, os.getpid(), ["sleep", "30"], Config.LOG_DIR / "1.log", standby=True)
+
+    report = DiskBudgetService(logger).collect(DiskBudgetConfig(ENABLED=True), num_players=1)
+
+    # The record names a live PID running another command
+    assert not report["homes"]["1"]["running"]
+    assert not cache_file.exists()
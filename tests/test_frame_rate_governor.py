@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from src.core.config import Config
+from src.services.frame_rate_governor import FrameRateGovernor, _TrackedInstance
+
+
+@pytest.fixture
+def governor(tmp_path, monkeypatch, logger):
+    monkeypatch.setattr(Config, "LOG_DIR", tmp_path / "logs")
+    governor = FrameRateGovernor(logger, poll_interval=0.05)
+    yield governor
+    governor.stop()
+
+
+def test_device_failing_to_read_is_no_longer_watched(tmp_path, governor):
+    # Always readable, and reading it fails, like an unplugged evdev node
+    device = tmp_path / "unplugged"
+    device.mkdir()
+    governor.track(1, [str(device)], 60, 15, 60, tmp_path / "instance.log")
+    tracked = governor._instances[1]
+
+    deadline = time.monotonic() + 2
+    while tracked.fds and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert tracked.fds == []
+
+
+def test_display_is_found_in_the_log_as_it_grows(tmp_path, governor):
+    log_path = tmp_path / "instance.log"
+    log_path.write_bytes(b"gamescope: starting\n" * 100)
+    tracked = _TrackedInstance(1, [], 60, 15, 60, log_path)
+
+    assert governor._find_display(tracked) is None
+    searched = tracked.log_offset
+    assert 0 < searched < log_path.stat().st_size
+
+    with open(log_path, "ab") as f:
+        f.write(b"wlserver: [xwm] Xwayland on :3\n")
+    assert governor._find_display(tracked) == ":3"
@@ -0,0 +1,163 @@
+import os
+import select
+import time
+
+import pytest
+
+evdev = pytest.importorskip("evdev")
+
+from evdev import UInput, ecodes as e  # noqa: E402
+
+from src.services.input_router import (INPUT_EVENT, KEYBOARD, MOUSE, InputRouter,  # noqa: E402
+                                       find_event_node)
+
+pytestmark = pytest.mark.skipif(not os.access("/dev/uinput", os.W_OK), reason="/dev/uinput is not writable")
+
+_MOUSE_CAPS = {e.EV_KEY: [e.BTN_LEFT, e.BTN_RIGHT], e.EV_REL: [e.REL_X, e.REL_Y, e.REL_WHEEL]}
+_KEYBOARD_CAPS = {e.EV_KEY: [e.KEY_A, e.KEY_B]}
+
+
+@pytest.fixture
+def router(logger):
+    router = InputRouter(logger)
+    yield router
+    router.stop()
+
+
+@pytest.fixture
+def make_source():
+    """Creates uinput devices standing in for physical mice and keyboards."""
+    sources = []
+
+    def make(name, capabilities):
+        source = UInput(capabilities, name=f"MultiScope Test {name}", vendor=0x1234, product=0x567A)
+        sources.append(source)
+        path = find_event_node(f"MultiScope Test {name}")
+        assert path, f"event node of test source '{name}' not found"
+        return source, path
+
+    yield make
+    for source in sources:
+        source.close()
+
+
+@pytest.fixture
+def open_proxy():
+    fds = []
+
+    def open_(path):
+        fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        fds.append(fd)
+        return fd
+
+    yield open_
+    for fd in fds:
+        os.close(fd)
+
+
+def _send(source, *events):
+    for ev_type, code, value in events:
+        source.write(ev_type, code, value)
+    source.syn()
+
+
+def _read_packets(fd, quiet=0.3):
+    """Returns the packets written to a proxy until none arrive for `quiet` seconds."""
+    poller = select.poll()
+    poller.register(fd, select.POLLIN)
+    packets, current = [], []
+    while poller.poll(quiet * 1000):
+        try:
+            data = os.read(fd, INPUT_EVENT.size * 256)
+        except BlockingIOError:
+            continue
+        for _sec, _usec, ev_type, code, value in INPUT_EVENT.iter_unpack(data):
+            if ev_type != e.EV_SYN:
+                current.append((ev_type, code, value))
+            elif code == e.SYN_REPORT and current:
+                packets.append(current)
+                current = []
+    return packets
+
+
+def test_motion_is_coalesced_within_the_window(router, make_source, open_proxy):
+    source, path = make_source("Coalesce Mouse", _MOUSE_CAPS)
+    proxy = open_proxy(router.attach_instance(1, path, MOUSE, coalesce_window=0.1))
+    for _ in range(10):
+        _send(source, (e.EV_REL, e.REL_X, 1), (e.EV_REL, e.REL_Y, 2))
+
+    packets = _read_packets(proxy)
+    motion = [event for packet in packets for event in packet]
+    assert sum(v for t, c, v in motion if c == e.REL_X) == 10
+    assert sum(v for t, c, v in motion if c == e.REL_Y) == 20
+    # Ten reports sent within one window come out as (at most) two
+    assert 1 <= len(packets) <= 2
+
+
+def test_buttons_and_wheel_flush_pending_motion_in_order(router, make_source, open_proxy):
+    source, path = make_source("Flush Mouse", _MOUSE_CAPS)
+    proxy = open_proxy(router.attach_instance(1, path, MOUSE, coalesce_window=5.0))
+    _send(source, (e.EV_REL, e.REL_X, 5))
+    _send(source, (e.EV_KEY, e.BTN_LEFT, 1))
+    _send(source, (e.EV_REL, e.REL_Y, 3))
+    _send(source, (e.EV_REL, e.REL_WHEEL, 1))
+
+    # The window is far longer than the test, so only flushes write motion
+    packets = _read_packets(proxy)
+    assert packets == [
+        [(e.EV_REL, e.REL_X, 5), (e.EV_KEY, e.BTN_LEFT, 1)],
+        [(e.EV_REL, e.REL_Y, 3), (e.EV_REL, e.REL_WHEEL, 1)],
+    ]
+
+
+def test_detaching_releases_held_keys(router, make_source, open_proxy):
+    source, path = make_source("Detach Keyboard", _KEYBOARD_CAPS)
+    proxy = open_proxy(router.attach_instance(1, path, KEYBOARD))
+    _send(source, (e.EV_KEY, e.KEY_A, 1))
+    assert _read_packets(proxy) == [[(e.EV_KEY, e.KEY_A, 1)]]
+
+    router.assign(1, None, KEYBOARD)
+    assert _read_packets(proxy) == [[(e.EV_KEY, e.KEY_A, 0)]]
+
+
+def test_device_moves_to_another_instance(router, make_source, open_proxy):
+    source, path = make_source("Moving Keyboard", _KEYBOARD_CAPS)
+    first = open_proxy(router.attach_instance(1, path, KEYBOARD))
+    second = open_proxy(router.attach_instance(2, None, KEYBOARD))
+    _send(source, (e.EV_KEY, e.KEY_A, 1))
+    assert _read_packets(first) == [[(e.EV_KEY, e.KEY_A, 1)]]
+
+    router.assign(2, path, KEYBOARD)
+    # The key held on the first instance is released there
+    assert _read_packets(first) == [[(e.EV_KEY, e.KEY_A, 0)]]
+
+    # Let the new grab settle before typing
+    time.sleep(0.05)
+    _send(source, (e.EV_KEY, e.KEY_B, 1))
+    _send(source, (e.EV_KEY, e.KEY_B, 0))
+    assert _read_packets(second) == [[(e.EV_KEY, e.KEY_B, 1)], [(e.EV_KEY, e.KEY_B, 0)]]
+    assert _read_packets(first, quiet=0.1) == []
+
+
+def test_failed_grab_is_logged_once(router, make_source, monkeypatch):
+    source, path = make_source("Grabbed Keyboard", _KEYBOARD_CAPS)
+    # Another program holds the device
+    holder = evdev.InputDevice(path)
+    holder.grab()
+    warnings = []
+    monkeypatch.setattr(router.logger, "warning", warnings.append)
+    try:
+        router.attach_instance(1, path, KEYBOARD)
+        route = router._routes[(1, KEYBOARD)]
+        # As the reattach loop does
+        with router._lock:
+            for _ in range(3):
+                assert not router._try_attach(route)
+    finally:
+        holder.ungrab()
+        holder.close()
+    assert len(warnings) == 1
+
+    with router._lock:
+        assert route.device is not None or router._try_attach(route)
+    assert route.grab_failed is None
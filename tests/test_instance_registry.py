@@ -0,0 +1,81 @@
+import threading
+
+from src.models.profile import Profile
+from src.services.instance_registry import RUNNING, STARTING, SUSPENDED, InstanceRegistry
+
+
+class FakeSuspender:
+    """Suspends only when the test lets it, as CPU sampling takes a while."""
+
+    def __init__(self):
+        self.suspending = threading.Event()
+        self.finish = threading.Event()
+
+    def suspend(self, instance_num, pid):
+        self.suspending.set()
+        assert self.finish.wait(timeout=5)
+        return {"instance": instance_num, "pid": pid, "changed": True}
+
+
+class FakeService:
+    """Spawns standbys only when the test lets it; processes are never started."""
+
+    def __init__(self):
+        self.pids = {}
+        self.spawning = threading.Event()
+        self.spawn = threading.Event()
+        self.held = []
+        self.suspender = FakeSuspender()
+
+    def get_running_pid(self, instance_num):
+        return 1000 + instance_num
+
+    def prepare_standby(self, profile):
+        return [1]
+
+    def standby_has_room(self, profile, instance_num):
+        return True
+
+    def start_standby(self, profile, instance_num):
+        self.spawning.set()
+        assert self.spawn.wait(timeout=5)
+        return f"plan {instance_num}", f"process {instance_num}"
+
+    def hold_standby(self, profile, plan, process):
+        self.held.append((plan, process))
+
+
+def test_service_is_not_locked_while_a_standby_spawns(logger):
+    service = FakeService()
+    registry = InstanceRegistry(logger, service=service)
+    started = []
+    thread = threading.Thread(target=lambda: started.extend(registry.prepare_standby(Profile())))
+    thread.start()
+    try:
+        assert service.spawning.wait(timeout=5)
+        # Stop, suspend and the like can go ahead meanwhile
+        assert registry._service_lock.acquire(timeout=1)
+        registry._service_lock.release()
+    finally:
+        service.spawn.set()
+        thread.join(timeout=5)
+    assert started == [1]
+    assert service.held == [("plan 1", "process 1")]
+
+
+def test_service_is_not_locked_while_an_instance_is_suspended(logger):
+    service = FakeService()
+    registry = InstanceRegistry(logger, service=service)
+    registry._transition(1, STARTING)
+    registry._transition(1, RUNNING, pid=1001)
+    thread = threading.Thread(target=registry.suspend_instance, args=(1,))
+    thread.start()
+    try:
+        assert service.suspender.suspending.wait(timeout=5)
+        assert registry._service_lock.acquire(timeout=1)
+        registry._service_lock.release()
+    finally:
+        service.suspender.finish.set()
+        thread.join(timeout=5)
+    assert registry.get_state(1) == SUSPENDED
+    assert registry.status()[1]["suspend_report"]["pid"] == 1001
@@ -0,0 +1,124 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from src.core.config import Config
+from src.models.profile import (
+    CacheSharingConfig, FrameRatePolicy, PipelineCacheConfig, PlayerInstanceConfig, Profile, SplitscreenConfig,
+)
+from src.services.instance import InstanceService
+
+GOLDEN_DIR = Path(__file__).parent / "golden"
+# Rewrites the golden files from the current output instead of comparing
+UPDATE_GOLDEN = bool(os.environ.get("MULTISCOPE_UPDATE_GOLDEN"))
+# Host nodes the command exposes when present; hidden so the output does not depend on the machine
+_HOST_NODES = {"/dev/uinput", "/dev/input/mice"}
+
+
+@pytest.fixture
+def host(tmp_path, monkeypatch):
+    """A fake home with a Steam install: one game folder and two compatibility tools."""
+    home = tmp_path / "home"
+    steam = home / ".local/share/Steam"
+    (steam / "steamapps/common/Game").mkdir(parents=True)
+    for tool in ("GE-Proton9-1", "LegacyRuntime"):
+        (steam / "compatibilitytools.d" / tool).mkdir(parents=True)
+    monkeypatch.setattr(Path, "home", classmethod(lambda cls: home))
+    monkeypatch.setattr(Config, "LOCAL_DIR", home / ".local/share/multiscope")
+    monkeypatch.setattr(Config, "LOG_DIR", home / ".cache/multiscope/logs")
+
+    exists = Path.exists
+    monkeypatch.setattr(Path, "exists", lambda self: str(self) not in _HOST_NODES and exists(self))
+    return home
+
+
+def _profile(**overrides):
+    values = dict(
+        profile_name="Golden",
+        game_id="570",
+        num_players=2,
+        instance_width=1920,
+        instance_height=1080,
+        mode="splitscreen",
+        splitscreen=SplitscreenConfig(orientation="horizontal"),
+        player_configs=[PlayerInstanceConfig(), PlayerInstanceConfig()],
+    )
+    values.update(overrides)
+    return Profile(**values)
+
+
+CASES = {
+    "splitscreen_gamescope": dict(
+        render_scale=0.5,
+        upscale_filter="fsr",
+        frame_rate=FrameRatePolicy(focused_fps=60, unfocused_fps=15),
+        cache_sharing=CacheSharingConfig(source="multiscope", shadercache="ro"),
+        pipeline_cache=PipelineCacheConfig(enabled=True),
+    ),
+    "fullscreen_minimal_client": dict(
+        mode="fullscreen",
+        splitscreen=None,
+        use_gamescope=False,
+        client_mode="minimal",
+    ),
+}
+
+
+def _normalize(argv, home):
+    return [arg.replace(str(home), "$HOME") for arg in argv]
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+@pytest.mark.parametrize("instance_num", [1, 2])
+def test_command_matches_golden(case, instance_num, host, logger):
+    service = InstanceService(logger=logger)
+    profile = _profile(**CASES[case])
+    device_info = service._validate_input_devices(profile, instance_num - 1, instance_num)
+    argv = service._build_command(
+        profile, device_info, instance_num, Config.get_steam_home_path(instance_num),
+        profile.effective_num_players(), dry_run=True,
+    )
+
+    golden_path = GOLDEN_DIR / f"{case}_{instance_num}.json"
+    actual = _normalize(argv, host)
+    if UPDATE_GOLDEN:
+        golden_path.parent.mkdir(exist_ok=True)
+        golden_path.write_text(json.dumps(actual, indent=2) + "\n", encoding="utf-8")
+    assert actual == json.loads(golden_path.read_text(encoding="utf-8"))
+
+
+def test_replayed_plan_prepares_home_again(host, logger, monkeypatch):
+    service = InstanceService(logger=logger)
+    # Host mounts such as /tmp/.X11-unix need not exist where the tests run
+    monkeypatch.setattr(service.plan_cache, "revalidate", lambda plan: None)
+    profile = _profile(pipeline_cache=PipelineCacheConfig(enabled=True))
+    compiled = service._get_instance_plan(profile, 1)
+    assert compiled.replayable
+
+    home = Path(compiled.home_path)
+    cache_dir = service.pipeline_cache_service.get_cache_dir(profile.game_id)
+    for path in (home, cache_dir):
+        for child in sorted(path.rglob("*"), reverse=True):
+            child.rmdir() if child.is_dir() else child.unlink()
+        path.rmdir()
+
+    replayed = service._get_instance_plan(profile, 1)
+    assert replayed.argv == compiled.argv
+    assert (home / ".local/share/Steam/steamapps").is_dir()
+    assert (home / ".steam").is_dir()
+    assert (cache_dir / "dxvk").is_dir()
+
+
+def test_dry_run_leaves_the_pipeline_cache_untouched(host, logger):
+    service = InstanceService(logger=logger)
+    profile = _profile(**CASES["splitscreen_gamescope"])
+    device_info = service._validate_input_devices(profile, 0, 1)
+    argv = service._build_command(
+        profile, device_info, 1, Config.get_steam_home_path(1), profile.effective_num_players(), dry_run=True,
+    )
+
+    cache_dir = service.pipeline_cache_service.get_cache_dir(profile.game_id)
+    assert "DXVK_STATE_CACHE_PATH" in argv
+    assert not cache_dir.exists()
@@ -0,0 +1,108 @@
+import pytest
+
+from src.models.layout import Tile, compute_custom_layout, compute_grid_layout, grid_shape
+from src.models.profile import PlayerInstanceConfig, Profile, SplitscreenConfig
+
+WIDTH, HEIGHT = 1920, 1080
+ORIENTATIONS = ("horizontal", "vertical")
+
+
+def _splitscreen_profile(num_players, orientation, custom_layout=None):
+    return Profile(
+        instance_width=WIDTH,
+        instance_height=HEIGHT,
+        mode="splitscreen",
+        splitscreen=SplitscreenConfig(orientation=orientation, custom_layout=custom_layout),
+        player_configs=[PlayerInstanceConfig() for _ in range(num_players)],
+    )
+
+
+@pytest.mark.parametrize("orientation", ORIENTATIONS)
+@pytest.mark.parametrize("num_players", range(1, 17))
+def test_grid_shape_fits_players(num_players, orientation):
+    columns, rows = grid_shape(num_players, orientation)
+    assert columns * rows >= num_players
+    # Near-square: no more than one line of cells is left empty
+    assert columns * rows - num_players < min(columns, rows)
+    assert abs(columns - rows) <= 1
+    if orientation == "horizontal":
+        assert columns >= rows
+    else:
+        assert rows >= columns
+
+
+@pytest.mark.parametrize("orientation", ORIENTATIONS)
+@pytest.mark.parametrize("num_players", range(1, 17))
+def test_grid_layout_covers_output_exactly(num_players, orientation):
+    tiles = compute_grid_layout(WIDTH, HEIGHT, num_players, orientation)
+    assert len(tiles) == num_players
+    assert sum(t.width * t.height for t in tiles) == WIDTH * HEIGHT
+    for tile in tiles:
+        assert tile.width > 0 and tile.height > 0
+        assert tile.x + tile.width <= WIDTH and tile.y + tile.height <= HEIGHT
+    # With the areas adding up, no overlap means no gap either
+    for a in tiles:
+        for b in tiles:
+            if a is b:
+                continue
+            overlap_w = min(a.x + a.width, b.x + b.width) - max(a.x, b.x)
+            overlap_h = min(a.y + a.height, b.y + b.height) - max(a.y, b.y)
+            assert overlap_w <= 0 or overlap_h <= 0
+
+
+def test_grid_layout_without_players_is_empty():
+    assert compute_grid_layout(WIDTH, HEIGHT, 0) == []
+    assert grid_shape(0) == (1, 1)
+
+
+@pytest.mark.parametrize("orientation, expected", [
+    ("horizontal", {
+        1: [(WIDTH, HEIGHT)],
+        2: [(WIDTH // 2, HEIGHT)] * 2,
+        3: [(WIDTH, HEIGHT // 2)] + [(WIDTH // 2, HEIGHT // 2)] * 2,
+        4: [(WIDTH // 2, HEIGHT // 2)] * 4,
+    }),
+    ("vertical", {
+        1: [(WIDTH, HEIGHT)],
+        2: [(WIDTH, HEIGHT // 2)] * 2,
+        3: [(WIDTH // 2, HEIGHT)] + [(WIDTH // 2, HEIGHT // 2)] * 2,
+        4: [(WIDTH // 2, HEIGHT // 2)] * 4,
+    }),
+])
+def test_profile_keeps_previous_layouts_up_to_four_players(orientation, expected):
+    for num_players, sizes in expected.items():
+        profile = _splitscreen_profile(num_players, orientation)
+        actual = [profile.get_instance_dimensions(n) for n in range(1, num_players + 1)]
+        assert actual == sizes, (num_players, orientation)
+
+
+def test_custom_layout_converts_fractions_to_pixels():
+    tiles = compute_custom_layout(WIDTH, HEIGHT, [(0, 0, 0.75, 1.0), (0.75, 0, 0.25, 0.5), (0.75, 0.5, 0.25, 0.5)])
+    assert tiles == [
+        Tile(0, 0, 1440, 1080),
+        Tile(1440, 0, 480, 540),
+        Tile(1440, 540, 480, 540),
+    ]
+
+
+def test_custom_layout_rounds_without_gaps():
+    thirds = [(i / 3, 0, 1 / 3, 1.0) for i in range(3)]
+    tiles = compute_custom_layout(1000, 600, thirds)
+    assert [t.x for t in tiles] == [0, 333, 667]
+    assert sum(t.width for t in tiles) == 1000
+
+
+def test_profile_uses_custom_layout():
+    rects = [(0, 0, 0.5, 1.0), (0.5, 0, 0.5, 1.0)]
+    profile = _splitscreen_profile(2, "vertical", custom_layout=rects)
+    assert profile.get_layout() == compute_custom_layout(WIDTH, HEIGHT, rects)
+
+
+def test_profile_falls_back_to_grid_when_custom_layout_is_short():
+    profile = _splitscreen_profile(3, "horizontal", custom_layout=[(0, 0, 0.5, 1.0), (0.5, 0, 0.5, 1.0)])
+    assert profile.get_layout() == compute_grid_layout(WIDTH, HEIGHT, 3, "horizontal")
+
+
+def test_custom_layout_outside_the_output_is_rejected():
+    with pytest.raises(ValueError):
+        SplitscreenConfig(orientation="horizontal", custom_layout=[(0.5, 0, 0.75, 1.0)])
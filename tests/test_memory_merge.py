@@ -0,0 +1,29 @@
+import pytest
+
+from src.services import memory_merge
+from src.services.memory_merge import MemoryMergeService
+
+
+@pytest.fixture
+def service(logger):
+    service = MemoryMergeService(logger)
+    # As after a successful `prepare`
+    service._ready = True
+    return service
+
+
+@pytest.mark.parametrize("stat, ready", [
+    ({"ksm_merge_any": 0}, False),
+    ({"ksm_merge_any": 1}, True),
+    # Kernels without the field cannot tell; launches keep opting in
+    ({"ksm_merging_pages": 0}, True),
+])
+def test_launches_stop_opting_in_when_exec_drops_the_flag(service, monkeypatch, stat, ready):
+    reads = []
+    monkeypatch.setattr(memory_merge, "read_ksm_stat", lambda pid: reads.append(pid) or stat)
+
+    service.check_launched(1234)
+    assert service._ready is ready
+    # Only the first launch is checked
+    service.check_launched(5678)
+    assert reads == [1234]
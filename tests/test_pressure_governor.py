@@ -0,0 +1,177 @@
+import pytest
+from pydantic import ValidationError
+
+from src.core.config import Config
+from src.models.profile import PressureGovernorConfig
+from src.services.pressure_governor import CPU_WEIGHT, FPS_CAP, PAUSE, SETTLE_SECONDS, PressureGovernor, read_psi
+
+# Instance number -> priority; instance 3 is the most important
+PRIORITIES = {1: 0, 2: 5, 3: 10}
+
+
+def _write_psi(directory, name_format="{}", **some_avg10):
+    for resource in ("cpu", "memory", "io"):
+        avg10 = some_avg10.get(resource, 0.0)
+        (directory / name_format.format(resource)).write_text(
+            f"some avg10={avg10:.2f} avg60={avg10 / 2:.2f} avg300=0.00 total=123456\n"
+            "full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n",
+            encoding="utf-8",
+        )
+
+
+@pytest.fixture
+def pressure_root(tmp_path):
+    root = tmp_path / "pressure"
+    root.mkdir()
+    _write_psi(root)
+    return root
+
+
+@pytest.fixture
+def governor(tmp_path, monkeypatch, pressure_root, logger):
+    monkeypatch.setattr(Config, "LOG_DIR", tmp_path / "logs")
+    actions = []
+
+    def apply(instance_num, action, value):
+        actions.append((instance_num, action, value))
+        return True
+
+    governor = PressureGovernor(logger, apply, pressure_root=str(pressure_root), poll_interval=3600)
+    governor.actions = actions
+    for instance_num, priority in PRIORITIES.items():
+        governor.track(instance_num, priority)
+    yield governor
+    governor.stop()
+
+
+def _run(governor, start, end, step=1.0):
+    """Evaluates once per `step` seconds in [start, end); returns the actions taken and when."""
+    taken = []
+    now = start
+    while now < end:
+        result = governor.evaluate(now=now)
+        if result:
+            taken.append((now, result))
+        now += step
+    return taken
+
+
+def _engage_all(governor, pressure_root, **some_avg10):
+    _write_psi(pressure_root, **some_avg10)
+    return _run(governor, 0.0, 100.0)
+
+
+def test_read_psi_parses_some_and_full(pressure_root):
+    _write_psi(pressure_root, cpu=12.5)
+    psi = read_psi(str(pressure_root / "cpu"))
+    assert psi["some"]["avg10"] == 12.5
+    assert psi["some"]["avg60"] == 6.25
+    assert psi["full"]["total"] == 0
+    assert read_psi(str(pressure_root / "missing")) == {}
+
+
+@pytest.mark.parametrize("resource", ["cpu", "memory", "io"])
+def test_engages_stages_on_least_important_first(governor, pressure_root, resource):
+    taken = _engage_all(governor, pressure_root, **{resource: 60.0})
+
+    assert [result for _, result in taken] == [
+        (1, FPS_CAP, True), (1, CPU_WEIGHT, True), (1, PAUSE, True),
+        (2, FPS_CAP, True), (2, CPU_WEIGHT, True), (2, PAUSE, True),
+    ]
+    # One action per settle period
+    assert [now for now, _ in taken] == [i * SETTLE_SECONDS for i in range(6)]
+    # The most important instance is spared
+    assert all(instance_num != 3 for instance_num, _, _ in governor.actions)
+    config = governor.config
+    assert governor.actions[:3] == [(1, FPS_CAP, config.capped_fps), (1, CPU_WEIGHT, config.cpu_weight), (1, PAUSE, 1)]
+    assert governor.snapshot()["stages"] == {1: [FPS_CAP, CPU_WEIGHT, PAUSE], 2: [FPS_CAP, CPU_WEIGHT, PAUSE], 3: []}
+
+
+def test_engages_only_the_stages_pressure_calls_for(governor, pressure_root):
+    # Between the CPU weight and pause thresholds
+    taken = _engage_all(governor, pressure_root, cpu=5.0, io=30.0)
+    assert [result for _, result in taken] == [
+        (1, FPS_CAP, True), (1, CPU_WEIGHT, True), (2, FPS_CAP, True), (2, CPU_WEIGHT, True),
+    ]
+
+
+def test_releases_after_recovery_most_important_first(governor, pressure_root):
+    _engage_all(governor, pressure_root, cpu=60.0)
+    governor.actions.clear()
+    _write_psi(pressure_root)
+    recover = governor.config.recover_seconds
+
+    # Calm starts at 100; nothing is undone before it lasted recover_seconds
+    assert _run(governor, 100.0, 100.0 + recover) == []
+    assert governor.evaluate(now=100.0 + recover) == (2, PAUSE, False)
+
+    taken = [result for _, result in _run(governor, 101.0 + recover, 1000.0)]
+    assert taken == [
+        (2, CPU_WEIGHT, False), (2, FPS_CAP, False),
+        (1, PAUSE, False), (1, CPU_WEIGHT, False), (1, FPS_CAP, False),
+    ]
+    assert governor.actions[0] == (2, PAUSE, None)
+    assert all(value is None for _, _, value in governor.actions)
+    assert governor.snapshot()["stages"] == {1: [], 2: [], 3: []}
+
+
+def test_pressure_above_release_factor_holds_responses(governor, pressure_root):
+    _engage_all(governor, pressure_root, cpu=12.0)
+    # Below the FPS cap threshold but not below half of it
+    _write_psi(pressure_root, cpu=6.0)
+    assert _run(governor, 100.0, 1000.0) == []
+
+
+def test_renewed_pressure_restarts_recovery(governor, pressure_root):
+    _engage_all(governor, pressure_root, cpu=12.0)
+    recover = governor.config.recover_seconds
+    _write_psi(pressure_root)
+    assert _run(governor, 100.0, 100.0 + recover - 1) == []
+    _write_psi(pressure_root, cpu=8.0)
+    assert governor.evaluate(now=100.0 + recover - 1) is None
+    _write_psi(pressure_root)
+    # The calm period starts over
+    assert _run(governor, 100.0 + recover, 100.0 + 2 * recover) == []
+    assert governor.evaluate(now=100.0 + 2 * recover) == (2, FPS_CAP, False)
+
+
+def test_instance_cgroup_pressure_counts(tmp_path, governor, pressure_root):
+    cgroup = tmp_path / "cgroup"
+    cgroup.mkdir()
+    _write_psi(cgroup, "{}.pressure", memory=30.0)
+    governor._cgroup_of = lambda instance_num: str(cgroup) if instance_num == 2 else None
+
+    assert governor.read_pressure()["2"]["memory"] == 30.0
+    assert governor.evaluate(now=0.0) == (1, FPS_CAP, True)
+
+
+def test_unavailable_response_is_not_undone(governor, pressure_root):
+    governor._apply = lambda instance_num, action, value: governor.actions.append((instance_num, action, value))
+    _write_psi(pressure_root, cpu=12.0)
+    assert governor.evaluate(now=0.0) == (1, FPS_CAP, True)
+    _write_psi(pressure_root)
+    # Released without calling apply, since nothing took effect
+    assert [result for _, result in _run(governor, 10.0, 1000.0)] == [(1, FPS_CAP, False)]
+    assert governor.actions == [(1, FPS_CAP, 30)]
+
+
+@pytest.mark.parametrize("thresholds", [
+    {"FPS_CAP_AT": 30.0},
+    {"CPU_WEIGHT_AT": 5.0},
+    {"PAUSE_AT": 20.0},
+    {"FPS_CAP_AT": 30.0, "CPU_WEIGHT_AT": 20.0, "PAUSE_AT": 60.0},
+])
+def test_rejects_out_of_order_thresholds(thresholds):
+    with pytest.raises(ValidationError):
+        PressureGovernorConfig(**thresholds)
+
+
+def test_accepts_ordered_thresholds():
+    config = PressureGovernorConfig(FPS_CAP_AT=5.0, CPU_WEIGHT_AT=5.0, PAUSE_AT=90.0)
+    assert (config.fps_cap_at, config.cpu_weight_at, config.pause_at) == (5.0, 5.0, 90.0)
+
+
+@pytest.mark.parametrize("values", [{"CAPPED_FPS": 0}, {"RECOVER_SECONDS": -1.0}])
+def test_rejects_out_of_range_responses(values):
+    with pytest.raises(ValidationError):
+        PressureGovernorConfig(**values)
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import pytest
+
+from src.core.config import Config
+from src.models.profile import CacheSharingConfig
+from src.services.shared_cache import SharedCacheService
+
+SANDBOX_STEAM = Path("/home/sandbox/.local/share/Steam")
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    home = tmp_path / "home"
+    (home / ".local/share/Steam/steamapps/shadercache").mkdir(parents=True)
+    monkeypatch.setattr(Path, "home", classmethod(lambda cls: home))
+    monkeypatch.setattr(Config, "LOCAL_DIR", tmp_path / "local")
+    return home
+
+
+def test_dry_run_creates_nothing(home, logger):
+    service = SharedCacheService(logger)
+    args = service.get_bind_args(CacheSharingConfig(source="multiscope", shadercache="rw"), 1, SANDBOX_STEAM,
+                                 dry_run=True)
+
+    assert args[:2] == ["--bind", str(Config.get_shared_cache_dir() / "shadercache")]
+    assert not Config.LOCAL_DIR.exists()
+
+
+def test_host_cache_is_locked_from_outside(home, logger):
+    service = SharedCacheService(logger)
+    config = CacheSharingConfig(source="host", shadercache="rw")
+    host_cache = home / ".local/share/Steam/steamapps/shadercache"
+
+    assert service.get_bind_args(config, 1, SANDBOX_STEAM)[0] == "--bind"
+    # The second instance finds the lock taken and gets the cache read-only
+    assert service.get_bind_args(config, 2, SANDBOX_STEAM)[0] == "--ro-bind"
+    assert list(host_cache.iterdir()) == []
+    assert list(Config.get_cache_lock_dir().iterdir()) == [Config.get_cache_lock_dir() / "host_shadercache.lock"]
+
+    service.release(1)
+    assert service.get_bind_args(config, 2, SANDBOX_STEAM)[0] == "--bind"
+    service.release(2)
@@ -0,0 +1,14 @@
+import pytest
+
+from src.services.steam_client import FULL, LITE, MINIMAL, build_steam_command
+
+
+@pytest.mark.parametrize("mode", [FULL, LITE, MINIMAL])
+def test_gamescope_sessions_keep_the_gamepad_ui(mode):
+    assert "-gamepadui" in build_steam_command(mode, use_gamescope=True)
+    assert "-gamepadui" not in build_steam_command(mode, use_gamescope=False)
+
+
+def test_minimal_mode_opens_small_mode_only_outside_gamescope():
+    assert build_steam_command(MINIMAL, use_gamescope=False)[-1] == "steam://open/minigameslist"
+    assert "steam://open/minigameslist" not in build_steam_command(MINIMAL, use_gamescope=True)
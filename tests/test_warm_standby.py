@@ -0,0 +1,136 @@
+import json
+import subprocess
+import time
+
+import pytest
+
+from src.core.config import Config
+from src.models.launch_plan import InstancePlan
+from src.services.instance import InstanceService
+from src.services.instance_state import InstanceStateStore
+from src.services.warm_standby import WarmStandbyPool
+
+
+def _state(pid):
+    with open(f"/proc/{pid}/stat", "rb") as f:
+        stat = f.read()
+    return stat[stat.rfind(b")") + 2:].split()[0].decode()
+
+
+def _wait_for_state(pid, states, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while _state(pid) not in states and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return _state(pid)
+
+
+@pytest.fixture
+def pool(logger):
+    discarded = []
+    # Long poll interval: the tests drive warm-up themselves
+    pool = WarmStandbyPool(logger, on_discard=discarded.append, poll_interval=3600)
+    pool.discarded = discarded
+    yield pool
+    pool.clear()
+
+
+def _plan(instance_num, tmp_path):
+    return InstancePlan(
+        instance_num=instance_num, argv=["sleep", "30"],
+        home_path=str(tmp_path / "home"), log_path=str(tmp_path / "instance.log"),
+    )
+
+
+def test_held_standby_is_resumed_on_take(pool, process, tmp_path):
+    pool.add(1, "key", _plan(1, tmp_path), process)
+    standby = pool._standbys[1]
+    pool._hold(standby, time.monotonic())
+    assert _wait_for_state(process.pid, {"T"}) == "T"
+
+    assert pool.take(1, "key") is standby
+    assert not standby.stopped
+    assert _wait_for_state(process.pid, {"S", "R"}) in {"S", "R"}
+
+
+def test_taken_standby_is_not_stopped_by_the_monitor(pool, process, tmp_path):
+    pool.add(1, "key", _plan(1, tmp_path), process)
+    # The monitor looked at the standby just before Play took it
+    standby = pool._standbys[1]
+    assert pool.take(1, "key") is standby
+
+    pool._hold(standby, time.monotonic())
+    assert not standby.stopped
+    assert standby.ready_at is None
+    time.sleep(0.05)
+    assert _state(process.pid) != "T"
+
+
+def test_mismatched_standby_is_discarded(pool, process, tmp_path):
+    pool.add(1, "key", _plan(1, tmp_path), process)
+    assert pool.take(1, "other") is None
+    assert process.poll() is not None
+    assert pool.discarded == [1]
+
+
+def _record_standbys(store, tmp_path, owner_pid=None):
+    """Records a standby (instance 1) and a running instance (2); returns their processes."""
+    argv = ["sleep", "30"]
+    standby = subprocess.Popen(argv)
+    running = subprocess.Popen(argv)
+    store.save(1, standby.pid, argv, tmp_path / "1.log", standby=True)
+    store.save(2, running.pid, argv, tmp_path / "2.log")
+    if owner_pid is not None:
+        path = store._path(1)
+        record = json.loads(path.read_text(encoding="utf-8"))
+        record["owner_pid"] = owner_pid
+        path.write_text(json.dumps(record), encoding="utf-8")
+    return standby, running
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, logger):
+    monkeypatch.setattr(Config, "LOCAL_DIR", tmp_path / "local")
+    return InstanceStateStore(logger)
+
+
+def test_orphaned_standby_is_killed_on_startup(tmp_path, store, logger):
+    # The process that held the standby has exited
+    owner = subprocess.Popen(["true"])
+    owner.wait()
+    standby, running = _record_standbys(store, tmp_path, owner_pid=owner.pid)
+    try:
+        service = InstanceService(logger=logger)
+        assert standby.wait(timeout=5) is not None
+        assert sorted(service.processes) == [2]
+        assert sorted(store.load_all()) == [2]
+    finally:
+        for proc in (standby, running):
+            proc.kill()
+            proc.wait()
+
+
+def test_standby_of_a_live_owner_is_left_alone(tmp_path, store, logger):
+    # Recorded by this process, as a running GUI would
+    standby, running = _record_standbys(store, tmp_path)
+    try:
+        service = InstanceService(logger=logger)
+        assert standby.poll() is None
+        assert sorted(service.processes) == [2]
+        assert sorted(store.load_all()) == [1, 2]
+    finally:
+        for proc in (standby, running):
+            proc.kill()
+            proc.wait()
+
+
+def test_plan_only_service_adopts_nothing(tmp_path, store, logger):
+    standby, running = _record_standbys(store, tmp_path, owner_pid=0)
+    try:
+        service = InstanceService(logger=logger, adopt=False)
+        assert standby.poll() is None
+        assert service.processes == {}
+        assert sorted(store.load_all()) == [1, 2]
+    finally:
+        for proc in (standby, running):
+            proc.kill()
+            proc.wait()